@@ -0,0 +1,89 @@
+"""
+lambda main 함수의 콜드 스타트 import 시간 측정
+
+python -X importtime 으로 커맨드별로 불러오는 모듈을 새 프로세스에서 import 하고
+전체 시간과 오래 걸린 모듈을 출력함
+
+사용법: python scripts/with_lambda/_bench/cold_start.py [--top N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+
+# 커맨드별로 콜드 스타트에서 실행되는 import
+SCENARIOS = {
+    "ip": "import lambda_function",
+    "user_count": "import lambda_function, data_manager; data_manager.get_dynamodb()",
+    "등록": "import lambda_function, data_manager, misc; data_manager.get_dynamodb(); import mojang",
+    "랭킹": "import lambda_function, data_manager; data_manager.get_dynamodb(); import get_rank_info",
+    "검색": "import lambda_function, data_manager; data_manager.get_dynamodb(); import get_character_info",
+    "유저분포": "import lambda_function, data_manager; data_manager.get_dynamodb(); import get_level_distribution",
+    "update_1D": "import lambda_function, data_manager; data_manager.get_dynamodb(); import update",
+}
+
+
+def run(code: str) -> tuple[float, list[tuple[int, int, str]]]:
+    """
+    새 프로세스에서 code를 실행하고 (전체 실행 시간, importtime 결과) 반환
+    [(self_us, cumulative_us, module), ...]
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=MAIN_DIR,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative_us), module.rstrip()))
+
+    return elapsed, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=5, help="출력할 모듈 개수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+
+    for name, code in SCENARIOS.items():
+        try:
+            runs = [run(code) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name}: 실패 ({e})")
+            continue
+
+        # 최상위 import (들여쓰기 1칸)의 cumulative 합
+        totals = [
+            sum(c for _, c, m in rows if not m.startswith("  ")) for _, rows in runs
+        ]
+        best = totals.index(min(totals))
+        elapsed, rows = runs[best]
+
+        print(
+            f"{name}: import {totals[best] / 1000:.0f}ms, 전체 {elapsed * 1000:.0f}ms"
+        )
+
+        # 2단계 깊이까지의 모듈 중 오래 걸린 모듈
+        modules = [(c, m.strip()) for _, c, m in rows if not m.startswith(" " * 5)]
+        for cumulative_us, module in sorted(modules, reverse=True)[: args.top]:
+            print(f"    {cumulative_us / 1000:7.0f}ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
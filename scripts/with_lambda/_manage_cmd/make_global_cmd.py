@@ -1,7 +1,6 @@
 import os
 import requests
 
-
 url = f"https://discord.com/api/v10/applications/{os.getenv("DISCORD_APP_ID")}/commands"
 
 # json = {
@@ -50,7 +49,7 @@ json_objects = {
         "options": [
             {
                 "name": "랭킹범위",
-                "description": "랭킹 범위: 1~100..1~100 (예시: 1..10, 70..100)",
+                "description": "랭킹 범위: 시작..끝, 한 번에 100개까지 (예시: 1..10, 70..100, 250..300)",
                 "type": 3,
                 "required": False,
             },
@@ -153,6 +152,71 @@ json_objects = {
                     },
                 ],
             },
+            {
+                "name": "전체",
+                "description": "모든 슬롯 캐릭터의 레벨 히스토리",
+                "type": 1,
+                "options": [
+                    {
+                        "name": "닉네임",
+                        "description": "캐릭터 닉네임",
+                        "type": 3,
+                        "required": True,
+                    },
+                    {
+                        "name": "기간",
+                        "description": "레벨 히스토리를 조회할 기간: 2~ (예시: 2, 10, 123)",
+                        "type": 4,
+                        "required": False,
+                        "min_value": 2,
+                    },
+                    {
+                        "name": "날짜",
+                        "description": "레벨 히스토리를 조회할 기준 날짜: YYYY-MM-DD, MM-DD, DD, -1, ... (예시: 2025-12-31, 12-01, 05, -1, -20)",
+                        "type": 3,
+                        "required": False,
+                    },
+                    {
+                        "name": "나만보기",
+                        "description": "답변 메시지가 다른사람에게 보이지 않도록 합니다.",
+                        "type": 5,
+                        "required": False,
+                    },
+                ],
+            },
+        ],
+    },
+    "비교": {
+        "name": "비교",
+        "type": 1,
+        "integration_types": [0, 1],
+        "description": "여러 플레이어의 대표 캐릭터 레벨을 비교합니다.",
+        "options": [
+            {
+                "name": "닉네임",
+                "description": "비교할 닉네임들: 띄어쓰기나 쉼표로 구분, 최대 10명 (예시: ProDays, steve)",
+                "type": 3,
+                "required": True,
+            },
+            {
+                "name": "기간",
+                "description": "레벨 히스토리를 조회할 기간: 2~ (예시: 2, 10, 123)",
+                "type": 4,
+                "required": False,
+                "min_value": 2,
+            },
+            {
+                "name": "날짜",
+                "description": "레벨 히스토리를 조회할 기준 날짜: YYYY-MM-DD, MM-DD, DD, -1, ... (예시: 2025-12-31, 12-01, 05, -1, -20)",
+                "type": 3,
+                "required": False,
+            },
+            {
+                "name": "나만보기",
+                "description": "답변 메시지가 다른사람에게 보이지 않도록 합니다.",
+                "type": 5,
+                "required": False,
+            },
         ],
     },
     "유저분포": {
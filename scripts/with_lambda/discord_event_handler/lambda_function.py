@@ -1,13 +1,29 @@
 import os
 import json
+import time
 import boto3
 import traceback
 
 from nacl.signing import VerifyKey
 from nacl.exceptions import BadSignatureError
 
+# main/cache_key.py (배포할 때 복사됨)
+import cache_key
 
 PUBLIC_KEY = os.getenv("DISCORD_PUBLIC_KEY")
+DB_NAME = os.getenv("DB_NAME", "")
+MAIN_FUNCTION_NAME = "TA_DEV-lambda_main"
+
+# 컨테이너가 살아있는 동안 재사용
+verify_key = VerifyKey(bytes.fromhex(PUBLIC_KEY))
+lambda_service = boto3.client(service_name="lambda", region_name="ap-northeast-2")
+result_cache = (
+    boto3.resource("dynamodb", region_name="ap-northeast-2").Table(
+        DB_NAME + "-ResultCache"
+    )
+    if DB_NAME
+    else None
+)
 
 
 def lambda_handler(event, context):
@@ -19,8 +35,6 @@ def lambda_handler(event, context):
         signature = event["headers"]["x-signature-ed25519"]
         timestamp = event["headers"]["x-signature-timestamp"]
 
-        verify_key = VerifyKey(bytes.fromhex(PUBLIC_KEY))
-
         message = timestamp + event["body"]
 
         try:
@@ -36,26 +50,51 @@ def lambda_handler(event, context):
             return {"statusCode": 200, "body": json.dumps({"type": 1})}
         elif cmd_type == 2:
 
-            lambda_service = boto3.client(service_name="lambda", region_name="ap-northeast-2")
-            functionName = "TA_DEV-lambda_main"
-            lambda_service.invoke(
-                FunctionName=functionName, InvocationType="Event", Payload=json.dumps(event)
-            )
-
-            body = json.loads(event["body"])
             options = body["data"]["options"] if "options" in body["data"] else []
 
-            flag = 128
+            ephemeral = False
             for i in options:
                 if i["name"] == "나만보기" and i["value"]:
-                    flag = 192
+                    ephemeral = True
                     break
                 elif "options" in i:
                     for j in i["options"]:
                         if j["name"] == "나만보기" and j["value"]:
-                            flag = 192
+                            ephemeral = True
                             break
 
+            # 캐시된 결과가 있으면 메인 람다를 거치지 않고 바로 응답
+            cached = get_cached_result(body)
+            if cached is not None:
+                print(f"cache hit: {cached['cache_key']}")
+
+                # 메인 람다를 거치지 않아도 명령어 로그는 남김
+                log_cached(event, cached)
+
+                return {
+                    "statusCode": 200,
+                    "headers": {"Content-Type": "application/json"},
+                    "body": json.dumps(
+                        {
+                            "type": 4,
+                            "data": {
+                                "content": cached["content"],
+                                "embeds": [
+                                    {"image": {"url": url}}
+                                    for url in cached["image_urls"]
+                                ],
+                                "flags": 64 if ephemeral else 0,
+                            },
+                        }
+                    ),
+                }
+
+            lambda_service.invoke(
+                FunctionName=MAIN_FUNCTION_NAME,
+                InvocationType="Event",
+                Payload=json.dumps(event),
+            )
+
             return {
                 "statusCode": 200,
                 "headers": {"Content-Type": "application/json"},
@@ -63,7 +102,7 @@ def lambda_handler(event, context):
                     {
                         "type": 5,
                         "data": {
-                            "flags": flag,
+                            "flags": 192 if ephemeral else 128,
                         },
                     }
                 ),
@@ -73,3 +112,45 @@ def lambda_handler(event, context):
 
     except Exception:
         return {"statusCode": 400, "body": json.dumps(traceback.format_exc())}
+
+
+def get_cached_result(body):
+    """
+    결과 캐시 조회, 없거나 만료됐거나 조회에 실패하면 None
+    """
+    if result_cache is None:
+        return None
+
+    try:
+        key = cache_key.get_cache_key(body)
+        if key is None:
+            return None
+
+        item = result_cache.get_item(Key={"cache_key": key}).get("Item")
+
+        if item is None or int(item["expires_at"]) < time.time():
+            return None
+
+        return item
+
+    except Exception:
+        print(traceback.format_exc())
+        return None
+
+
+def log_cached(event, cached):
+    """
+    캐시로 응답한 명령어의 로그를 메인 람다에 비동기로 넘김 (sm.send_log와 같은 형식으로 전송됨)
+    로그 전송 실패는 응답에 영향 없음
+    """
+    try:
+        lambda_service.invoke(
+            FunctionName=MAIN_FUNCTION_NAME,
+            InvocationType="Event",
+            Payload=json.dumps(
+                {"action": "log_cached", "event": event, "msg": cached["content"]}
+            ),
+        )
+
+    except Exception:
+        print(traceback.format_exc())
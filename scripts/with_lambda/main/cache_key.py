@@ -0,0 +1,108 @@
+import datetime
+from typing import Optional, Literal
+
+# main과 discord_event_handler가 같이 사용하는 결과 캐시 키 규칙
+# discord_event_handler에는 배포할 때 이 파일을 복사함 (.github/workflows/main.yml)
+# 표준 라이브러리만 사용
+
+# 결과를 캐시하는 명령어 (등록, 관리자 명령어는 캐시하지 않음)
+CACHEABLE_COMMANDS = ["랭킹", "검색", "유저분포"]
+
+# 생략된 옵션의 기본값 (lambda_function.command_handler의 기본값과 같게 유지)
+DEFAULT_OPTIONS = {
+    "랭킹": {"랭킹범위": "1..10", "날짜": ""},
+    "검색": {"기간": "7", "날짜": ""},
+    "유저분포": {"날짜": "-1"},
+}
+
+
+def get_cache_key(body: dict) -> Optional[str]:
+    """
+    같은 결과가 나오는 명령어는 같은 키를 가짐
+    오늘 날짜(KST), 명령어, 서브커맨드, 정렬된 옵션
+    (나만보기 제외, 생략된 옵션은 기본값, 날짜는 YYYY-MM-DD, 닉네임은 소문자)
+    캐시하지 않는 명령어는 None
+    """
+    cmd = body["data"]["name"]
+
+    if cmd not in CACHEABLE_COMMANDS:
+        return None
+
+    options = body["data"].get("options", [])
+
+    sub = ""
+    if options and options[0].get("type") == 1:  # 서브커맨드
+        sub = options[0]["name"]
+        options = options[0].get("options", [])
+
+    values = DEFAULT_OPTIONS[cmd].copy()
+    for option in options:
+        if option["name"] == "나만보기":
+            continue
+
+        values[option["name"]] = str(option["value"]).strip()
+
+    if "닉네임" in values:
+        values["닉네임"] = values["닉네임"].lower()
+
+    day = parse_date(values["날짜"])
+    if not isinstance(day, int):  # 잘못된 날짜는 입력 그대로 (어차피 에러 메시지)
+        values["날짜"] = day.strftime("%Y-%m-%d")
+
+    return "|".join(
+        [
+            get_today().strftime("%Y-%m-%d"),
+            cmd,
+            sub,
+            *sorted(f"{name}={value}" for name, value in values.items()),
+        ]
+    )
+
+
+def get_today(days_before=0) -> datetime.date:
+    kst_now = (
+        datetime.datetime.now(datetime.UTC)
+        + datetime.timedelta(hours=9)
+        - datetime.timedelta(days=days_before)
+    )
+
+    return kst_now.date()
+
+
+def parse_date(day: Optional[str]) -> datetime.date | Literal[-1, -2]:
+    """
+    -1: 날짜 입력이 올바르지 않음
+    -2: 미래 날짜
+    today: datetime.date
+    """
+    # YYYY-MM-DD, MM-DD, DD, -1, ...
+    try:
+        todayR = get_today()
+
+        if day:
+            if day[0] == "-" and day[1:].isdigit():
+                date = int(day[1:])
+                today = todayR - datetime.timedelta(days=date)
+
+            else:
+                date_type = day.count("-")
+                today_list = str(todayR).split("-")
+
+                if date_type == 0:  # 날짜만
+                    day = "-".join(today_list[:2]) + "-" + day
+
+                if date_type == 1:
+                    day = today_list[0] + "-" + day
+
+                today = datetime.datetime.strptime(day, "%Y-%m-%d").date()
+
+        else:
+            today = todayR
+
+    except:
+        return -1
+
+    if today > todayR:
+        return -2
+
+    return today
@@ -1,31 +1,54 @@
 import os
-import boto3
 import platform
-from boto3.dynamodb.conditions import Key
+import threading
+from typing import Optional
 
+db_name = os.environ.get("DB_NAME", "")
 
-os_name = platform.system()
-if os_name == "Linux":
-    session = boto3.Session(
-        region_name="ap-northeast-2",
-    )
-else:
-    AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY", None)
-    AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", None)
+# boto3는 불러오는 데 시간이 오래 걸려서 처음 사용할 때 초기화
+# boto3 세션과 리소스는 스레드 간에 공유하면 안전하지 않으므로 스레드마다 따로 만듦
+local = threading.local()
 
-    session = boto3.Session(
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name="ap-northeast-2",
-    )
 
-db_name = os.environ.get("DB_NAME", "")
-dynamodb = session.resource("dynamodb")
+def get_dynamodb():
+    """
+    현재 스레드의 DynamoDB 리소스 반환 (스레드에서 처음 호출할 때 세션과 리소스 생성)
+    """
+    dynamodb = getattr(local, "dynamodb", None)
 
+    if dynamodb is None:
+        dynamodb = local.dynamodb = create_dynamodb()
 
-def read_data(table_name, index=None, condition_dict=None):
-    table_name = db_name + "-" + table_name
-    table = dynamodb.Table(table_name)  # type: ignore
+    return dynamodb
+
+
+def create_dynamodb():
+    import boto3
+
+    os_name = platform.system()
+    if os_name == "Linux":
+        session = boto3.Session(
+            region_name="ap-northeast-2",
+        )
+    else:
+        AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY", None)
+        AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", None)
+
+        session = boto3.Session(
+            aws_access_key_id=AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            region_name="ap-northeast-2",
+        )
+
+    return session.resource("dynamodb")
+
+
+def get_table(table_name):
+    return get_dynamodb().Table(db_name + "-" + table_name)  # type: ignore
+
+
+def make_key_condition(condition_dict):
+    from boto3.dynamodb.conditions import Key
 
     condition = None
     if condition_dict:
@@ -41,7 +64,13 @@ def read_data(table_name, index=None, condition_dict=None):
             else:
                 condition = condition & add
 
-    query_params = {"KeyConditionExpression": condition}
+    return condition
+
+
+def read_data(table_name, index=None, condition_dict=None):
+    table = get_table(table_name)
+
+    query_params = {"KeyConditionExpression": make_key_condition(condition_dict)}
 
     if index:
         query_params["IndexName"] = index
@@ -50,12 +79,48 @@ def read_data(table_name, index=None, condition_dict=None):
 
     items = response.get("Items", [])
 
+    # 1MB가 넘으면 나눠서 받아옴
+    while "LastEvaluatedKey" in response:
+        query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        response = table.query(**query_params)
+        items.extend(response.get("Items", []))
+
     return items if items else None
 
 
+def read_page(
+    table_name, index=None, condition_dict=None, limit=100, cursor=None, reverse=False
+):
+    """
+    정렬키 순서대로 limit개씩 나눠서 읽음
+    cursor: 이전 페이지에서 받은 다음 페이지 위치 (처음이면 None)
+    reverse: 정렬키 내림차순으로 읽을지
+
+    반환: (items, 다음 cursor), 마지막 페이지면 cursor는 None
+    """
+    table = get_table(table_name)
+
+    query_params = {
+        "KeyConditionExpression": make_key_condition(condition_dict),
+        "Limit": limit,
+        "ScanIndexForward": not reverse,
+    }
+
+    if index:
+        query_params["IndexName"] = index
+
+    if cursor:
+        query_params["ExclusiveStartKey"] = cursor
+
+    response = table.query(**query_params)
+
+    return response.get("Items", []), response.get("LastEvaluatedKey")
+
+
 def scan_data(table_name, index=None, key=None, filter_dict=None):
-    table_name = db_name + "-" + table_name
-    table = dynamodb.Table(table_name)  # type: ignore
+    from boto3.dynamodb.conditions import Key
+
+    table = get_table(table_name)
 
     filter_data = None
     if filter_dict:
@@ -95,13 +160,105 @@ def scan_data(table_name, index=None, key=None, filter_dict=None):
     return items if items else None
 
 
-def write_data(table_name, item):
+def batch_read_data(table_name, keys):
+    """
+    기본키 목록으로 여러 아이템을 한번에 읽음 (100개씩 나눠서 요청)
+    keys: [{"id": 1}, {"id": 2}, ...] (중복 없이)
+    """
     table_name = db_name + "-" + table_name
-    table = dynamodb.Table(table_name)  # type: ignore
+
+    items = []
+    for i in range(0, len(keys), 100):
+        request = {table_name: {"Keys": keys[i : i + 100]}}
+
+        # 처리되지 않은 키가 있으면 다시 요청
+        while request:
+            response = get_dynamodb().batch_get_item(RequestItems=request)
+
+            items.extend(response["Responses"].get(table_name, []))
+            request = response.get("UnprocessedKeys")
+
+    return items if items else None
+
+
+def write_data(table_name, item):
+    table = get_table(table_name)
 
     table.put_item(Item=item)
 
 
+def increase_counter(name, amount=1, initial=None) -> Optional[int]:
+    """
+    Counters 테이블의 name 카운터에 amount를 원자적으로 더하고 더한 뒤의 값을 반환
+    동시에 호출해도 서로 다른 값을 받음
+
+    initial: 카운터가 아직 없을 때 시작 값을 구하는 함수 (처음 한 번만 호출)
+             None이면 카운터를 만들지 않고 None 반환
+    """
+    from botocore.exceptions import ClientError
+
+    table = get_table("Counters")
+
+    try:
+        response = table.update_item(
+            Key={"name": name},
+            UpdateExpression="ADD #value :amount",
+            ConditionExpression="attribute_exists(#name)",
+            ExpressionAttributeNames={"#name": "name", "#value": "value"},
+            ExpressionAttributeValues={":amount": amount},
+            ReturnValues="UPDATED_NEW",
+        )
+
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+        if initial is None:
+            return None
+
+        # 카운터가 없음 -> 시작 값으로 만들고 다시 시도
+        create_counter(name, initial())
+
+        return increase_counter(name, amount)
+
+    return int(response["Attributes"]["value"])
+
+
+def read_counter(name, initial=None) -> Optional[int]:
+    """
+    Counters 테이블의 name 카운터 값
+    initial: 카운터가 아직 없을 때 시작 값을 구하는 함수 (None이면 None 반환)
+    """
+    item = get_table("Counters").get_item(Key={"name": name}).get("Item")
+
+    if item is not None:
+        return int(item["value"])
+
+    if initial is None:
+        return None
+
+    create_counter(name, initial())
+
+    return read_counter(name)
+
+
+def create_counter(name, value) -> None:
+    """
+    카운터가 없을 때만 value로 만듦 (다른 요청이 먼저 만들었으면 그대로 사용)
+    """
+    from botocore.exceptions import ClientError
+
+    try:
+        get_table("Counters").put_item(
+            Item={"name": name, "value": value},
+            ConditionExpression="attribute_not_exists(#name)",
+            ExpressionAttributeNames={"#name": "name"},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
 if __name__ == "__main__":
     # print(scan_data("TA_DEV-DailyData"))
     # data = read_data("DailyData", None, {"id": 1, "date-slot": ["2025-01-01#0", "2025-01-01#4"]})
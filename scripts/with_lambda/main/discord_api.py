@@ -0,0 +1,176 @@
+import os
+import re
+import time
+import threading
+import requests
+
+import http_policy
+
+API_URL = "https://discord.com/api/v10"
+DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+
+MAX_RETRIES = 3  # 429 응답을 받았을 때 다시 시도하는 횟수
+GUILD_NAME_TTL = 24 * 3600
+
+# 컨테이너가 살아있는 동안 디스코드와의 연결을 재사용 (시간 제한, 재시도는 http_policy)
+session = http_policy.Session("discord")
+
+lock = threading.Lock()
+
+# 요청마다 바뀌는 경로 부분 (인터랙션 토큰, 메시지 id)은 경로 이름에서 뺌
+ROUTE_PATTERNS = [
+    (re.compile(r"^/webhooks/(\d+)/[^/]+"), r"/webhooks/\1/:token"),
+    (re.compile(r"^/interactions/\d+/[^/]+"), "/interactions/:id/:token"),
+    (re.compile(r"/messages/\d+"), "/messages/:id"),
+]
+
+# 경로별 X-RateLimit-Bucket: {"PATCH /webhooks/123/:token/messages/@original": "abcd"}
+routes = {}
+# 버킷별 rate limit 상태: {"abcd /webhooks/123/토큰": {"remaining": 4, "reset_at": 1700000000.0}}
+# (버킷을 모르는 경로는 경로 자체를 키로 사용, 초기화 시간이 지나면 삭제)
+buckets = {}
+global_reset_at = 0.0
+
+# {guild_id: (서버 이름, 저장한 시간)}
+guild_names = {}
+
+
+def request(method: str, path: str, auth: bool = True, **kwargs) -> requests.Response:
+    """
+    디스코드 REST API 요청
+    path: "/channels/123/messages" 처럼 API_URL 뒤의 경로
+    auth: 봇 토큰을 보낼지 (인터랙션 웹훅은 토큰 필요 없음)
+
+    X-RateLimit-* 헤더로 경로별 남은 요청 수를 기억해두고
+    남은 요청이 없으면 초기화될 때까지 미리 기다림, 429를 받으면 retry_after만큼 기다렸다가 다시 시도
+    """
+    route = get_route(method, path)
+
+    headers = kwargs.pop("headers", {})
+    if auth:
+        headers["Authorization"] = f"Bot {DISCORD_TOKEN}"
+
+    for _ in range(MAX_RETRIES + 1):
+        wait_for_bucket(route, path)
+
+        response = session.request(method, API_URL + path, headers=headers, **kwargs)
+
+        update_bucket(route, path, response)
+
+        if response.status_code != 429:
+            return response
+
+        print(f"디스코드 rate limit: {route}, {response.text}")
+
+    return response
+
+
+def get_route(method: str, path: str) -> str:
+    """
+    "PATCH /webhooks/123/토큰/messages/@original" -> "PATCH /webhooks/123/:token/messages/@original"
+    """
+    for pattern, repl in ROUTE_PATTERNS:
+        path = pattern.sub(repl, path)
+
+    return f"{method} {path}"
+
+
+def get_bucket_key(route: str, path: str) -> str:
+    """
+    같은 버킷이라도 채널, 서버, 웹훅(토큰)마다 한도가 따로 있으므로
+    버킷과 경로 앞부분 (/channels/123, /webhooks/123/토큰)을 합침
+    """
+    bucket = routes.get(route)
+    if bucket is None:
+        return f"{route.split(' ', 1)[0]} {path}"
+
+    parts = path.split("/")
+    major = "/".join(
+        parts[:4] if parts[1] in ("webhooks", "interactions") else parts[:3]
+    )
+
+    return f"{bucket} {major}"
+
+
+def wait_for_bucket(route: str, path: str) -> None:
+    with lock:
+        bucket = buckets.get(get_bucket_key(route, path))
+        reset_at = global_reset_at
+
+        if bucket is not None and bucket["remaining"] <= 0:
+            reset_at = max(reset_at, bucket["reset_at"])
+
+    delay = reset_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def update_bucket(route: str, path: str, response: requests.Response) -> None:
+    global global_reset_at
+
+    headers = response.headers
+    now = time.time()
+
+    with lock:
+        # 초기화 시간이 지난 버킷은 삭제
+        for key in [key for key, b in buckets.items() if b["reset_at"] <= now]:
+            del buckets[key]
+
+        if "X-RateLimit-Bucket" in headers:
+            routes[route] = headers["X-RateLimit-Bucket"]
+
+        key = get_bucket_key(route, path)
+
+        if "X-RateLimit-Remaining" in headers:
+            buckets[key] = {
+                "remaining": int(headers["X-RateLimit-Remaining"]),
+                "reset_at": now + float(headers.get("X-RateLimit-Reset-After", 0)),
+            }
+
+        if response.status_code == 429:
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
+
+            retry_after = float(data.get("retry_after", headers.get("Retry-After", 1)))
+
+            if data.get("global") or headers.get("X-RateLimit-Global"):
+                global_reset_at = now + retry_after
+            else:
+                buckets[key] = {"remaining": 0, "reset_at": now + retry_after}
+
+
+def get_guild_name(guild_id: str) -> str:
+    """
+    서버 이름 (하루 동안 캐시)
+    """
+    cached = guild_names.get(guild_id)
+    if cached is not None and time.time() - cached[1] < GUILD_NAME_TTL:
+        return cached[0]
+
+    try:
+        response = request("GET", f"/guilds/{guild_id}")
+    except (
+        requests.RequestException
+    ):  # 디스코드 응답이 없으면 예전 이름이나 id로 대신함
+        return cached[0] if cached is not None else guild_id
+
+    if not response.ok:  # 봇이 나간 서버, rate limit 등
+        print(f"서버 이름 조회 실패: {guild_id}, {response.text}")
+        return cached[0] if cached is not None else guild_id
+
+    data = response.json()
+    guild_names[guild_id] = (data["name"], time.time())
+
+    return data["name"]
+
+
+def get_guild_list() -> list[dict[str, str]]:
+    data = request("GET", "/users/@me/guilds").json()
+
+    # 받아온 서버 이름도 캐시에 저장
+    for guild in data:
+        guild_names[guild["id"]] = (guild["name"], time.time())
+
+    return data
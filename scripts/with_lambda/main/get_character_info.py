@@ -1,4 +1,3 @@
-import misc
 import math
 import random
 import datetime
@@ -6,27 +5,27 @@ import platform
 import numpy as np
 import pandas as pd
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
-import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib.ticker as ticker
-import matplotlib.font_manager as fm
 
 import misc
+import plot_style
 import data_manager as dm
+import rank_index
 import get_rank_info as gri
 
-plt.style.use("seaborn-v0_8-pastel")
-if platform.system() == "Linux":
-    font_path = "/opt/NanumSquareRoundEB.ttf"
-else:
-    font_path = misc.convert_path("assets\\fonts\\NanumSquareRoundEB.ttf")
-fm.fontManager.addfont(font_path)
-prop = fm.FontProperties(fname=font_path)
-plt.rcParams["font.family"] = prop.get_name()
+plot_style.setup()
+
+SMOOTH_COEFF = 10  # 하루당 보간 점 개수
+MAX_POINTS = 150  # 그래프에 표시할 최대 데이터 점 개수
+MAX_SMOOTH_POINTS = 1500  # 보간 후 최대 점 개수
 
-matplotlib.use("Agg")
+# 캐릭터 정보를 조회할 때 DynamoDB 조회를 동시에 실행
+# get_character_info가 한 번에 5개를 실행하므로 하나도 기다리지 않도록 5개
+executor = ThreadPoolExecutor(max_workers=5)
 
 
 def get_current_character_data(name, days_before=0):
@@ -80,15 +79,27 @@ def get_current_character_data(name, days_before=0):
     return data
 
 
-def get_character_info(name, slot, period, today):
+def get_character_info(name, slot, period, today, on_progress=None):
+    """
+    on_progress(msg): 그래프를 그리기 전에 레벨 정보를 먼저 보낼 때 사용
+    """
+    # 서로 관계없는 조회는 동시에 실행 (가장 느린 조회 시간만큼만 걸림)
+    # 두 평균 레벨은 같은 DailyData 조회 결과를 사용
+    main_slot_future = executor.submit(misc.get_main_slot, name)
+    name_future = executor.submit(misc.get_name, name)
+    id_future = executor.submit(misc.get_id, name)
+    index_future = executor.submit(rank_index.get_index, today)
+    daily_data_future = executor.submit(get_daily_data, period, today)
+
+    main_slot = main_slot_future.result()
     if slot is None:
-        slot = misc.get_main_slot(name)
+        slot = main_slot
         default = True
     else:
-        default = slot == misc.get_main_slot(name)
+        default = slot == main_slot
 
     data = get_character_data(name, slot, period, today)
-    name = misc.get_name(name)
+    name = name_future.result()
 
     if data == None:
         return (
@@ -105,48 +116,47 @@ def get_character_info(name, slot, period, today):
     if period == 1:  # 등록 직후 데이터가 없을 때
         current_level = data["level"][0]
 
-        rank = None
-        if today == misc.get_today():
-            ranks = gri.get_current_rank_data()
-            for i, j in enumerate(ranks):
-                if (
-                    j["name"] == name
-                    and -0.1 < j["level"] - current_level < 0.1
-                    and misc.convert_job(j["job"]) == data["job"][0]
-                ):
-                    rank = i + 1
-                    break
-        else:
-            ranks = gri.get_rank_data(today)
-
-            if ranks is None:
-                rank = None
-            else:
-                for i, j in enumerate(ranks):
-                    if (
-                        j["name"] == name
-                        and -0.1 < j["level"] - current_level < 0.1
-                        and j["job"] == data["job"][0]
-                    ):
-                        rank = j["rank"]
-                        break
-
         text_day = (
             "지금" if today == misc.get_today() else today.strftime("%Y년 %m월 %d일")
         )
-        text_rank = f"\n레벨 랭킹은 {rank}위에요." if rank is not None else ""
+        text_rank = get_rank_text(index_future.result(), id_future.result(), slot)
 
         return f"{text_day} {name}님의 레벨은 {current_level}이에요." + text_rank, None
 
-    all_character_avg = get_all_character_avg(period, today)
+    current_level = data["level"][-1]
+    l0 = data["level"][0]
+    l1 = data["level"][-1]
+    level_change = l1 - l0
+
+    exp_avg, next_lvup, max_lv_day = calc_exp_change(float(l0), float(l1), period)
+
+    text_day = "지금" if today == misc.get_today() else today.strftime("%Y년 %m월 %d일")
+    text_slot = f"{slot}번 캐릭터 " if not default else ""
+    text_changed = f"{period}일간 총 {level_change:.2f}레벨, 매일 평균 {level_change / period:.2%} 상승하셨어요!"
+    # exp_change, next_lvup, max_lv_day
+    text_exp = f"\n일일 평균 획득 경험치는 {int(exp_avg)}이고, 약 {next_lvup}일 후에 레벨업을 할 것 같아요."
+
+    text_level = f"{text_day} {name}님의 {text_slot}레벨은 {current_level:.2f}이고, {text_changed}{text_exp}"
+
+    # 랭킹, 평균 레벨 계산과 그래프는 오래 걸리기 때문에 레벨 정보 먼저 전송
+    if on_progress is not None:
+        on_progress(text_level)
+
+    # 요청한 기간으로 읽은 DailyData를 실제 데이터가 있는 기간으로 자름
+    start_date = (today - datetime.timedelta(days=period - 1)).strftime("%Y-%m-%d")
+    daily_data = [
+        i for i in daily_data_future.result() or [] if i["date-slot"] >= start_date
+    ]
+
+    all_character_avg = get_all_character_avg(period, today, daily_data)
 
     if today == misc.get_today():
         similar_character_avg = get_similar_character_avg(
-            period, today, data["level"][-2]
+            period, today, data["level"][-2], daily_data
         )
     else:
         similar_character_avg = get_similar_character_avg(
-            period, today, data["level"][-1]
+            period, today, data["level"][-1], daily_data
         )
 
     df = pd.DataFrame(data)
@@ -176,7 +186,6 @@ def get_character_info(name, slot, period, today):
 
     # 이미지 생성
     plt.figure(figsize=(10, 4))
-    smooth_coeff = 10
 
     # 레이블 설정
     labels = {
@@ -189,127 +198,37 @@ def get_character_info(name, slot, period, today):
     if display_sim:
         labels["sim"] = "유사한 레벨의 캐릭터의 평균 레벨"
 
-    # x, y 데이터 생성
-    x = np.arange(len(df["date"]))
-    y = np.array(df["level"].values, dtype=float)
-
-    x_new = np.linspace(
-        x.min(), x.max(), len(df["date"]) * smooth_coeff - smooth_coeff + 1
-    )
-    # PCHIP 보간
-    y_smooth = misc.pchip_interpolate(x, y, x_new)
-
-    # 점
-    plt.plot(
-        df["date"],
-        df["level"],
-        color="C0",
-        marker="o" if period <= 30 else ".",
-        label=labels["default"],
-        linestyle="",
-    )
-    # 선
-    plt.plot(
-        df["date"][0] + pd.to_timedelta(x_new, unit="D"),
-        y_smooth,
-        color="C0",
-    )
-
+    series = [(df, "C0", labels["default"])]
     if display_avg:
-        x_avg = np.arange(len(df_avg["date"]))
-        y_avg = np.array(df_avg["level"].values, dtype=float)
-
-        x_new_avg = np.linspace(
-            x_avg.min(),
-            x_avg.max(),
-            len(df_avg["date"]) * smooth_coeff - smooth_coeff + 1,
-        )
-        # PCHIP 보간
-        y_smooth_avg = misc.pchip_interpolate(x_avg, y_avg, x_new_avg)
-
-        # 점
-        plt.plot(
-            df_avg["date"],
-            df_avg["level"],
-            color="C2",
-            marker="o" if period <= 30 else ".",
-            label=labels["avg"],
-            linestyle="",
-        )
-        # 선
-        plt.plot(
-            df_avg["date"][0] + pd.to_timedelta(x_new_avg, unit="D"),
-            y_smooth_avg,
-            color="C2",
-        )
-
+        series.append((df_avg, "C2", labels["avg"]))
     if display_sim:
-        x_sim = np.arange(len(df_sim["date"]))
-        y_sim = np.array(df_sim["level"].values, dtype=float)
+        series.append((df_sim, "C3", labels["sim"]))
 
-        x_new_sim = np.linspace(
-            x_sim.min(),
-            x_sim.max(),
-            len(df_sim["date"]) * smooth_coeff - smooth_coeff + 1,
-        )
-        # PCHIP 보간
-        y_smooth_sim = misc.pchip_interpolate(x_sim, y_sim, x_new_sim)
+    for _df, color, label in series:
+        points, x_line, y_smooth = get_smooth_line(_df, "level")
 
         # 점
         plt.plot(
-            df_sim["date"],
-            df_sim["level"],
-            color="C3",
+            points["date"],
+            points["level"],
+            color=color,
             marker="o" if period <= 30 else ".",
-            label=labels["sim"],
+            label=label,
             linestyle="",
         )
         # 선
-        plt.plot(
-            df_sim["date"][0] + pd.to_timedelta(x_new_sim, unit="D"),
-            y_smooth_sim,
-            color="C3",
-        )
+        plt.plot(x_line, y_smooth, color=color)
+
+        if _df is df:
+            # 그래프 영역에 색칠 (하나의 다각형으로)
+            plt.fill_between(x_line, y_smooth, color="#A0DEFF", alpha=1)
 
     if y_min == y_max:  # y 범위가 하나일때 (변동 없을때)
         plt.ylim(y_max - 1, y_max + 1)
     else:
         plt.ylim(y_min - y_range / 10, y_max + y_range / 3)
 
-    for i in range(len(df) - 1):
-        # 그래프 영역에 색칠
-        plt.fill_between(
-            df["date"][0]
-            + pd.to_timedelta(
-                x_new[i * smooth_coeff : i * smooth_coeff + smooth_coeff + 1], unit="D"
-            ),
-            y_smooth[i * smooth_coeff : i * smooth_coeff + smooth_coeff + 1],
-            color="#A0DEFF",
-            alpha=1,
-        )
-        # df["date"][0] + pd.to_timedelta(x_new, unit="D"), y_smooth
-        # 0~4, 3~7, 6~10, 9~13, 12~16
-
-    ax = plt.gca()
-
-    # Set date format on x-axis
-    date_format = mdates.DateFormatter("%m월 %d일")
-    ax.xaxis.set_major_formatter(date_format)
-    # 표시할 x축 날짜 직접 계산
-    n_ticks = min(5, len(df))  # 최대 tick 개수
-    tick_interval = max(1, (len(df) - 1) // (n_ticks - 1))  # 간격 계산
-    tick_indices = range(len(df) - 1, -1, -tick_interval)  # 마지막 데이터부터 역순으로
-
-    # 실제 데이터 포인트의 날짜만 선택
-    ticks = [float(mdates.date2num(df["date"].iloc[i])) for i in tick_indices]
-    ax.xaxis.set_major_locator(ticker.FixedLocator(ticks))
-
-    # x축 범위를 데이터 범위로 제한 (여백 추가)
-    date_range = (df["date"].iloc[-1] - df["date"].iloc[0]).days
-    plt.xlim(
-        df["date"].iloc[0] - pd.Timedelta(days=date_range * 0.02),  # 2% 여백
-        df["date"].iloc[-1] + pd.Timedelta(days=date_range * 0.02),
-    )
+    tick_indices = set_date_axis(plt.gca(), df["date"])
 
     # 레이블 표시 로직 변경 - 날짜 tick과 동일한 간격 사용
     for i in tick_indices:
@@ -322,12 +241,6 @@ def get_character_info(name, slot, period, today):
             fontsize=8,
         )
 
-    # 그래프 테두리 설정
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.spines["left"].set_visible(False)
-    # ax.spines["bottom"].set_visible(False)
-
     plt.yticks([])
     plt.legend(loc="upper left")
 
@@ -340,47 +253,9 @@ def get_character_info(name, slot, period, today):
     plt.savefig(image_path, dpi=250, bbox_inches="tight")
     plt.close()
 
-    current_level = df["level"].iat[-1]
-    l0 = df["level"].iat[0]
-    l1 = df["level"].iat[-1]
-    level_change = l1 - l0
-
-    exp_avg, next_lvup, max_lv_day = calc_exp_change(float(l0), float(l1), period)
-
-    rank = None
-    if today == misc.get_today():
-        ranks = gri.get_current_rank_data()
-        for i, j in enumerate(ranks):
-            if (
-                j["name"] == name
-                and int(j["level"]) == int(current_level)
-                and misc.convert_job(j["job"]) == df["job"].iat[-1]
-            ):
-                rank = i + 1
-                break
-    else:
-        ranks = gri.get_rank_data(today)
-
-        if ranks is None:
-            rank = None
-        else:
-            for i, j in enumerate(ranks):
-                if (
-                    j["name"] == name
-                    and int(j["level"]) == int(current_level)
-                    and j["job"] == df["job"].iat[-1]
-                ):
-                    rank = j["rank"]
-                    break
+    text_rank = get_rank_text(index_future.result(), id_future.result(), slot)
 
-    text_day = "지금" if today == misc.get_today() else today.strftime("%Y년 %m월 %d일")
-    text_slot = f"{slot}번 캐릭터 " if not default else ""
-    text_changed = f"{period}일간 총 {level_change:.2f}레벨, 매일 평균 {level_change / period:.2%} 상승하셨어요!"
-    text_rank = f"\n레벨 랭킹은 {rank}위에요." if rank is not None else ""
-    # exp_change, next_lvup, max_lv_day
-    text_exp = f"\n일일 평균 획득 경험치는 {int(exp_avg)}이고, 약 {next_lvup}일 후에 레벨업을 할 것 같아요."
-
-    msg = f"{text_day} {name}님의 {text_slot}레벨은 {current_level:.2f}이고, {text_changed}{text_exp}{text_rank}"
+    msg = text_level + text_rank
 
     return msg, image_path
 
@@ -405,7 +280,73 @@ def calc_exp_change(l0, l1, period):
     return exp_mean, next_lvup, max_day
 
 
-def get_charater_rank_history(name, slot, period, today):
+def get_smooth_line(df: pd.DataFrame, column: str) -> tuple:
+    """
+    그래프에 그릴 (점 데이터, 선 x좌표, 선 y좌표) 반환
+
+    기간이 길면 점은 LTTB로 MAX_POINTS개까지 줄이고
+    PCHIP 보간 점 개수도 MAX_SMOOTH_POINTS개로 제한해서 기간과 상관없이 그리는 양을 일정하게 유지
+    """
+    # 빠진 날짜가 있어도 간격이 맞도록 첫 날짜부터 지난 일수를 x로 사용
+    x = (df["date"] - df["date"].iloc[0]).dt.days.to_numpy()
+    y = np.array(df[column].values, dtype=float)
+
+    indices = misc.lttb_indices(x, y, MAX_POINTS)
+    points = df.iloc[indices]
+
+    x_new = np.linspace(
+        x.min(), x.max(), min(int(x.max()) * SMOOTH_COEFF + 1, MAX_SMOOTH_POINTS)
+    )
+    # PCHIP 보간
+    y_smooth = misc.pchip_interpolate(x[indices], y[indices], x_new)
+
+    return points, df["date"].iloc[0] + pd.to_timedelta(x_new, unit="D"), y_smooth
+
+
+def set_date_axis(ax, dates, max_ticks=5) -> range:
+    """
+    x축을 날짜로 설정
+    마지막 날짜부터 역순으로 최대 max_ticks개의 눈금, 양쪽 2% 여백, 위/오른쪽/왼쪽 테두리 제거
+    dates: 그래프에 그린 날짜 (정렬됨)
+    반환: 눈금을 표시한 날짜의 위치 (레이블 표시에 사용)
+    """
+    dates = pd.DatetimeIndex(dates)
+
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%m월 %d일"))
+
+    # 표시할 x축 날짜 직접 계산 (실제 데이터 포인트의 날짜만 선택)
+    n_ticks = min(max_ticks, len(dates))
+    tick_interval = max(1, (len(dates) - 1) // max(1, n_ticks - 1))
+    tick_indices = range(len(dates) - 1, -1, -tick_interval)
+
+    ticks = [float(mdates.date2num(dates[i])) for i in tick_indices]
+    ax.xaxis.set_major_locator(ticker.FixedLocator(ticks))
+
+    # x축 범위를 데이터 범위로 제한 (여백 추가)
+    date_range = (dates[-1] - dates[0]).days
+    ax.set_xlim(
+        dates[0] - pd.Timedelta(days=date_range * 0.02),
+        dates[-1] + pd.Timedelta(days=date_range * 0.02),
+    )
+
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.spines["left"].set_visible(False)
+
+    return tick_indices
+
+
+def get_charater_rank_history(name, slot, period, today, on_progress=None):
+    """
+    on_progress(msg): 그래프를 그리기 전에 현재 랭킹을 먼저 보낼 때 사용
+    """
+    # 실시간 랭킹은 오래 걸리기 때문에 먼저 시작
+    current_data_future = (
+        executor.submit(gri.get_current_rank_data)
+        if today == misc.get_today()
+        else None
+    )
+
     if slot is None:
         slot = misc.get_main_slot(name)
         default = True
@@ -417,7 +358,7 @@ def get_charater_rank_history(name, slot, period, today):
     if name is None:
         return f"{name}님의 랭킹 정보가 없어요.", None
 
-    current_data = gri.get_current_rank_data() if today == misc.get_today() else None
+    current_data = current_data_future.result() if current_data_future else None
 
     _id = misc.get_id(name=name)
 
@@ -486,40 +427,39 @@ def get_charater_rank_history(name, slot, period, today):
         text_rank = f"{name}님의{f' {slot}번 슬롯' if not default else ''} 랭킹은 {f'{cur_rank}위에요.' if cur_rank < 101 else '순위에 등록되어있지 않아요.'}"
         return f"{text_day} {text_rank}", None
 
+    if on_progress is not None:
+        cur_rank = data[-1]["rank"]
+        on_progress(
+            f"{name}님의{f' {slot}번 슬롯' if not default else ''} 최근 랭킹은 "
+            + (
+                f"{cur_rank}위에요."
+                if cur_rank < 101
+                else "순위에 등록되어있지 않아요."
+            )
+        )
+
     # 이미지 생성
     df = pd.DataFrame(data)
     df["date"] = pd.to_datetime(df["date"])
 
     plt.figure(figsize=(10, 4))
-    smooth_coeff = 10
 
     label = f"{name}의{f' {slot}번 슬롯' if not default else ''} 랭킹 히스토리"
 
-    x = np.arange(len(df["date"]))
-    y = np.array(df["rank"], dtype=float)
+    points, x_line, y_smooth = get_smooth_line(df, "rank")
 
-    x_new = np.linspace(
-        x.min(), x.max(), len(df["date"]) * smooth_coeff - smooth_coeff + 1
-    )
-
-    y_smooth = misc.pchip_interpolate(x, y, x_new)
-
-    plt.plot(
-        df["date"][0] + pd.to_timedelta(x_new, unit="D"),
-        y_smooth,
-        color="C0",
-    )
+    plt.plot(x_line, y_smooth, color="C0")
     plt.plot(
-        df["date"][df["rank"] < 101],
-        df["rank"][df["rank"] < 101],
+        points["date"][points["rank"] < 101],
+        points["rank"][points["rank"] < 101],
         color="C0",
         marker="o" if period <= 50 else ".",
         label=label,
         linestyle="",
     )
     plt.plot(
-        df["date"][df["rank"] == 101],
-        df["rank"][df["rank"] == 101],
+        points["date"][points["rank"] == 101],
+        points["rank"][points["rank"] == 101],
         color="C2",
         marker="o" if period <= 50 else ".",
         linestyle="",
@@ -528,40 +468,9 @@ def get_charater_rank_history(name, slot, period, today):
     ylim = (min(df["rank"].max() + 5, 102), max(df["rank"].min() - 5, -1))
     plt.ylim(ylim)
 
-    for i in range(len(df) - 1):
-        plt.fill_between(
-            df["date"][0]
-            + pd.to_timedelta(
-                x_new[i * smooth_coeff : i * smooth_coeff + smooth_coeff + 1], unit="D"
-            ),
-            y_smooth[i * smooth_coeff : i * smooth_coeff + smooth_coeff + 1],
-            101,
-            color="#A0DEFF",
-            alpha=1,
-        )
-        # df["date"][0] + pd.to_timedelta(x_new, unit="D"), y_smooth
-        # 0~4, 3~7, 6~10, 9~13, 12~16
-
-    ax = plt.gca()
-
-    # Set date format on x-axis
-    date_format = mdates.DateFormatter("%m월 %d일")
-    ax.xaxis.set_major_formatter(date_format)
-    # 표시할 x축 날짜 직접 계산
-    n_ticks = min(8, len(df))  # 최대 tick 개수
-    tick_interval = max(1, (len(df) - 1) // (n_ticks - 1))  # 간격 계산
-    tick_indices = range(len(df) - 1, -1, -tick_interval)  # 마지막 데이터부터 역순으로
+    plt.fill_between(x_line, y_smooth, 101, color="#A0DEFF", alpha=1)
 
-    # 실제 데이터 포인트의 날짜만 선택
-    ticks = [float(mdates.date2num(df["date"].iloc[i])) for i in tick_indices]
-    ax.xaxis.set_major_locator(ticker.FixedLocator(ticks))
-
-    # x축 범위를 데이터 범위로 제한 (여백 추가)
-    date_range = (df["date"].iloc[-1] - df["date"].iloc[0]).days
-    plt.xlim(
-        df["date"].iloc[0] - pd.Timedelta(days=date_range * 0.02),  # 2% 여백
-        df["date"].iloc[-1] + pd.Timedelta(days=date_range * 0.02),
-    )
+    tick_indices = set_date_axis(plt.gca(), df["date"], max_ticks=8)
 
     # 레이블 표시 로직 변경 - 날짜 tick과 동일한 간격 사용
     for i in tick_indices:
@@ -586,11 +495,6 @@ def get_charater_rank_history(name, slot, period, today):
                 ha="center",
             )
 
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.spines["left"].set_visible(False)
-    # ax.spines["bottom"].set_visible(False)
-
     plt.yticks([])
     plt.legend()
 
@@ -612,7 +516,17 @@ def get_character_data(name, slot, period, today):
     """
     data = {'date': ['2025-01-01'], 'level': [Decimal('97')], 'job': [Decimal('1')]}
     """
+    if slot is None:  # 슬롯을 찾지 못함 -> 정보 없음
+        return None
+
+    return get_all_slots_data(name, period, today)[slot - 1]
 
+
+def get_all_slots_data(name, period, today):
+    """
+    5개 슬롯의 get_character_data를 DailyData 쿼리 한 번으로 만듦
+    데이터가 없는 슬롯은 None
+    """
     start_date = today - datetime.timedelta(days=period - 1)
 
     today = today.strftime("%Y-%m-%d")
@@ -624,42 +538,206 @@ def get_character_data(name, slot, period, today):
         "DailyData", None, {"id": _id, "date-slot": [f"{start_date}#0", f"{today}#4"]}
     )
 
-    data = {"date": [], "level": [], "job": []}
+    slots = [{"date": [], "level": [], "job": []} for _ in range(5)]
     if db_data:
         for i in db_data:
             date, _slot = i["date-slot"].split("#")
-            _slot = int(_slot) + 1
+            data = slots[int(_slot)]
 
-            if _slot == slot:
-                data["date"].append(date)
-                data["level"].append(i["level"])
-                data["job"].append(int(i["job"]))
+            data["date"].append(date)
+            data["level"].append(i["level"])
+            data["job"].append(int(i["job"]))
 
     if today == misc.get_today().strftime("%Y-%m-%d"):
         today_data = get_current_character_data(name)
 
         if today_data is not None:
-            data["date"].append(today)
-            data["level"].append(today_data[slot - 1]["level"])
-            data["job"].append(misc.convert_job(today_data[slot - 1]["job"]))
+            for data, current in zip(slots, today_data):
+                data["date"].append(today)
+                data["level"].append(current["level"])
+                data["job"].append(misc.convert_job(current["job"]))
 
-    return data if len(data["date"]) != 0 else None
+    return [data if len(data["date"]) != 0 else None for data in slots]
 
 
-def get_all_character_avg(period, today):
-    data = {"date": [], "level": []}
+def get_all_slots_info(name, period, today, on_progress=None):
+    """
+    5개 슬롯 캐릭터의 레벨 히스토리를 그래프 하나에 같이 그림
+    on_progress(msg): 그래프를 그리기 전에 레벨 정보를 먼저 보낼 때 사용
+    """
+    main_slot_future = executor.submit(misc.get_main_slot, name)
+    id_future = executor.submit(misc.get_id, name)
+    index_future = executor.submit(rank_index.get_index, today)
+
+    slots = get_all_slots_data(name, period, today)
+    name = misc.get_name(name)
+
+    if all(data is None for data in slots):
+        return f"{name}님의 캐릭터 정보가 없어요. 다시 확인해주세요.", None
+
+    main_slot = main_slot_future.result()
+    index = index_future.result()
+    _id = id_future.result()
+
+    text_day = "지금" if today == misc.get_today() else today.strftime("%Y년 %m월 %d일")
+
+    # 슬롯별 요약
+    lines = []
+    for slot, data in enumerate(slots, 1):
+        if data is None:
+            continue
+
+        l0 = data["level"][0]
+        l1 = data["level"][-1]
+
+        text_main = " (대표)" if slot == main_slot else ""
+        text_changed = (
+            f", {len(data['date'])}일간 {l1 - l0:+.2f}레벨"
+            if len(data["date"]) > 1
+            else ""
+        )
+        rank = index.rank(_id, slot) if _id is not None else None
+        text_rank = (
+            f" · {rank}위 (상위 {index.percentile(rank):.1f}%)"
+            if rank is not None
+            else ""
+        )
+
+        lines.append(
+            f"{slot}번{text_main} {misc.convert_job(data['job'][-1])} "
+            f"{l1:.2f}{text_changed}{text_rank}"
+        )
+
+    msg = f"{text_day} {name}님의 캐릭터 레벨이에요.\n" + "\n".join(lines)
+
+    # 모든 슬롯의 날짜를 합쳐서 (날짜, 슬롯) 배열로 맞춤, 데이터가 없는 날은 nan
+    # (새로 만든 슬롯이 있어도 다른 슬롯의 기간이 줄어들지 않도록)
+    dates = sorted(set().union(*[data["date"] for data in slots if data is not None]))
+
+    if len(dates) < 2:  # 등록 직후 데이터가 없을 때
+        return msg, None
+
+    if on_progress is not None:
+        on_progress(msg)
+
+    used = [slot for slot, data in enumerate(slots, 1) if data is not None]
+
+    date_pos = {date: i for i, date in enumerate(dates)}
+    levels = np.full((len(dates), len(used)), np.nan)
+
+    for k, slot in enumerate(used):
+        data = slots[slot - 1]
+        levels[[date_pos[date] for date in data["date"]], k] = [
+            float(level) for level in data["level"]
+        ]
+
+    date_index = pd.to_datetime(dates)
+    day_offsets = (date_index - date_index[0]).days.to_numpy()
+
+    y_min = np.nanmin(levels)
+    y_max = np.nanmax(levels)
+    y_range = y_max - y_min
+
+    # 슬롯마다 데이터가 있는 날짜에서 점을 LTTB로 MAX_POINTS개까지 줄임
+    picked = []
+    for k in range(len(used)):
+        valid = np.flatnonzero(~np.isnan(levels[:, k]))
+        picked.append(
+            valid[misc.lttb_indices(day_offsets[valid], levels[valid, k], MAX_POINTS)]
+        )
+
+    # 고른 날짜를 합친 x축에서 모든 슬롯을 한 번에 보간 (날짜 간격(일)을 x로 사용)
+    # 슬롯에 데이터가 없는 날짜는 앞뒤 값으로 채우고, 슬롯의 처음/마지막 날짜 밖은 그리지 않음
+    anchors = np.unique(np.concatenate(picked))
+    x = day_offsets[anchors]
+    y = levels[anchors]
+
+    for k in range(len(used)):
+        known = ~np.isnan(y[:, k])
+        y[:, k] = np.interp(x, x[known], y[known, k])
+
+    x_new = np.linspace(
+        x[0], x[-1], min((x[-1] - x[0]) * SMOOTH_COEFF + 1, MAX_SMOOTH_POINTS)
+    )
+    y_smooth = misc.pchip_interpolate(x, y, x_new)
+
+    first = day_offsets[[points[0] for points in picked]]
+    last = day_offsets[[points[-1] for points in picked]]
+    y_smooth[(x_new[:, None] < first) | (x_new[:, None] > last)] = np.nan
 
+    x_line = date_index[0] + pd.to_timedelta(x_new, unit="D")
+
+    plt.figure(figsize=(10, 4))
+
+    for k, slot in enumerate(used):
+        color = f"C{k}"
+        job = misc.convert_job(slots[slot - 1]["job"][-1])
+        label = f"{slot}번 캐릭터 ({job})" + (" (대표)" if slot == main_slot else "")
+
+        plt.plot(
+            date_index[picked[k]],
+            levels[picked[k], k],
+            color=color,
+            marker="o" if len(dates) <= 30 else ".",
+            label=label,
+            linestyle="",
+        )
+        plt.plot(x_line, y_smooth[:, k], color=color)
+
+    if y_min == y_max:
+        plt.ylim(y_max - 1, y_max + 1)
+    else:
+        plt.ylim(y_min - y_range / 10, y_max + y_range / 3)
+
+    set_date_axis(plt.gca(), date_index)
+
+    plt.legend(loc="upper left", fontsize=8)
+
+    image_path = misc.get_image_path()
+
+    plt.savefig(image_path, dpi=250, bbox_inches="tight")
+    plt.close()
+
+    return msg, image_path
+
+
+def get_daily_data(period, today):
+    """
+    기간 내 모든 캐릭터의 DailyData (평균 레벨 계산용)
+    """
     start_date = today - datetime.timedelta(days=period - 1)
 
     today = today.strftime("%Y-%m-%d")
     start_date = start_date.strftime("%Y-%m-%d")
 
-    db_data = dm.scan_data(  # id==0에 평균 데이터 매일 저장
+    return dm.scan_data(  # 매일 레벨 구간별로 저장해서 불러오기
         "DailyData",
         index="date-slot-level-index",
         filter_dict={"date-slot": [f"{start_date}#0", f"{today}#4"]},
     )
 
+
+def get_rank_text(index, _id, slot):
+    """
+    랭킹 인덱스에서 캐릭터의 순위와 상위 %를 찾음
+    """
+    rank = index.rank(_id, slot) if _id is not None else None
+
+    if rank is None:
+        return ""
+
+    return f"\n레벨 랭킹은 {rank}위에요. (상위 {index.percentile(rank):.1f}%)"
+
+
+def get_all_character_avg(period, today, db_data=None):
+    """
+    db_data: get_daily_data로 미리 읽은 데이터 (없으면 새로 읽음)
+    """
+    data = {"date": [], "level": []}
+
+    if db_data is None:
+        db_data = get_daily_data(period, today)
+
     if not db_data:
         return None
 
@@ -680,71 +758,72 @@ def get_all_character_avg(period, today):
     return data
 
 
-def get_similar_character_avg(period, today, level):
-    data = {"date": [], "level": []}
-
-    start_date = today - datetime.timedelta(days=period - 1)
+def get_similar_character_avg(period, today, level, db_data=None):
+    """
+    기준 날짜에 level ± n 레벨이었던 캐릭터들의 날짜별 평균 레벨
+    n은 1부터 늘려가면서 마지막 날짜에 데이터가 있는 캐릭터가 10개 이상이 될 때까지 (최대 9)
+    기준 날짜: 오늘이면 어제, 아니면 today
 
-    today = today.strftime("%Y-%m-%d")
-    start_date = start_date.strftime("%Y-%m-%d")
+    db_data: get_daily_data로 미리 읽은 데이터 (없으면 새로 읽음)
+    """
+    data = {"date": [], "level": []}
 
-    db_data = dm.scan_data(  # 매일 레벨 구간별로 저장해서 불러오기
-        "DailyData",
-        index="date-slot-level-index",
-        filter_dict={
-            "date-slot": [f"{start_date}#0", f"{today}#4"],
-        },
-    )
+    if db_data is None:
+        db_data = get_daily_data(period, today)
 
     if not db_data:
         return None
 
-    chars = []
-    level_range = 1
-    dates = {}
-
-    while level_range < 10:
-        for i in db_data:
-            date, slot = i["date-slot"].split("#")
-            slot = int(slot)
-
-            todayR = misc.get_today()
+    todayR = misc.get_today()
+    if today == todayR:
+        base_date = (todayR - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+    else:
+        base_date = today.strftime("%Y-%m-%d")
+
+    # (캐릭터, 날짜) 레벨 행렬, 데이터가 없으면 nan
+    date_list = []
+    char_list = []
+    levels = np.empty(len(db_data))
+    for n, i in enumerate(db_data):
+        date, slot = i["date-slot"].split("#")
+        date_list.append(date)
+        char_list.append((int(i["id"]), int(slot)))
+        levels[n] = float(i["level"])
+
+    dates, date_index = np.unique(date_list, return_inverse=True)
+    chars, char_index = np.unique(
+        np.array(char_list, dtype=np.int64), axis=0, return_inverse=True
+    )
 
-            if today == todayR.strftime("%Y-%m-%d"):
-                if (
-                    date == (todayR - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-                    and (-level_range <= i["level"] - level <= level_range)
-                    and not (i["id"], slot) in chars
-                ):
-                    chars.append((i["id"], slot))
+    matrix = np.full((len(chars), len(dates)), np.nan)
+    matrix[char_index.ravel(), date_index] = levels
 
-            else:
-                if (
-                    date == today
-                    and (-level_range <= i["level"] - level <= level_range)
-                    and not (i["id"], slot) in chars
-                ):  # 레벨 범위 이후에 수정
-                    chars.append((i["id"], slot))
-
-        dates = {}
-        for i in db_data:
-            date, slot = i["date-slot"].split("#")
-
-            if not date in dates.keys():
-                dates[date] = []
+    # 기준 날짜의 레벨로 정렬해두고 레벨 구간은 이진 탐색으로 찾음
+    base = np.searchsorted(dates, base_date)
+    if base < len(dates) and dates[base] == base_date:
+        base_levels = matrix[:, base]
+        order = np.argsort(base_levels)  # nan은 맨 뒤로
+        sorted_levels = base_levels[order][: np.count_nonzero(~np.isnan(base_levels))]
+    else:
+        order = sorted_levels = np.empty(0)
 
-            if (i["id"], int(slot)) in chars:
-                dates[date].append(i["level"])
+    cohort = np.empty(0, dtype=np.int64)
+    for level_range in range(1, 10):
+        lo = np.searchsorted(sorted_levels, float(level - level_range), side="left")
+        hi = np.searchsorted(sorted_levels, float(level + level_range), side="right")
+        cohort = order[lo:hi].astype(np.int64)
 
-        if len(dates[max(dates.keys())]) < 10:
-            level_range += 1
-        else:
+        if np.count_nonzero(~np.isnan(matrix[cohort, -1])) >= 10:
             break
 
-    for date in sorted(dates.keys()):
-        if dates[date]:
-            data["date"].append(date)
-            data["level"].append(sum(dates[date]) / len(dates[date]))
+    cohort_matrix = matrix[cohort]
+    counts = np.count_nonzero(~np.isnan(cohort_matrix), axis=0)
+    sums = np.nansum(cohort_matrix, axis=0)
+
+    for date, count, total in zip(dates, counts, sums):
+        if count:
+            data["date"].append(str(date))
+            data["level"].append(total / count)
 
     return data
 
@@ -0,0 +1,176 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+import misc
+import plot_style
+import data_manager as dm
+import get_character_info as gci
+
+plot_style.setup()
+
+MAX_NAMES = 10  # 한 번에 비교할 수 있는 최대 플레이어 수
+
+# 플레이어별 조회를 동시에 실행
+executor = ThreadPoolExecutor(max_workers=8)
+
+
+def parse_names(text: str) -> list[str]:
+    """
+    "a, b c" -> ["a", "b", "c"] (중복 제거, 입력 순서 유지)
+    """
+    names = []
+    for name in text.replace(",", " ").split():
+        if name.lower() not in [n.lower() for n in names]:
+            names.append(name)
+
+    return names
+
+
+def get_comparison(names: list[str], period: int, today: datetime.date) -> tuple:
+    """
+    여러 플레이어의 대표 캐릭터 레벨 히스토리를 그래프 하나에 같이 그림
+    닉네임 조회, DailyData 조회, 실시간 레벨 조회는 플레이어별로 동시에 실행
+    """
+    users = list(executor.map(misc.get_user, names))
+
+    missing = [name for name, user in zip(names, users) if user is None]
+    users = [user for user in users if user is not None]
+
+    text_missing = (
+        f"\n등록되어있지 않은 플레이어: {', '.join(missing)}" if missing else ""
+    )
+
+    if not users:
+        return "비교할 수 있는 플레이어가 없어요." + text_missing, None
+
+    histories = list(
+        executor.map(lambda user: get_main_slot_history(user, period, today), users)
+    )
+
+    series = [(user, h) for user, h in zip(users, histories) if h is not None]
+
+    if not series:
+        return "캐릭터 정보가 없어요." + text_missing, None
+
+    # 모든 플레이어의 날짜를 합쳐서 (날짜, 플레이어) 배열로 맞춤, 없는 날은 nan
+    dates = sorted(set().union(*[h.keys() for _, h in series]))
+    levels = np.full((len(dates), len(series)), np.nan)
+    date_pos = {date: i for i, date in enumerate(dates)}
+
+    for k, (_, history) in enumerate(series):
+        rows = [date_pos[date] for date in history]
+        levels[rows, k] = [float(level) for level in history.values()]
+
+    text_day = "지금" if today == misc.get_today() else today.strftime("%Y년 %m월 %d일")
+
+    # 마지막 레벨이 높은 순서로 요약
+    last_levels = [levels[~np.isnan(levels[:, k]), k][-1] for k in range(len(series))]
+    order = np.argsort(last_levels)[::-1]
+
+    lines = []
+    for k in order:
+        user, _ = series[k]
+        column = levels[~np.isnan(levels[:, k]), k]
+        change = column[-1] - column[0]
+
+        lines.append(
+            f"{user['name']} ({int(user['mainSlot'])}번) {column[-1]:.2f}"
+            + (f", {len(column)}일간 {change:+.2f}레벨" if len(column) > 1 else "")
+        )
+
+    msg = (
+        f"{text_day} 기준 {len(series)}명의 레벨을 비교해드릴게요.\n"
+        + "\n".join(lines)
+        + text_missing
+    )
+
+    if len(dates) < 2:
+        return msg, None
+
+    date_index = pd.to_datetime(dates)
+    day_offsets = (date_index - date_index[0]).days.to_numpy()
+
+    plt.figure(figsize=(10, 4))
+
+    for k, (user, _) in enumerate(series):
+        valid = np.flatnonzero(~np.isnan(levels[:, k]))
+        y = levels[valid, k]
+
+        color = f"C{k % 10}"
+
+        plt.plot(
+            date_index[valid],
+            y,
+            color=color,
+            marker="o" if len(dates) <= 30 else ".",
+            label=user["name"],
+            linestyle="",
+        )
+
+        if len(valid) > 1:  # 보간은 날짜 간격(일)을 x로 사용
+            x = day_offsets[valid]
+            x_new = np.linspace(
+                x[0],
+                x[-1],
+                min((x[-1] - x[0]) * gci.SMOOTH_COEFF + 1, gci.MAX_SMOOTH_POINTS),
+            )
+            plt.plot(
+                date_index[0] + pd.to_timedelta(x_new, unit="D"),
+                misc.pchip_interpolate(x, y, x_new),
+                color=color,
+            )
+
+    y_min = np.nanmin(levels)
+    y_max = np.nanmax(levels)
+    y_range = y_max - y_min
+
+    if y_min == y_max:
+        plt.ylim(y_max - 1, y_max + 1)
+    else:
+        plt.ylim(y_min - y_range / 10, y_max + y_range / 3)
+
+    gci.set_date_axis(plt.gca(), date_index)
+
+    plt.legend(loc="upper left", fontsize=8, ncol=2)
+
+    image_path = misc.get_image_path()
+
+    plt.savefig(image_path, dpi=250, bbox_inches="tight")
+    plt.close()
+
+    return msg, image_path
+
+
+def get_main_slot_history(user: dict, period: int, today: datetime.date):
+    """
+    대표 캐릭터의 {날짜: 레벨}, 데이터가 없으면 None
+    """
+    slot = int(user["mainSlot"])
+
+    start_date = (today - datetime.timedelta(days=period - 1)).strftime("%Y-%m-%d")
+    today_str = today.strftime("%Y-%m-%d")
+
+    db_data = dm.read_data(
+        "DailyData",
+        None,
+        {"id": int(user["id"]), "date-slot": [f"{start_date}#0", f"{today_str}#4"]},
+    )
+
+    history = {}
+    for i in db_data or []:
+        date, _slot = i["date-slot"].split("#")
+
+        if int(_slot) + 1 == slot:
+            history[date] = i["level"]
+
+    if today == misc.get_today():
+        today_data = gci.get_current_character_data(user["name"])
+
+        if today_data is not None:
+            history[today_str] = today_data[slot - 1]["level"]
+
+    return history or None
@@ -1,24 +1,14 @@
 import datetime
 import platform
 
-import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
-import matplotlib.font_manager as fm
 
 import misc
+import plot_style
 import data_manager
 
-plt.style.use("seaborn-v0_8-pastel")
-if platform.system() == "Linux":
-    font_path = "/opt/NanumSquareRoundEB.ttf"
-else:
-    font_path = misc.convert_path("assets\\fonts\\NanumSquareRoundEB.ttf")
-fm.fontManager.addfont(font_path)
-prop = fm.FontProperties(fname=font_path)
-plt.rcParams["font.family"] = prop.get_name()
-
-matplotlib.use("Agg")
+plot_style.setup()
 
 
 def get_level_distribution(today):
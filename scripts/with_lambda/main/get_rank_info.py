@@ -1,128 +1,85 @@
 import os
 import math
-import random
 import datetime
-import platform
-import requests
-import threading
+import numpy as np
 import pandas as pd
-from decimal import Decimal
 from typing import Optional
-from PIL import Image, ImageDraw, ImageFont
 
-import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib.ticker as ticker
-import matplotlib.font_manager as fm
 import matplotlib.patheffects as path_effects  # Added import for path effects
 
 import misc
+import plot_style
+import rank_table
+import rank_index
 import data_manager
-import register_player
-import get_character_info as gci
 
-plt.style.use("seaborn-v0_8-pastel")
-if platform.system() == "Linux":
-    font_path = "/opt/NanumSquareRoundEB.ttf"
-else:
-    font_path = misc.convert_path("assets\\fonts\\NanumSquareRoundEB.ttf")
-fm.fontManager.addfont(font_path)
-prop = fm.FontProperties(fname=font_path)
-plt.rcParams["font.family"] = prop.get_name()
+plot_style.setup()
 
-matplotlib.use("Agg")
+MAX_HISTORY_RANKS = 25  # 랭킹 히스토리 이미지 한 장에 그릴 최대 순위 개수
+MAX_HISTORY_DAYS = 60  # 랭킹 히스토리 이미지 한 장에 그릴 최대 날짜 수
+MAX_IMAGES = 10  # 디스코드 메시지 하나에 첨부할 수 있는 최대 파일 개수
+MAX_IMAGE_PIXELS = 24_000_000  # 이미지 한 장의 최대 픽셀 수
+MAX_UPLOAD_BYTES = (
+    8 * 1024 * 1024
+)  # 이미지 한 장의 최대 용량 (메시지 하나의 업로드 제한)
+RANKS_LIMIT = 100  # Ranks 테이블에 저장하는 순위 개수
+PREV_MARGIN = 100  # 100위 밖 랭킹의 순위 변화를 계산할 때 전날 랭킹을 더 읽는 개수
 
 
-def download_image(url, num, list_name):
-    response = requests.get(url)
+def get_rank_data(day, _range: Optional[list[int]] = None, names=True):
+    """
+    day의 랭킹 데이터 (Ranks 테이블 쿼리 한 번)
+    100위 밖까지 필요하면 DailyData의 date-slot-level-index에서 읽음
+    names: 닉네임도 조회할지 (Users 테이블에서 한번에 조회)
+    """
+    if _range and _range[1] > RANKS_LIMIT:
+        data = rank_index.get_window(day, _range)
+
+        if data is None:
+            return None
 
-    os_name = platform.system()
-    if os_name == "Linux":
-        head_path = misc.convert_path(f"\\tmp\\player_heads\\player{num}.png")
     else:
-        head_path = misc.convert_path(f"assets\\player_heads\\player{num}.png")
+        data = data_manager.read_data(
+            "Ranks", condition_dict={"date": day.strftime("%Y-%m-%d")}
+        )
 
-    with open(head_path, "wb") as file:
-        file.write(response.content)
-    list_name[num] = head_path
+        if data is None:
+            return None
 
+        for i, j in enumerate(data):
+            data[i]["rank"] = int(j["rank"])
+            data[i]["id"] = int(j["id"])
+            data[i]["job"] = int(j["job"])
+            data[i]["level"] = j["level"]
+            data[i]["slot"] = int(j["slot"])
 
-def get_rank_data(day, _range: Optional[list[int]] = None):
-    data = data_manager.read_data(
-        "Ranks", condition_dict={"date": day.strftime("%Y-%m-%d")}
-    )
+        data = data[_range[0] - 1 : _range[1]] if _range else data
 
-    if data is None:
-        return None
+    if names:
+        id_names = misc.get_names([j["id"] for j in data])
 
-    for i, j in enumerate(data):
-        data[i]["rank"] = int(j["rank"])
-        data[i]["id"] = int(j["id"])
-        data[i]["job"] = int(j["job"])
-        data[i]["level"] = j["level"]
-        data[i]["name"] = misc.get_name(id=j["id"])
-        data[i]["slot"] = int(j["slot"])
+        for j in data:
+            j["name"] = id_names.get(j["id"])
 
-    return data[_range[0] - 1 : _range[1]] if _range else data
+    return data
 
 
 def get_current_rank_data(_range: Optional[list[int]] = None, days_before=0) -> list:
     """
-    todo: page -> 범위로 변경
+    현재 전체 캐릭터 랭킹 데이터 반환 (_range가 없으면 상위 100위까지)
+    {"id": 1, "name": "ProDays", "job": "검호", "level": "100", "slot": 1}
 
-    현재 전체 캐릭터 랭킹 데이터 반환
-    {"name": "ProDays", "job": "검호", "level": "100", "slot": 1}
-
-    slot은 닉네임 확인 후 직접 검색해서 입력
+    오늘 랭킹은 rank_index에 캐시된 인덱스를 사용
     """
+    index = rank_index.get_live_index(days_before)
 
-    today = misc.get_today(days_before + 1)
-    today_str = today.strftime("%Y-%m-%d")
-
-    players = register_player.get_registered_players()
-
-    data = []
-
-    for player in players:
-        playerdata = data_manager.read_data(
-            "DailyData",
-            None,
-            {"id": player["id"], "date-slot": [f"{today_str}#0", f"{today_str}#4"]},
-        )
-        if playerdata is None:
-            continue
-
-        for i in range(5):
-            playerdata[i].update({"slot": i + 1})
-            data.append(playerdata[i])
-
-    rankdata = []
-
-    for d in data:
-        name = misc.get_name(id=d["id"])
-
-        if name is None:
-            continue
-
-        level = gci.get_current_character_data(name, days_before)
-
-        if not level:
-            continue
-        level = level[d["slot"] - 1]["level"]
-
-        rankdata.append(
-            {
-                "name": name,
-                "job": misc.convert_job(d["job"]),
-                "level": level,
-                "slot": d["slot"],
-            }
-        )
-
-    rankdata = sorted(rankdata, key=lambda x: x["level"], reverse=True)[:100]
+    if _range:
+        return index.window(_range[0], _range[1])
 
-    return rankdata[_range[0] - 1 : _range[1]] if _range else rankdata
+    return index.top(RANKS_LIMIT)
 
 
 def get_rank_info(_range: list[int], today: datetime.date) -> tuple:
@@ -134,16 +91,27 @@ def get_rank_info(_range: list[int], today: datetime.date) -> tuple:
         "Change": [],
     }
 
-    rank_count = _range[1] - _range[0] + 1
-
     if today == misc.get_today():
         current_data = get_current_rank_data(_range)
     else:
         current_data = get_rank_data(today, _range)
 
-    if current_data is None:
+    if not current_data:
         return None, None
 
+    # 전체 캐릭터 수보다 범위가 크면 있는 만큼만
+    rank_count = len(current_data)
+    data["Rank"] = data["Rank"][:rank_count]
+
+    # 전날 랭킹은 한번에 읽어서 (id, 슬롯)별 순위로 저장
+    # 100위 밖이면 전날 순위도 조금 더 넓게 읽음
+    prev_date = today - datetime.timedelta(days=1)
+    prev_range = [1, _range[1] + PREV_MARGIN] if _range[1] > RANKS_LIMIT else None
+    prev_ranks = {}
+    for j in get_rank_data(prev_date, prev_range, names=False) or []:
+        key = (j["id"], j["slot"])
+        prev_ranks[key] = min(prev_ranks.get(key, j["rank"]), j["rank"])
+
     # 실시간 랭킹 데이터를 가져와서 data에 추가
     for i in range(rank_count):
         name = current_data[i]["name"]  # 닉네임 변경 반영한 최신 닉네임
@@ -151,307 +119,67 @@ def get_rank_info(_range: list[int], today: datetime.date) -> tuple:
         data["Level"].append(current_data[i]["level"])
         data["Job"].append(current_data[i]["job"])
 
-        user_id = misc.get_id(name=name)
-
-        if user_id is None:  # 1. 등록x -> 등록 2. 닉네임 변경 -> 등록
-            register_player.register_player(name, 1)
-            user_id = misc.get_id(name=name)
-
-        prev_date = today - datetime.timedelta(days=1)
-        prev_date_str = prev_date.strftime("%Y-%m-%d")
-
-        prev_rank = data_manager.read_data(
-            "Ranks", "id-date-index", {"id": user_id, "date": prev_date_str}
-        )
+        # 랭킹은 등록된 플레이어로만 만들어지므로 id가 항상 있음
+        prev_rank = prev_ranks.get((current_data[i]["id"], current_data[i]["slot"]))
 
         if prev_rank is None:
             data["Change"].append(None)
         else:
-            prev_rank = sorted(prev_rank, key=lambda x: x["rank"])
-
-            for j in prev_rank:
-                if j["slot"] == current_data[i]["slot"]:
-                    data["Change"].append(j["rank"] - (i + _range[0]))
-                    break
-            else:
-                data["Change"].append(None)
-
-    avatar_images = [""] * rank_count
-
-    os_name = platform.system()
-    if os_name == "Linux":
-        head_path = misc.convert_path(f"\\tmp\\player_heads\\player.png")
-    else:
-        head_path = misc.convert_path(f"assets\\player_heads\\player.png")
-
-    if not os.path.exists(os.path.dirname(head_path)):
-        os.makedirs(os.path.dirname(head_path))
-
-    # rank_count개의 스레드 생성
-    threads = []
-    for i in range(rank_count):
-        url = f"https://mineskin.eu/helm/{data['Name'][i]}/100.png"
-        thread = threading.Thread(
-            target=download_image,
-            args=(url, i, avatar_images),
-        )
-        threads.append(thread)
-        thread.start()
-
-    # 모든 스레드가 완료될 때까지 대기
-    for thread in threads:
-        thread.join()
-
-    header_text = ["순위", "닉네임", "레벨", "직업", "변동"]
-    header_widths = [160, 500, 280, 240, 240]
-
-    header_height = 100
-    row_height = 100
-    avatar_size = 80
-    width, height = sum(header_widths), row_height * rank_count + header_height + 8
-
-    gray = (200, 200, 200)
-    blue = (160, 200, 255)
-    aqua = (190, 230, 255)
-    light_blue = (240, 245, 255)
-
-    rank_info_image = Image.new("RGB", (width, height), "white")
-    draw = ImageDraw.Draw(rank_info_image)
-
-    draw.rectangle(
-        [
-            (0, 0),
-            (width, header_height),
-        ],
-        fill=aqua,
-        width=2,
-    )
-
-    if os_name == "Linux":
-        font = ImageFont.truetype("/opt/NanumSquareRoundEB.ttf", 40)
-    else:
-        font = ImageFont.truetype(
-            misc.convert_path("assets\\fonts\\NanumSquareRoundEB.ttf"), 40
-        )
-
-    x_offset = -10
-    x_list = [34, 110, 90, 66, 68]
-    for i, text in enumerate(header_text):
-        draw.text((x_offset + x_list[i] + 24, 30), text, fill="black", font=font)
-        x_offset += header_widths[i]
+            data["Change"].append(prev_rank - (i + _range[0]))
 
-    for i in range(rank_count):
-        row = {
-            "Rank": str(data["Rank"][i]),
-            "Name": data["Name"][i],
-            "Level": f"{data['Level'][i]:.1f}",
-            "Job": (
-                data["Job"][i]
-                if isinstance(data["Job"][i], str)
-                else misc.convert_job(data["Job"][i])
-            ),
-            "Change": data["Change"][i],
-        }
-
-        y_offset = header_height + i * row_height
-        text_y_offset = y_offset + 32
-        x_offset = 0
-
-        if i % 2 != 0:
-            draw.rectangle(
-                [
-                    (0, y_offset),
-                    (sum(header_widths), y_offset + row_height),
-                ],
-                fill=light_blue,
-                width=2,
-            )
+    # 행이 많으면 여러 장으로 나눠서 이미지 크기를 제한
+    image_paths = []
+    for start in range(0, rank_count, rank_table.MAX_ROWS):
+        image_path = misc.get_image_path(f"image_{len(image_paths)}.png")
 
-        # 랭킹 글자수에 따라 위치 조정
-        x = x_offset + 86 - len(str(row["Rank"])) * 14
-        draw.text(
-            (x, text_y_offset),
-            str(row["Rank"]),
-            fill="black",
-            font=font,
-        )
-        x_offset += header_widths[0]
-
-        avatar_image = Image.open(avatar_images[i])
-        avatar_image = avatar_image.resize((avatar_size, avatar_size))
-        rank_info_image.paste(avatar_image, (x_offset + 12, y_offset + 12))
-        draw.text((x_offset + 124, text_y_offset), row["Name"], fill="black", font=font)
-        x_offset += header_widths[1]
-
-        draw.text(
-            (x_offset + 140 - len(row["Level"]) * 12, text_y_offset),
-            row["Level"],
-            fill="black",
-            font=font,
+        rank_table.draw_rank_table(
+            {
+                key: value[start : start + rank_table.MAX_ROWS]
+                for key, value in data.items()
+            },
+            image_path,
         )
-        x_offset += header_widths[2]
-
-        draw.text((x_offset + 84, text_y_offset), row["Job"], fill="black", font=font)
-        x_offset += header_widths[3]
-
-        if row["Change"] is not None:
-            change = int(row["Change"])
-        else:
-            change = None
-
-        if change is None:
-            draw.text(
-                (x_offset + 74, text_y_offset),
-                "New",
-                fill="green",
-                font=font,
-            )
+        image_paths.append(image_path)
 
-        elif change == 0:
-            draw.text((x_offset + 110, text_y_offset), "-", fill="black", font=font)
+    text_day = "지금" if today == misc.get_today() else today.strftime("%Y년 %m월 %d일")
 
-        elif change > 0:
-            if change >= 10:
-                draw.text(
-                    (x_offset + 66, text_y_offset),
-                    "+" + str(change),
-                    fill="red",
-                    font=font,
-                )
+    msg = f"{text_day} {_range[0]}~{_range[0] + rank_count - 1}위 캐릭터 랭킹을 보여드릴게요."
 
-            else:
-                draw.text(
-                    (x_offset + 82, text_y_offset),
-                    "+" + str(change),
-                    fill="red",
-                    font=font,
-                )
+    return msg, image_paths
 
-        elif change < 0:
-            if change <= -10:
-                draw.text(
-                    (x_offset + 76, text_y_offset),
-                    str(change),
-                    fill="blue",
-                    font=font,
-                )
 
-            else:
-                draw.text(
-                    (x_offset + 88, text_y_offset),
-                    str(change),
-                    fill="blue",
-                    font=font,
-                )
-
-        draw.line(
-            [(header_widths[0], y_offset), (header_widths[0], y_offset + row_height)],
-            fill=gray,
-            width=1,
-        )
-        draw.line(
-            [
-                (header_widths[0] + header_widths[1], y_offset),
-                (header_widths[0] + header_widths[1], y_offset + row_height),
-            ],
-            fill=gray,
-            width=1,
-        )
-        draw.line(
-            [
-                (header_widths[0] + header_widths[1] + header_widths[2], y_offset),
-                (
-                    header_widths[0] + header_widths[1] + header_widths[2],
-                    y_offset + row_height,
-                ),
-            ],
-            fill=gray,
-            width=1,
-        )
-        draw.line(
-            [
-                (
-                    header_widths[0]
-                    + header_widths[1]
-                    + header_widths[2]
-                    + header_widths[3],
-                    y_offset,
-                ),
-                (
-                    header_widths[0]
-                    + header_widths[1]
-                    + header_widths[2]
-                    + header_widths[3],
-                    y_offset + row_height,
-                ),
-            ],
-            fill=gray,
-            width=1,
-        )
-
-        draw.line(
-            [
-                (0, y_offset),
-                (width, y_offset),
-            ],
-            fill=gray,
-            width=1,
-        )
+class LabelGrid:
+    """
+    배치한 텍스트 라벨 위치를 (x, y) 격자 칸별로 저장해서
+    근처 라벨 확인을 주변 9칸만 보고 끝내도록 하는 공간 인덱스
+    """
 
-    draw.line(
-        [
-            (0, 4),
-            (width, 4),
-        ],
-        fill=blue,
-        width=8,
-    )
-    draw.line(
-        [
-            (0, height - 4),
-            (width, height - 4),
-        ],
-        fill=blue,
-        width=8,
-    )
-    draw.line(
-        [
-            (4, 0),
-            (4, height),
-        ],
-        fill=blue,
-        width=8,
-    )
-    draw.line(
-        [
-            (width - 4, 0),
-            (width - 4, height),
-        ],
-        fill=blue,
-        width=8,
-    )
+    def __init__(self, x_dist: float, y_dist: float):
+        self.x_dist = x_dist
+        self.y_dist = y_dist
+        self.cells: dict[tuple[int, int], list[tuple[float, float]]] = {}
 
-    # 이미지 저장
-    os_name = platform.system()
-    if os_name == "Linux":
-        image_path = "/tmp/image.png"
-    else:
-        image_path = "image.png"
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return int(x // self.x_dist), int(y // self.y_dist)
 
-    rank_info_image.save(image_path)
+    def is_occupied(self, x: float, y: float) -> bool:
+        cx, cy = self._cell(x, y)
 
-    text_day = "지금" if today == misc.get_today() else today.strftime("%Y년 %m월 %d일")
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for px, py in self.cells.get((cx + dx, cy + dy), []):
+                    if abs(x - px) < self.x_dist and abs(y - py) < self.y_dist:
+                        return True
 
-    msg = f"{text_day} {_range[0]}~{_range[1]}위 캐릭터 랭킹을 보여드릴게요."
+        return False
 
-    return msg, image_path
+    def add(self, x: float, y: float) -> None:
+        self.cells.setdefault(self._cell(x, y), []).append((x, y))
 
 
 def get_rank_history(_range: list[int], period: int, day: datetime.date) -> tuple:
     current_data = get_current_rank_data() if day == misc.get_today() else None
 
-    rank_count = _range[1] - _range[0] + 1
-
     start_date = day - datetime.timedelta(days=period - 1)
     today = day.strftime("%Y-%m-%d")
     start_date = start_date.strftime("%Y-%m-%d")
@@ -478,23 +206,65 @@ def get_rank_history(_range: list[int], period: int, day: datetime.date) -> tupl
                     {
                         "date": today,
                         "rank": i + 1,
-                        "id": misc.get_id(name=j["name"]),
+                        "id": j["id"],
                         "slot": j["slot"],
                     }
                 )
 
-    period = len(set([i["date"] for i in data]))
-
-    data = sorted(data, key=lambda x: x["date"])
-
-    # 이미지 생성
     df = pd.DataFrame(data)
     df["date"] = pd.to_datetime(df["date"])
 
+    # 닉네임은 한번에 조회
+    names = misc.get_names(df["id"].unique().tolist())
+
+    # 이미지 크기 제한: 순위 MAX_HISTORY_RANKS개, 날짜 MAX_HISTORY_DAYS일 단위로 나눠서 그림
+    # 나눈 이미지가 MAX_IMAGES장을 넘으면 날짜 구간을 늘리고 해상도를 낮춤
+    # 이미지를 합친 용량이 업로드 제한을 넘으면 sm.send가 여러 메시지로 나눠서 보냄
+    rank_blocks = [
+        [start, min(start + MAX_HISTORY_RANKS - 1, _range[1])]
+        for start in range(_range[0], _range[1] + 1, MAX_HISTORY_RANKS)
+    ]
+
+    dates = np.sort(df["date"].unique())
+    period = len(dates)
+
+    window_count = math.ceil(period / MAX_HISTORY_DAYS)
+    window_count = max(1, min(window_count, MAX_IMAGES // len(rank_blocks)))
+    window_days = math.ceil(period / window_count)
+
+    image_paths = []
+    for block in rank_blocks:
+        for start in range(0, period, window_days):
+            window = dates[start : start + window_days]
+
+            tile = df[
+                df["date"].between(window[0], window[-1])
+                & df["rank"].between(block[0], block[1])
+            ]
+            if tile.empty:
+                continue
+
+            image_path = misc.get_image_path(f"image_{len(image_paths)}.png")
+            draw_rank_history(tile, block, names, image_path)
+            image_paths.append(image_path)
+
+    msg = f"{period}일 동안의 {_range[0]}~{_range[1]}위 랭킹 히스토리를 보여드릴게요."
+    return msg, image_paths
+
+
+def draw_rank_history(
+    df: pd.DataFrame, _range: list[int], names: dict[int, str], image_path: str
+) -> None:
+    """
+    랭킹 히스토리 그래프 이미지 생성
+    이미지가 MAX_IMAGE_PIXELS, MAX_UPLOAD_BYTES를 넘지 않도록 해상도를 조절함
+    """
+    rank_count = _range[1] - _range[0] + 1
+    period = df["date"].nunique()
+
     # plt.figure(figsize=(10 * math.log10(period), 6))
-    plt.figure(
-        figsize=(period * 0.5 if period >= 15 else period * 0.3 + 3, 0.6 * rank_count)
-    )
+    figsize = (period * 0.5 if period >= 15 else period * 0.3 + 3, 0.6 * rank_count)
+    plt.figure(figsize=figsize)
 
     # Define a custom color palette for better distinction between lines
     colors = [
@@ -511,202 +281,150 @@ def get_rank_history(_range: list[int], period: int, day: datetime.date) -> tupl
         "#436e6f",
         "#c56477",
         "#ac7f0f",
-    ]  # Create a unique identifier for each player-slot combination
-    df["player_slot_id"] = df["id"].astype(str) + "_" + df["slot"].astype(str)
+    ]
+
+    # df는 호출한 쪽에서 필터링한 조각이므로 열을 직접 추가하지 않고 새 DataFrame으로 만듦
+    df = df.assign(player_slot_id=df["id"].astype(str) + "_" + df["slot"].astype(str))
+
+    # 날짜순으로 처음 등장한 순서 (순위가 같을 때 그리는 순서)
+    df = df.sort_values("date", kind="stable")
+    appearance_order = df["player_slot_id"].unique()
+
+    # 플레이어-슬롯별, 날짜순으로 정렬한 뒤 연속된 날짜 구간(run)을 한번에 구함
+    df = df.sort_values(["id", "slot", "date"], kind="stable", ignore_index=True)
+
+    new_player = df["player_slot_id"] != df["player_slot_id"].shift()
+    new_run = new_player | (df["date"].diff() != pd.Timedelta(days=1))
+
+    run_starts = np.flatnonzero(new_run.to_numpy())
+    run_ends = np.append(run_starts[1:], len(df))
 
-    # Get unique player-slot combinations
-    player_slot_ids = df["player_slot_id"].unique()
+    dates = df["date"].to_numpy()
+    date_nums = mdates.date2num(dates)
+    ranks = df["rank"].to_numpy()
+    player_slot_ids = df["player_slot_id"].to_numpy()
+
+    runs = {}  # player_slot_id: [(start, end), ...]
+    for start, end in zip(run_starts, run_ends):
+        runs.setdefault(player_slot_ids[start], []).append((start, end))
 
     # 가장 최근 날짜의 데이터 찾기
-    latest_date = df["date"].max()
-
-    # 각 플레이어-슬롯 조합의 최근 순위 찾기 (높은 순위를 나중에 그려 위에 표시되도록)
-    player_latest_ranks = {}
-    for player_slot_id in player_slot_ids:
-        player_data = df[df["player_slot_id"] == player_slot_id]
-        # 해당 ID와 슬롯의 가장 최근 날짜 데이터 찾기
-        player_latest = player_data[player_data["date"] == player_data["date"].max()]
-        if not player_latest.empty:
-            player_latest_ranks[player_slot_id] = player_latest["rank"].iloc[0]
-        else:
-            player_latest_ranks[player_slot_id] = (
-                999  # 데이터가 없는 경우 낮은 우선순위    # 최근 순위 기준으로 오름차순 정렬 (낮은 순위 먼저, 높은 순위 나중에 그려서 위에 표시)
-            )
+    latest_date = date_nums.max()
+
+    # 각 플레이어-슬롯 조합의 최근 순위 (정렬되어 있으므로 마지막 구간의 마지막 값)
+    player_latest_ranks = {
+        player_slot_id: ranks[player_runs[-1][1] - 1]
+        for player_slot_id, player_runs in runs.items()
+    }
+
+    # 최근 순위 기준으로 내림차순 정렬 (높은 순위를 나중에 그려 위에 표시되도록)
     sorted_player_slot_ids = sorted(
-        player_slot_ids, key=lambda psid: player_latest_ranks[psid], reverse=True
+        appearance_order, key=lambda psid: player_latest_ranks[psid], reverse=True
     )
 
-    # 텍스트 라벨의 위치를 추적하기 위한 딕셔너리
-    # key: (date, rank) 좌표, value: 해당 좌표에 이미 텍스트가 있는지 여부
-    text_positions = (
-        {}
-    )  # Plot each player-slot combination's data with a specific color, 최근 순위가 높은 플레이어가 가장 나중에 그려져 위에 표시됨
+    # 이미 배치한 텍스트 라벨 위치 (격자 인덱스)
+    label_grid = LabelGrid(2.0, 0.7)
+
+    # 최근 순위가 높은 플레이어가 가장 나중에 그려져 위에 표시됨
     for i, player_slot_id in enumerate(sorted_player_slot_ids):
-        group = df[df["player_slot_id"] == player_slot_id]
         color_idx = i % len(colors)  # Cycle through colors if more players than colors
 
-        # Extract player ID and slot from the combined ID
-        player_id, slot = player_slot_id.split("_")
-        player_id = int(player_id)
-        slot = int(slot)
-
-        player_name = misc.get_name(id=player_id)  # 플레이어 이름 가져오기
+        player_id = int(player_slot_id.split("_")[0])
+        player_label = names.get(player_id)  # 플레이어 이름 가져오기
 
-        if player_name is None:
+        if player_label is None:
             continue
 
-        player_label = player_name
+        # 순위가 높을수록(숫자가 작을수록) zorder 값이 커짐
+        zorder = 100 - player_latest_ranks[player_slot_id]
+
+        # 각 연속된 날짜 구간마다 별도의 선으로 그리기
+        for start, end in runs[player_slot_id]:
+            if end - start > 1:
+                # 선 그리기 (마커 없이)
+                (line,) = plt.plot(
+                    dates[start:end],
+                    ranks[start:end],
+                    marker="",
+                    color=colors[color_idx],
+                    linewidth=4,
+                    zorder=zorder,
+                )
 
-        # 데이터 프레임에서 날짜를 정렬하여 날짜 간격을 확인
-        sorted_group = group.sort_values(by="date")
+                # 그림자 효과 추가 (선 아래에 그림자)
+                line.set_path_effects(
+                    [
+                        path_effects.SimpleLineShadow(),
+                        path_effects.Normal(),
+                    ]
+                )
 
-        # 연속된 데이터 포인트를 찾아서 그룹화하기
-        date_groups = []
-        current_group = []
+            last_date = dates[end - 1]
+            last_rank = ranks[end - 1]
 
-        # 날짜 순으로 처리
-        for idx, row in sorted_group.iterrows():
-            if not current_group:
-                # 첫 데이터 포인트 추가
-                current_group.append(row)
-            else:
-                # 연속된 데이터인지 확인
-                last_date = current_group[-1]["date"]
-                current_date = row["date"]
-                date_diff = (current_date - last_date).days
-
-                # 하루 간격이면 같은 그룹에 추가
-                if date_diff == 1:
-                    current_group.append(row)
-                else:
-                    # 간격이 1일보다 크면 새 그룹 시작
-                    if len(current_group) > 0:
-                        date_groups.append(current_group)
-                    current_group = [row]
-
-        # 마지막 그룹 추가
-        if current_group:
-            date_groups.append(current_group)
-
-        # 각 연속된 날짜 그룹마다 별도의 선으로 그리기
-        for group_idx, group_data in enumerate(date_groups):
-            if len(group_data) > 0:
-                group_df = pd.DataFrame(
-                    group_data
-                )  # 단일 데이터 포인트인지 확인 (선이 아니라 점)
-                is_single_point = len(group_df) == 1
-                zorder = 100 - player_latest_ranks[player_slot_id]
-
-                if not is_single_point:
-                    # 선 그리기 (마커 없이)
-                    (line,) = plt.plot(
-                        group_df["date"],
-                        group_df["rank"],
-                        marker="",  # 선에는 마커 표시 안함
-                        color=colors[color_idx],
-                        linewidth=4,
-                        zorder=zorder,  # 순위가 높을수록(숫자가 작을수록) zorder 값이 커짐
-                    )
-
-                    # 그림자 효과 추가 (선 아래에 그림자)
-                    line.set_path_effects(
-                        [
-                            path_effects.SimpleLineShadow(),
-                            path_effects.Normal(),
-                        ]
-                    )
-
-                # 마지막 데이터 포인트에만 마커 표시
-                plt.plot(
-                    [group_df["date"].iloc[-1]],  # 마지막 데이터 포인트의 날짜
-                    [group_df["rank"].iloc[-1]],  # 마지막 데이터 포인트의 순위
-                    marker="o",
-                    markersize=10,
-                    color=colors[color_idx],
-                    linestyle="",  # 선은 표시 안함
-                    zorder=zorder + 1,  # 선보다 위에 표시
+            # 가장 최근 날짜 데이터의 경우 우측에 표시 (겹침 없음, 항상 오른쪽에)
+            if date_nums[end - 1] == latest_date:
+                plt.text(
+                    last_date + pd.Timedelta(days=0.5),  # 마지막 날짜보다 조금 오른쪽
+                    last_rank,
+                    player_label,
+                    color="black",
+                    fontweight="bold",
+                    fontsize=10,
+                    va="center",
+                    zorder=1000,  # 마커보다 위에 표시
                 )
+                continue
 
-                # 각 그룹(선 또는 단일 점)의 마지막 데이터 포인트 정보
-                last_date = group_df["date"].iloc[-1]
-                last_rank = group_df["rank"].iloc[-1]
+            # 끊어진 선이나 단일 점의 마지막 포인트 텍스트 위치 조정
+            # 근처(2일, 0.7순위 이내)에 다른 텍스트가 있으면 포인트 아래, 없으면 위에 표시
+            if label_grid.is_occupied(date_nums[end - 1], last_rank):
+                text_y = last_rank + 0.4
+            else:
+                text_y = last_rank - 0.2
+
+            plt.text(
+                last_date,
+                text_y,
+                player_label,
+                color="black",
+                fontweight="bold",
+                fontsize=10,
+                ha="center",
+                zorder=1000,  # 마커보다 위에 표시
+            )
 
-                # 날짜와 순위를 이용해 위치 키를 생성
-                position_key = (
-                    mdates.date2num(last_date),
-                    last_rank,
-                )  # 가장 최근 날짜 데이터의 경우 우측에 표시 (겹침 없음, 항상 오른쪽에)
-                if last_date == latest_date:
-                    plt.text(
-                        last_date
-                        + pd.Timedelta(days=0.5),  # 마지막 날짜보다 조금 오른쪽
-                        last_rank,
-                        player_label,
-                        color="black",
-                        fontweight="bold",
-                        fontsize=10,
-                        va="center",
-                        zorder=1000,  # 마커보다 위에 표시
-                    )
-                else:
-                    # 최근 데이터가 아닌 모든 그룹(끊어진 선이나 단일 점)의 마지막 포인트 텍스트 위치 조정
-                    # 근처에 다른 텍스트가 있는지 확인
-                    nearby_occupied = False
-
-                    # 순위 기준으로 근처 (±0.5 이내) 텍스트 위치 확인
-                    for existing_date, existing_rank in text_positions.keys():
-                        # 날짜가 가까운 포인트 중
-                        date_diff = abs(mdates.date2num(last_date) - existing_date)
-                        if date_diff < 2.0:  # 날짜가 가까운 경우 (2일 이내)
-                            # 순위도 가까운 경우
-                            if abs(last_rank - existing_rank) < 0.7:
-                                nearby_occupied = True
-                                break
-
-                    if nearby_occupied:
-                        # 다른 텍스트가 이미 있다면, 포인트 아래에 텍스트 표시
-                        plt.text(
-                            last_date,  # 마지막 데이터 위치
-                            last_rank + 0.4,  # 데이터 포인트보다 약간 아래에
-                            player_label,
-                            color="black",
-                            fontweight="bold",
-                            fontsize=10,
-                            ha="center",
-                            zorder=1000,  # 마커보다 위에 표시
-                        )
-                    else:
-                        # 주변에 다른 텍스트가 없다면, 포인트 위에 텍스트 표시 (기존 방식)
-                        plt.text(
-                            last_date,  # 마지막 데이터 위치
-                            last_rank - 0.2,  # 데이터 포인트보다 약간 위에
-                            player_label,
-                            color="black",
-                            fontweight="bold",
-                            fontsize=10,
-                            ha="center",
-                            zorder=1000,  # 마커보다 위에 표시
-                        )
-
-                    # 이 위치에 텍스트를 배치했음을 기록
-                    text_positions[position_key] = True
+            # 이 위치에 텍스트를 배치했음을 기록
+            label_grid.add(date_nums[end - 1], last_rank)
+
+        # 각 구간의 마지막 데이터 포인트에만 마커 표시
+        last_indices = [end - 1 for _, end in runs[player_slot_id]]
+        plt.plot(
+            dates[last_indices],
+            ranks[last_indices],
+            marker="o",
+            markersize=10,
+            color=colors[color_idx],
+            linestyle="",
+            zorder=zorder + 1,  # 선보다 위에 표시
+        )
 
     ax = plt.gca()
     date_format = mdates.DateFormatter("%m월 %d일")
     ax.xaxis.set_major_formatter(date_format)
 
     # 표시할 x축 날짜 직접 계산
-    tick_indices = range(len(df["date"].unique()) - 1, -1, -3)  # 역순으로
+    unique_dates = np.unique(date_nums)
+    tick_indices = range(len(unique_dates) - 1, -1, -3)  # 역순으로
 
     # 실제 데이터 포인트의 날짜만 선택
-    ticks = [float(mdates.date2num(df["date"].unique()[i])) for i in tick_indices]
+    ticks = [float(unique_dates[i]) for i in tick_indices]
     ax.xaxis.set_major_locator(ticker.FixedLocator(ticks))
 
     # x축 범위를 데이터 범위로 제한 (여백 추가)
     plt.xlim(
-        df["date"].iloc[0] - pd.Timedelta(days=1),
-        df["date"].iloc[-1]
-        + pd.Timedelta(days=0.5),  # 우측 여백 늘림 (닉네임 표시 공간)
+        df["date"].min() - pd.Timedelta(days=1),
+        df["date"].max() + pd.Timedelta(days=0.5),  # 우측 여백 늘림 (닉네임 표시 공간)
     )
     plt.ylim(_range[1] + 1, _range[0] - 1)
 
@@ -723,16 +441,15 @@ def get_rank_history(_range: list[int], period: int, day: datetime.date) -> tupl
     ax.spines["left"].set_visible(False)
     # ax.spines["bottom"].set_visible(False)
 
-    os_name = platform.system()
-    if os_name == "Linux":
-        image_path = "/tmp/image.png"
-    else:
-        image_path = "image.png"
-    plt.savefig(image_path, dpi=200, bbox_inches="tight")
-    plt.close()
+    dpi = min(200, int((MAX_IMAGE_PIXELS / (figsize[0] * figsize[1])) ** 0.5))
+    plt.savefig(image_path, dpi=dpi, bbox_inches="tight")
 
-    msg = f"{period}일 동안의 {_range[0]}~{_range[1]}위 랭킹 히스토리를 보여드릴게요."
-    return msg, image_path
+    # 업로드 제한보다 크면 해상도를 낮춰서 다시 저장
+    while os.path.getsize(image_path) > MAX_UPLOAD_BYTES and dpi > 50:
+        dpi = int(dpi * 0.7)
+        plt.savefig(image_path, dpi=dpi, bbox_inches="tight")
+
+    plt.close()
 
 
 if __name__ == "__main__":
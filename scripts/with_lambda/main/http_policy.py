@@ -0,0 +1,183 @@
+import time
+import random
+import threading
+import requests
+from typing import Optional
+
+# 외부 서비스별 요청 정책
+# timeout: (연결, 응답) 초
+# retries: 연결 실패, 시간 초과, retry_statuses 응답을 받았을 때 다시 시도하는 횟수
+# failure_threshold: 연속으로 이만큼 실패하면 회로를 열어서 open_seconds 동안 요청하지 않고 바로 실패
+# headers: 세션의 기본 헤더
+POLICIES = {
+    "discord": {
+        "timeout": (3, 10),
+        "retries": 2,
+        "retry_statuses": {500, 502, 503, 504},
+        "failure_threshold": 5,
+        "open_seconds": 30,
+    },
+    "mojang": {
+        "timeout": (3, 5),
+        "retries": 2,
+        "retry_statuses": {429, 500, 502, 503, 504},
+        "failure_threshold": 5,
+        "open_seconds": 60,
+        # 세션을 넘기면 mojang 라이브러리가 기본 User-Agent를 넣지 않으므로 같은 값을 직접 설정
+        "headers": {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+            "(KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36"
+        },
+    },
+    "mineskin": {
+        "timeout": (3, 5),
+        "retries": 1,
+        "retry_statuses": {500, 502, 503, 504},
+        "failure_threshold": 5,
+        "open_seconds": 60,
+    },
+    "default": {
+        "timeout": (3, 10),
+        "retries": 1,
+        "retry_statuses": {500, 502, 503, 504},
+        "failure_threshold": 5,
+        "open_seconds": 30,
+    },
+}
+
+BACKOFF_BASE = 0.3  # 다시 시도하기 전 기다리는 시간 (초, 시도할 때마다 2배)
+BACKOFF_MAX = 3.0
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH"}
+
+# {서비스 이름: {"failures": 연속 실패 횟수, "opened_at": 회로를 연 시간}}
+circuits = {}
+lock = threading.Lock()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    연속으로 실패해서 회로가 열린 서비스에 요청함 (기존 ConnectionError 처리로 대체 동작)
+    """
+
+
+class Session(requests.Session):
+    """
+    dependency의 정책(시간 제한, 재시도, 회로 차단)을 적용하는 requests.Session
+    모장 API 클라이언트처럼 세션을 받는 라이브러리에도 그대로 넘길 수 있음
+    """
+
+    def __init__(self, dependency: str, pool_size: int = 10):
+        super().__init__()
+
+        self.dependency = dependency
+        self.policy = POLICIES.get(dependency, POLICIES["default"])
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size
+        )
+        self.mount("https://", adapter)
+
+        self.headers.update(self.policy.get("headers", {}))
+
+    def request(self, method, url, *args, **kwargs) -> requests.Response:
+        policy = self.policy
+
+        kwargs.setdefault("timeout", policy["timeout"])
+
+        # 응답을 받지 못한 POST는 서버에서 처리됐을 수 있으므로 연결 실패만 다시 시도
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            check_circuit(self.dependency)
+            response = None
+
+            try:
+                response = super().request(method, url, *args, **kwargs)
+
+            except requests.ConnectionError as e:
+                record_failure(self.dependency)
+
+                if attempt >= policy["retries"] or not (
+                    idempotent or isinstance(e, requests.ConnectTimeout)
+                ):
+                    raise
+
+            except requests.Timeout:
+                record_failure(self.dependency)
+
+                if attempt >= policy["retries"] or not idempotent:
+                    raise
+
+            else:
+                status = response.status_code
+                retry = (
+                    status in policy["retry_statuses"]
+                    and attempt < policy["retries"]
+                    and (idempotent or status == 429)
+                )
+
+                # 429를 직접 재시도하는 서비스는 재시도해도 계속 rate limit이면 실패로 셈
+                # (디스코드는 discord_api가 버킷별로 기다리므로 회로에 반영하지 않음)
+                if status >= 500 or (
+                    status == 429 and not retry and 429 in policy["retry_statuses"]
+                ):
+                    record_failure(self.dependency)
+                elif status != 429:
+                    record_success(self.dependency)
+
+                if not retry:
+                    return response
+
+                print(f"{self.dependency} 응답 {response.status_code}, 다시 시도")
+
+            attempt += 1
+            time.sleep(get_backoff(attempt, response))
+
+
+def get_backoff(attempt: int, response: Optional[requests.Response]) -> float:
+    """
+    다시 시도하기 전 기다리는 시간 (Retry-After가 있으면 따르고, 없으면 무작위로 지수 백오프)
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+
+    try:
+        return min(BACKOFF_MAX, float(retry_after))
+    except (TypeError, ValueError):
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+def check_circuit(dependency: str) -> None:
+    """
+    회로가 열려 있으면 CircuitOpenError
+    open_seconds가 지나면 요청을 하나씩 보내보고 성공하면 닫음
+    """
+    policy = POLICIES.get(dependency, POLICIES["default"])
+
+    with lock:
+        circuit = circuits.get(dependency)
+
+        if circuit is None or circuit["failures"] < policy["failure_threshold"]:
+            return
+
+        if time.time() - circuit["opened_at"] < policy["open_seconds"]:
+            raise CircuitOpenError(f"{dependency} 회로가 열려 있음")
+
+        # 다음 시도가 실패하면 다시 open_seconds 동안 열림
+        circuit["opened_at"] = time.time()
+
+
+def record_failure(dependency: str) -> None:
+    with lock:
+        circuit = circuits.setdefault(dependency, {"failures": 0, "opened_at": 0.0})
+        circuit["failures"] += 1
+
+        policy = POLICIES.get(dependency, POLICIES["default"])
+        if circuit["failures"] == policy["failure_threshold"]:
+            circuit["opened_at"] = time.time()
+            print(f"{dependency} 연속 실패 {circuit['failures']}회, 회로 열림")
+
+
+def record_success(dependency: str) -> None:
+    with lock:
+        circuits.pop(dependency, None)
@@ -1,18 +1,16 @@
 import os
 import json
 import traceback
-from rich.console import Console
 import misc
 import send_msg as sm
-import get_rank_info as gri
+import result_cache
 import register_player as rp
-import get_character_info as gci
-import get_level_distribution as gld
-import update
+
+# get_rank_info, get_character_info, get_level_distribution, update는
+# pandas, matplotlib을 불러오기 때문에 커맨드를 처리할 때 import (콜드 스타트 단축)
 
 
 ADMIN_ID = os.getenv("DISCORD_ADMIN_ID")
-console = Console()
 
 
 def lambda_handler(event, context):
@@ -22,14 +20,33 @@ def lambda_handler(event, context):
         return command_handler(event)
 
     except:
-        console.print_exception(show_locals=True)
+        from rich.console import Console
+
+        Console().print_exception(show_locals=True)
         sm.send(event, "오류가 발생했습니다.", log_type=3, error=traceback.format_exc())
         return {"statusCode": 400, "body": json.dumps(traceback.format_exc())}
 
+    finally:  # 응답을 보낸 뒤 쌓인 로그 전송
+        sm.flush_logs()
+
 
 def command_handler(event):
 
+    if event.get("action", None) == "warmup":
+        import warmup
+
+        result = warmup.warmup(event)
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {"message": "warmup 완료", "result": result}, ensure_ascii=False
+            ),
+        }
+
     if event.get("action", None) == "update_1D":
+        import update
+
         update.update_1D(event)
 
         return {
@@ -37,6 +54,15 @@ def command_handler(event):
             "body": json.dumps({"message": "업데이트 완료"}, ensure_ascii=False),
         }
 
+    # discord_event_handler가 캐시로 응답한 명령어의 로그
+    if event.get("action", None) == "log_cached":
+        sm.send_log(1, event["event"], "(캐시) " + event["msg"])
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"message": "로그 전송 완료"}, ensure_ascii=False),
+        }
+
     body = json.loads(event["body"])
     cmd = body["data"]["name"]
     options = body["data"]["options"] if "options" in body["data"] else []
@@ -51,12 +77,12 @@ def command_handler(event):
             return sm.send(event, f"아이피 주소: {ip}", log_type=2)
 
         elif cmd == "user_count":
-            pl_list = rp.get_registered_players()
-
-            return sm.send(event, f"등록된 유저 수: {len(pl_list)}", log_type=2)
+            return sm.send(event, f"등록된 유저 수: {rp.count_players()}", log_type=2)
 
         elif cmd == "server_list":
-            server_list = misc.get_guild_list()
+            import discord_api
+
+            server_list = discord_api.get_guild_list()
 
             msg = (
                 f"서버 수: {len(server_list)}\n서버 목록\n"
@@ -96,20 +122,29 @@ def command_handler(event):
         _range = list(map(int, range_str))
         if len(_range) != 2:
             return sm.send(event, "랭킹 범위는 '시작..끝' 형식으로 입력해주세요.")
-        elif _range[0] < 1 or _range[1] > 100:
-            return sm.send(event, "랭킹 범위는 1~100 사이의 숫자로 입력해주세요.")
+        elif _range[0] < 1:
+            return sm.send(event, "랭킹 범위는 1 이상의 숫자로 입력해주세요.")
         elif _range[0] >= _range[1]:
             return sm.send(event, "랭킹 범위는 시작이 끝보다 작아야 합니다.")
+        elif _range[1] - _range[0] + 1 > 100:
+            return sm.send(event, "랭킹은 한 번에 100개까지 조회할 수 있습니다.")
+        elif period is not None and _range[1] > 100:
+            return sm.send(event, "랭킹 히스토리는 1~100위만 조회할 수 있습니다.")
 
-        if period is None:
-            msg, image_path = gri.get_rank_info(_range, today)
-        else:
-            msg, image_path = gri.get_rank_history(_range, period, today)
+        def compute():
+            import get_rank_info as gri
 
-        if not msg:
-            raise Exception("cannot get rank info")
+            if period is None:
+                msg, image_path = gri.get_rank_info(_range, today)
+            else:
+                msg, image_path = gri.get_rank_history(_range, period, today)
 
-        return sm.send(event, msg, image=image_path)
+            if not msg:
+                raise Exception("cannot get rank info")
+
+            return msg, image_path
+
+        return send_single_flight(event, body, compute, today == misc.get_today())
 
     elif cmd == "검색":
 
@@ -137,8 +172,16 @@ def command_handler(event):
         if name is None:
             return sm.send(event, "닉네임을 입력해주세요.")
 
+        # 이전 닉네임은 다른 플레이어가 쓰고 있지 않을 때만 등록된 플레이어로 봄
+        user = misc.get_user(name)
+
         register_msg = None
-        if not rp.is_registered(name):
+        if user is None:
+            # 마인크래프트 프로필 조회가 오래 걸리기 때문에 먼저 알려줌
+            sm.send_progress(
+                event, f"등록되어있지 않은 플레이어네요. {name}님을 등록하고 있어요..."
+            )
+
             result = rp.register_player(name, 1)
 
             if result == 1:
@@ -146,7 +189,10 @@ def command_handler(event):
                     f"등록되어있지 않은 플레이어네요. {name}님을 등록했어요.\n\n"
                 )
             elif result == -1:
-                return sm.send(event, f"오류가 발생했어요. 닉네임을 확인해주세요.")
+                return sm.send(event, "오류가 발생했어요. 닉네임을 확인해주세요.")
+
+        else:  # 이전 닉네임으로 찾았어도 이후 조회는 지금 닉네임으로 바로 찾음
+            name = user["name"]
 
         today = misc.get_today_from_input(today)
         if today == -1:
@@ -157,13 +203,60 @@ def command_handler(event):
         elif today == -2:
             return sm.send(event, "미래 날짜는 조회할 수 없습니다.")
 
-        if _type == "레벨":
-            msg, image_path = gci.get_character_info(name, slot, period, today)
-        else:  # 랭킹
-            msg, image_path = gci.get_charater_rank_history(name, slot, period, today)
+        def on_progress(msg):  # 그래프를 그리는 동안 텍스트 먼저 전송
+            sm.send_progress(
+                event, (register_msg or "") + msg + "\n\n그래프를 그리고 있어요..."
+            )
+
+        def compute():
+            import get_character_info as gci
+
+            if _type == "레벨":
+                return gci.get_character_info(name, slot, period, today, on_progress)
+            elif _type == "전체":
+                return gci.get_all_slots_info(name, period, today, on_progress)
+            else:  # 랭킹
+                return gci.get_charater_rank_history(
+                    name, slot, period, today, on_progress
+                )
 
         if register_msg:
-            msg = register_msg + msg
+            msg, image_path = compute()
+            return sm.send(event, register_msg + msg, image=image_path)
+
+        return send_single_flight(event, body, compute, today == misc.get_today())
+
+    elif cmd == "비교":
+        import get_comparison as gc
+
+        names = []
+        period = 7
+        today = None
+        for i in options:
+            if i["name"] == "닉네임":
+                names = gc.parse_names(i["value"])
+
+            elif i["name"] == "기간":
+                period = i["value"]
+
+            elif i["name"] == "날짜":
+                today = i["value"]
+
+        if not names:
+            return sm.send(event, "닉네임을 입력해주세요.")
+        elif len(names) > gc.MAX_NAMES:
+            return sm.send(event, f"한 번에 {gc.MAX_NAMES}명까지 비교할 수 있습니다.")
+
+        today = misc.get_today_from_input(today)
+        if today == -1:
+            return sm.send(
+                event,
+                "날짜 입력이 올바르지 않습니다: YYYY-MM-DD, MM-DD, DD, -n (예시: 2025-12-31, 12-01, 05, -1, -20)",
+            )
+        elif today == -2:
+            return sm.send(event, "미래 날짜는 조회할 수 없습니다.")
+
+        msg, image_path = gc.get_comparison(names, period, today)
 
         return sm.send(event, msg, image=image_path)
 
@@ -185,9 +278,12 @@ def command_handler(event):
         elif today == misc.get_today():
             return sm.send(event, "오늘 날짜는 조회할 수 없습니다.")
 
-        msg, image_path = gld.get_level_distribution(today)
+        def compute():
+            import get_level_distribution as gld
 
-        return sm.send(event, msg, image=image_path)
+            return gld.get_level_distribution(today)
+
+        return send_single_flight(event, body, compute, False)
 
     elif cmd == "등록":
 
@@ -220,6 +316,42 @@ def command_handler(event):
         return {"statusCode": 400, "body": json.dumps(f"unhandled command: {cmd}")}
 
 
+def send_single_flight(event, body, compute, live):
+    """
+    결과 캐시를 확인하고, 없으면 계산해서 전송 후 캐시에 저장
+    같은 명령어가 동시에 들어오면 리스를 얻은 요청만 계산하고
+    나머지는 그 결과를 기다렸다가 같은 메시지와 이미지로 응답함
+
+    compute: () -> (msg, image_path)
+    live: 오늘(실시간) 데이터가 포함된 결과인지
+    """
+    key = result_cache.get_cache_key(body)
+
+    token = None
+    cached = result_cache.get(key)
+
+    if cached is None:
+        token = result_cache.acquire_lease(key)
+
+        if token is None:  # 다른 요청이 계산 중
+            cached = result_cache.wait_for(key)
+
+    if cached is not None:
+        return sm.send_cached(event, cached["content"], cached["image_urls"])
+
+    # 리스를 얻었거나, 기다렸는데 결과가 없으면 (계산 실패, 시간 초과) 직접 계산
+    try:
+        msg, image_path = compute()
+
+        result = sm.send(event, msg, image=image_path)
+        result_cache.put(key, msg, result_cache.get_attachment_urls(result), live)
+
+    finally:
+        result_cache.release_lease(key, token)
+
+    return result
+
+
 if __name__ == "__main__":
     for i in range(135, -1, -1):
         lambda_handler({"action": "update_1D", "days_before": i}, None)
@@ -1,14 +1,30 @@
 import os
+import time
 import datetime
-import requests
 import platform
-import numpy as np
-import mojang
+import threading
+from collections import OrderedDict
 
-from typing import Optional, Literal
+from typing import Optional, Literal, TYPE_CHECKING
 
+if TYPE_CHECKING:  # numpy는 그래프를 그릴 때만 불러옴
+    import numpy as np
+
+import cache_key
 import data_manager
 
+PROFILE_TTL = (
+    6 * 3600
+)  # 모장 프로필 캐시 시간 (닉네임 변경을 너무 늦게 알지 않도록 짧게)
+NEGATIVE_TTL = 600  # 없는 닉네임을 캐시하는 시간
+PROFILE_CACHE_SIZE = 2048  # 메모리에 캐시하는 최대 프로필 개수
+
+# {"name|prodays": ({"uuid": ..., "name": ...} 또는 None, 만료 시간)}
+profile_cache = OrderedDict()
+profile_lock = threading.Lock()
+
+mojang_api = None
+
 
 def convert_path(path: str) -> str:
     """
@@ -23,43 +39,68 @@ def convert_path(path: str) -> str:
     return os.path.normpath(system_path)
 
 
+def get_image_path(filename: str = "image.png") -> str:
+    """
+    생성한 이미지를 저장할 경로
+    """
+    if platform.system() == "Linux":
+        return f"/tmp/{filename}"
+
+    return filename
+
+
 def get_ip() -> str:
-    response = requests.get("https://api64.ipify.org?format=json")
+    import http_policy
+
+    response = http_policy.Session("ipify").get("https://api64.ipify.org?format=json")
 
     data = response.json()
 
     return data["ip"]
 
 
-def get_guild_name(guild_id: str) -> str:
-    url = f"https://discord.com/api/v10/guilds/{guild_id}"
+def get_user(name: str) -> Optional[dict]:
+    """
+    닉네임으로 Users 항목 조회
+    없으면 NameHistory에서 이전 닉네임으로 찾음 (모장 API에서 지금 그 닉네임을 다른 플레이어가 쓰고 있으면 None)
+    """
+    data = data_manager.read_data(
+        "Users", "lower_name-index", {"lower_name": name.lower()}
+    )
 
-    headers = {"Authorization": f"Bot {os.getenv('DISCORD_TOKEN')}"}
+    if data:
+        return data[0]
 
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    history = data_manager.read_data(
+        "NameHistory", "lower_name-index", {"lower_name": name.lower()}
+    )
 
-    return data["name"]
+    if not history:
+        return None
 
+    # 여러 명이 같은 닉네임을 썼으면 가장 최근에 바꾼 플레이어
+    latest = max(history, key=lambda x: x["changed_at"])
+    data = data_manager.read_data("Users", condition_dict={"id": latest["id"]})
 
-def get_guild_list() -> list[dict[str, str]]:
-    url = "https://discord.com/api/v10/users/@me/guilds"
+    if not data:
+        return None
 
-    headers = {"Authorization": f"Bot {os.getenv('DISCORD_TOKEN')}"}
+    # 바꾼 닉네임은 다른 플레이어가 가져갈 수 있으므로 모장 API 조회가 실패했거나 uuid가 같을 때만 사용
+    profile = get_profile_from_mc(name=name)
 
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    if profile is not None and profile[name]["uuid"] != data[0]["uuid"]:
+        return None
 
-    return data
+    return data[0]
 
 
 def get_name(
     name: str = "", id: int = 0
 ) -> Optional[str]:  # get_profile으로 대체 Class Profile
     if name:
-        data = data_manager.read_data(
-            "Users", "lower_name-index", {"lower_name": name.lower()}
-        )
+        user = get_user(name)
+
+        return user["name"] if user else None
 
     elif id:
         data = data_manager.read_data("Users", condition_dict={"id": id})
@@ -70,113 +111,227 @@ def get_name(
     return data[0]["name"] if data else None
 
 
-def get_uuid(name: str) -> Optional[str]:
-    data = data_manager.read_data(
-        "Users", "lower_name-index", {"lower_name": name.lower()}
-    )
+def get_names(ids: list[int]) -> dict[int, str]:
+    """
+    여러 id의 닉네임을 한번에 조회
+    {id: name}
+    """
+    ids = list(set(int(i) for i in ids))
 
-    return data[0]["uuid"] if data else None
+    data = data_manager.batch_read_data("Users", [{"id": i} for i in ids])
 
+    return {int(item["id"]): item["name"] for item in data} if data else {}
 
-def get_profile_from_mc(
-    name: str = "", uuid: str = "", names: Optional[list[str]] = None
-) -> Optional[dict[str, dict[str, str]]]:
-    api = mojang.API(retry_on_ratelimit=True, ratelimit_sleep_time=1)
 
-    if name:
-        try:
-            _uuid = api.get_uuid(name)
-        except:
-            return None
-
-        if not _uuid:
-            return None
+def get_uuid(name: str) -> Optional[str]:
+    user = get_user(name)
 
-        try:
-            _name = api.get_username(_uuid)
-        except:
-            return None
+    return user["uuid"] if user else None
 
-        if not _name:
-            return None
 
-        return {name: {"uuid": _uuid, "name": _name}}
+def get_profile_from_mc(
+    name: str = "",
+    uuid: str = "",
+    names: Optional[list[str]] = None,
+    strict: bool = False,
+) -> Optional[dict[str, dict[str, str]]]:
+    """
+    모장 API로 닉네임 <-> uuid 조회
+    조회 결과는 메모리(LRU)와 Profiles 테이블에 캐시, 없는 닉네임도 NEGATIVE_TTL 동안 캐시
+    strict: name 조회에 실패하면 (rate limit, 회로 열림 등) 없는 닉네임(None)과 구분하도록 예외를 그대로 전달
+    """
+    if name:
+        profile = get_cached_profile(
+            "name|" + name.lower(), lambda: fetch_by_name(name), strict
+        )
 
-        # response = requests.get(
-        #     f"https://api.minecraftservices.com/minecraft/profile/lookup/name/{name}"
-        # )
-        # if not "name" in response:
-        #     response = requests.get(
-        #         f"https://api.mojang.com/users/profiles/minecraft/{name}"
-        #     )
+        return {name: profile} if profile else None
 
     elif uuid:
-        try:
-            _name = api.get_username(uuid)
-        except:
-            return None
-
-        if not _name:
-            return None
+        profile = get_cached_profile("uuid|" + uuid, lambda: fetch_by_uuid(uuid))
 
-        try:
-            _uuid = api.get_uuid(_name)
-        except:
-            return None
+        return {profile["uuid"]: profile} if profile else None
 
-        if not _uuid:
-            return None
+    elif names:
+        profiles: dict[str, dict[str, str]] = {}
+        missing = []
 
-        return {_uuid: {"uuid": _uuid, "name": _name}}
+        for _name in names:
+            hit, profile = read_profile_cache("name|" + _name.lower())
 
-        # response = requests.get(
-        #     f"https://api.minecraftservices.com/minecraft/profile/lookup/{uuid}"
-        # )
-        # if not "name" in response:
-        #     response = requests.get(f"https://api.mojang.com/user/profile/{uuid}")
+            if not hit:
+                missing.append(_name)
+            elif profile:
+                profiles[_name] = profile
 
-    elif names:
-        # names를 10개 단위로 나눔
+        # 캐시에 없는 닉네임만 10개 단위로 나눠서 조회
         chunk_size = 10
         chunked_list = [
-            names[i : i + chunk_size] for i in range(0, len(names), chunk_size)
+            missing[i : i + chunk_size] for i in range(0, len(missing), chunk_size)
         ]
 
-        profiles: dict[str, dict[str, str]] = {}
-
         for chunk in chunked_list:
             try:
-                uuids = api.get_uuids(chunk)
+                uuids = get_mojang_api().get_uuids(chunk)
             except:
                 continue
 
-            for _name, _uuid in uuids.items():
-                for __name in names:
-                    if _name.lower() == __name.lower():
-                        profiles[__name] = {"uuid": _uuid, "name": _name}
+            found = {_name.lower(): (_name, _uuid) for _name, _uuid in uuids.items()}
 
-            # response = requests.post(
-            #     "https://api.minecraftservices.com/minecraft/profile/lookup/bulk/byname",
-            #     json=chunk,
-            # )
+            for __name in chunk:
+                if __name.lower() in found:
+                    _name, _uuid = found[__name.lower()]
+                    profiles[__name] = {"uuid": _uuid, "name": _name}
+                    write_profile_cache(profiles[__name])
+                else:
+                    write_profile_cache(None, "name|" + __name.lower())
 
-            # data = response.json()
+        return profiles
 
-            # if len(data) != len(chunk):
-            #     data.extend([{}] * (len(chunk) - len(data)))
 
-            # profiles.extend(data)
+def get_mojang_api():
+    """
+    모장 API 클라이언트 (컨테이너에서 하나만 만들어서 재사용)
+    """
+    global mojang_api
 
-        return profiles
+    if mojang_api is None:
+        import mojang
+        import http_policy
+
+        # rate limit은 http_policy에서 정해진 횟수만 다시 시도 (계속 기다리지 않음)
+        mojang_api = mojang.API(session=http_policy.Session("mojang"))
+
+    return mojang_api
+
+
+def fetch_by_name(name: str) -> Optional[dict[str, str]]:
+    """
+    없는 닉네임이면 None, API 오류는 예외
+    """
+    from mojang.errors import NotFound
+
+    api = get_mojang_api()
+
+    try:
+        _uuid = api.get_uuid(name)
+        _name = api.get_username(_uuid) if _uuid else None
+    except NotFound:
+        return None
+
+    return {"uuid": _uuid, "name": _name} if _uuid and _name else None
+
+
+def fetch_by_uuid(uuid: str) -> Optional[dict[str, str]]:
+    from mojang.errors import NotFound
+
+    api = get_mojang_api()
+
+    try:
+        _name = api.get_username(uuid)
+        _uuid = api.get_uuid(_name) if _name else None
+    except NotFound:
+        return None
+
+    return {"uuid": _uuid, "name": _name} if _uuid and _name else None
+
+
+def get_cached_profile(
+    key: str, fetch, strict: bool = False
+) -> Optional[dict[str, str]]:
+    """
+    캐시에서 key의 프로필을 찾고, 없으면 fetch()로 조회해서 저장
+    """
+    hit, profile = read_profile_cache(key)
+
+    if hit:
+        return profile
 
-    # return response.json() if response.status_code == 200 else None
+    try:
+        profile = fetch()
+    except:  # 조회 실패는 없는 닉네임과 다르므로 캐시하지 않음
+        if strict:
+            raise
+
+        return None
+
+    write_profile_cache(profile, key)
+
+    return profile
+
+
+def read_profile_cache(key: str) -> tuple[bool, Optional[dict[str, str]]]:
+    """
+    (캐시에 있는지, 프로필) 없는 닉네임이 캐시되어 있으면 (True, None)
+    """
+    now = time.time()
+
+    with profile_lock:
+        cached = profile_cache.get(key)
+
+        if cached is not None:
+            if cached[1] > now:
+                profile_cache.move_to_end(key)
+                return True, cached[0]
+
+            del profile_cache[key]
+
+    try:
+        item = data_manager.get_table("Profiles").get_item(Key={"key": key}).get("Item")
+    except Exception as e:  # 캐시를 못 읽으면 모장 API로 조회
+        print(f"프로필 캐시 읽기 실패: {e}")
+        return False, None
+
+    # TTL로 지워지기 전의 만료된 항목은 무시
+    if item is None or int(item["expires_at"]) <= now:
+        return False, None
+
+    profile = {"uuid": item["uuid"], "name": item["name"]} if "uuid" in item else None
+    remember_profile(key, profile, int(item["expires_at"]))
+
+    return True, profile
+
+
+def write_profile_cache(profile: Optional[dict[str, str]], key: str = "") -> None:
+    """
+    profile을 닉네임, uuid 양쪽 키로 저장, profile이 None이면 key에 없는 프로필로 저장
+    """
+    now = int(time.time())
+
+    if profile is None:
+        items = [{"key": key, "expires_at": now + NEGATIVE_TTL}]
+    else:
+        items = [
+            dict(profile, key=k, expires_at=now + PROFILE_TTL)
+            for k in ["name|" + profile["name"].lower(), "uuid|" + profile["uuid"]]
+        ]
+        if key and key not in [i["key"] for i in items]:
+            items.append(dict(profile, key=key, expires_at=now + PROFILE_TTL))
+
+    for item in items:
+        remember_profile(item["key"], profile, item["expires_at"])
+
+    try:
+        for item in items:
+            data_manager.write_data("Profiles", item)
+    except Exception as e:
+        print(f"프로필 캐시 저장 실패: {e}")
+
+
+def remember_profile(key: str, profile: Optional[dict[str, str]], expires_at) -> None:
+    with profile_lock:
+        profile_cache[key] = (profile, expires_at)
+        profile_cache.move_to_end(key)
+
+        while len(profile_cache) > PROFILE_CACHE_SIZE:
+            profile_cache.popitem(last=False)
 
 
 def get_id(name: str = "", uuid: str = "") -> Optional[int]:
     if name:
-        data = data_manager.read_data(
-            "Users", "lower_name-index", {"lower_name": name.lower()}
-        )
+        user = get_user(name)
+
+        return int(user["id"]) if user else None
 
     elif uuid:
         data = data_manager.read_data("Users", "uuid-index", {"uuid": uuid})
@@ -199,10 +354,9 @@ def get_max_id() -> int:  # id -> uuid로 변경
 
 
 def get_main_slot(name: str) -> Optional[int]:
-    data = data_manager.read_data(
-        "Users", "lower_name-index", {"lower_name": name.lower()}
-    )
-    return int(data[0]["mainSlot"]) if data else None
+    user = get_user(name)
+
+    return int(user["mainSlot"]) if user else None
 
 
 def convert_job(job: int | str) -> Optional[str]:
@@ -229,14 +383,7 @@ def convert_job(job: int | str) -> Optional[str]:
 
 
 def get_today(days_before=0) -> datetime.date:
-    kst_now = (
-        datetime.datetime.now(datetime.UTC)
-        + datetime.timedelta(hours=9)
-        - datetime.timedelta(days=days_before)
-    )
-    today_kst = kst_now.date()
-
-    return today_kst
+    return cache_key.get_today(days_before)
 
 
 def get_today_from_input(day: Optional[str]) -> datetime.date | Literal[-1, -2]:
@@ -244,62 +391,44 @@ def get_today_from_input(day: Optional[str]) -> datetime.date | Literal[-1, -2]:
     -1: 날짜 입력이 올바르지 않음
     -2: 미래 날짜
     today: datetime.date
-    """
-    # YYYY-MM-DD, MM-DD, DD, -1, ...
-    try:
-        todayR = get_today()
-
-        if day:
-            if day[0] == "-" and day[1:].isdigit():
-                date = int(day[1:])
-                today = todayR - datetime.timedelta(days=date)
-
-            else:
-                date_type = day.count("-")
-                today_list = str(todayR).split("-")
-
-                if date_type == 0:  # 날짜만
-                    day = "-".join(today_list[:2]) + "-" + day
-
-                if date_type == 1:
-                    day = today_list[0] + "-" + day
-
-                today = datetime.datetime.strptime(day, "%Y-%m-%d").date()
-
-        else:
-            today = todayR
-
-    except:
-        return -1
-
-    if today > todayR:
-        return -2
 
-    return today
+    결과 캐시 키와 같은 규칙을 쓰도록 cache_key.parse_date 사용
+    """
+    return cache_key.parse_date(day)
 
 
-def pchip_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+def pchip_slopes(x: "np.ndarray", y: "np.ndarray") -> "np.ndarray":
     """
     (x, y)가 주어졌을 때, 각 x[i]에서의 접선 기울기 m[i]를
     Fritsch-Carlson 방법에 따라 계산하여 반환합니다.
+    y가 (n, k) 배열이면 k개의 열을 한번에 계산합니다.
     """
+    import numpy as np
+
     n = len(x)
-    m = np.zeros(n)
+    m = np.zeros(y.shape)
+
+    # x 간격을 y의 열 방향으로 늘려서 계산
+    col = (slice(None),) + (None,) * (y.ndim - 1)
 
     # 1) h, delta 계산
-    h = np.diff(x)  # 길이 n-1
-    delta = np.diff(y) / h  # 길이 n-1
+    h = np.diff(x)[col]  # 길이 n-1
+    delta = np.diff(y, axis=0) / h  # 길이 n-1
 
     # 내부 점(1 ~ n-2)에 대한 기울기 계산
-    for i in range(1, n - 1):
-        if delta[i - 1] * delta[i] > 0:  # 부호가 같을 때만 보정
-            w1 = 2 * h[i] + h[i - 1]
-            w2 = h[i] + 2 * h[i - 1]
-            m[i] = (w1 + w2) / (w1 / delta[i - 1] + w2 / delta[i])
-        else:
-            # 만약 delta[i-1]과 delta[i] 부호가 다르거나
-            # 하나라도 0이면 모노토닉 유지 위해 기울기 0
-            m[i] = 0.0
+    if n > 2:
+        w1 = 2 * h[1:] + h[:-1]
+        w2 = h[1:] + 2 * h[:-1]
+
+        # 부호가 같을 때만 보정
+        # 만약 delta[i-1]과 delta[i] 부호가 다르거나
+        # 하나라도 0이면 모노토닉 유지 위해 기울기 0
+        same_sign = delta[:-1] * delta[1:] > 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slopes = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+
+        m[1:-1] = np.where(same_sign, slopes, 0.0)
 
     # 양 끝점 기울기 (여기서는 간단히 1차 근사로 계산)
     m[0] = delta[0]
@@ -308,13 +437,20 @@ def pchip_slopes(x: np.ndarray, y: np.ndarray) -> np.ndarray:
     return m
 
 
-def pchip_interpolate(x: np.ndarray, y: np.ndarray, x_new: np.ndarray) -> np.ndarray:
+def pchip_interpolate(
+    x: "np.ndarray", y: "np.ndarray", x_new: "np.ndarray"
+) -> "np.ndarray":
     """
     x, y 데이터를 PCHIP 방식으로 보간하여,
     새로 주어진 x_new에서의 보간값을 반환합니다.
+    y가 (n, k) 배열이면 k개의 열을 한번에 보간해서 (len(x_new), k) 배열을 반환합니다.
     """
+    import numpy as np
+
     # y를 float으로 변환
+    x = np.array(x, dtype=float)
     y = np.array(y, dtype=float)
+    x_new = np.asarray(x_new, dtype=float)
 
     # 길이 확인
     if len(x) != len(y):
@@ -325,43 +461,73 @@ def pchip_interpolate(x: np.ndarray, y: np.ndarray, x_new: np.ndarray) -> np.nda
     # 각 점에서의 기울기 계산
     m = pchip_slopes(x, y)
 
-    # 보간결과를 담을 배열
-    y_new = np.zeros_like(x_new, dtype=float)
-
-    # 구간별로 x_new를 찾아가며 보간
-    # 각 x_new[i]에 대해 어느 구간에 속하는지를 찾아서
+    # 각 x_new가 속하는 구간을 한번에 찾아서
     # 해당 구간의 3차 Hermite 다항식을 이용해 계산
-    for i, xn in enumerate(x_new):
-        # xn이 어느 구간에 속하는지 찾기
-        if xn <= x[0]:
-            # 범위 밖이면, 여기서는 그냥 가장 왼쪽 값으로 extrapolation
-            y_new[i] = y[0]
-            continue
-        elif xn >= x[-1]:
-            # 범위 밖이면, 여기서는 가장 오른쪽 값으로 extrapolation
-            y_new[i] = y[-1]
-            continue
-        else:
-            idx = np.searchsorted(x, xn) - 1
-
-            x0, x1 = x[idx], x[idx + 1]
-            y0, y1 = y[idx], y[idx + 1]
-            m0, m1 = m[idx], m[idx + 1]
-            h = x1 - x0
-            t = (xn - x0) / h
-
-            a = y0
-            b = m0
-            c = (3 * (y1 - y0) / h - 2 * m0 - m1) / h
-            d = (m0 + m1 - 2 * (y1 - y0) / h) / (h**2)
-
-            val = a + b * (t * h) + c * (t * h) ** 2 + d * (t * h) ** 3
-
-            y_new[i] = val
+    idx = np.clip(np.searchsorted(x, x_new) - 1, 0, len(x) - 2)
+
+    x0, x1 = x[idx], x[idx + 1]
+    y0, y1 = y[idx], y[idx + 1]
+    m0, m1 = m[idx], m[idx + 1]
+    col = (slice(None),) + (None,) * (y.ndim - 1)
+    h = (x1 - x0)[col]
+    s = (x_new - x0)[col]
+
+    a = y0
+    b = m0
+    c = (3 * (y1 - y0) / h - 2 * m0 - m1) / h
+    d = (m0 + m1 - 2 * (y1 - y0) / h) / (h**2)
+
+    y_new = a + b * s + c * s**2 + d * s**3
+
+    # 범위 밖이면 가장 왼쪽 / 오른쪽 값으로 extrapolation
+    y_new = np.where((x_new <= x[0])[col], y[0], y_new)
+    y_new = np.where((x_new >= x[-1])[col], y[-1], y_new)
 
     return y_new
 
 
+def lttb_indices(x: "np.ndarray", y: "np.ndarray", threshold: int) -> "np.ndarray":
+    """
+    Largest-Triangle-Three-Buckets 다운샘플링
+    그래프 모양을 유지하면서 남길 점 threshold개의 인덱스를 반환합니다.
+    (처음과 마지막 점은 항상 포함)
+    """
+    import numpy as np
+
+    n = len(x)
+
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # 처음과 마지막을 제외한 점들을 threshold - 2개의 구간으로 나눔
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    indices = np.zeros(threshold, dtype=int)
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # 다음 구간의 평균점
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+
+        # 이전에 선택한 점, 평균점과 만드는 삼각형 넓이가 가장 큰 점 선택
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+
 def get_exp_data():
     data = [0] + [int(100 * 1.02**i) for i in range(0, 300)]
     return data
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import platform
+import threading
+from io import BytesIO
+from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+import misc
+import http_policy
+
+HEAD_URL = "https://mineskin.eu/helm/{}/100.png"
+HEAD_SIZE = 80
+HEAD_TTL = 60 * 60 * 24  # 하루 지나면 서버에 변경 여부 확인
+MAX_WORKERS = 8
+MAX_MEMORY_HEADS = 500
+
+if platform.system() == "Linux":
+    cache_dir = misc.convert_path("\\tmp\\player_heads")
+else:
+    cache_dir = misc.convert_path("assets\\player_heads")
+
+# 시간 제한, 재시도, 회로 차단은 http_policy (실패하면 캐시된 이미지나 기본 이미지 사용)
+session = http_policy.Session("mineskin", pool_size=MAX_WORKERS)
+
+# key: (이미지, 받아온 시간, {"etag": ..., "last_modified": ...})
+memory_cache: OrderedDict[str, tuple[Image.Image, float, dict]] = OrderedDict()
+lock = threading.Lock()
+
+placeholder = Image.new("RGB", (HEAD_SIZE, HEAD_SIZE), (200, 200, 200))
+
+
+def get_heads(players: list[Optional[str]]) -> list[Image.Image]:
+    """
+    플레이어 머리 이미지 목록 반환 (HEAD_SIZE x HEAD_SIZE)
+    players: 닉네임 또는 uuid (닉네임을 찾지 못한 None은 기본 이미지)
+    TTL 안에 받아온 이미지는 네트워크 요청 없이 캐시에서 바로 반환
+    """
+    heads: list[Optional[Image.Image]] = [None] * len(players)
+    missing: dict[str, list[int]] = {}
+
+    for i, player in enumerate(players):
+        if not player:
+            heads[i] = placeholder
+            continue
+
+        key = player.lower()
+        head = _load(key)
+
+        if head is not None and time.time() - head[1] < HEAD_TTL:
+            heads[i] = head[0]
+        else:
+            missing.setdefault(key, []).append(i)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(missing))) as pool:
+            results = pool.map(_fetch, missing.keys())
+
+            for key, image in zip(missing.keys(), results):
+                for i in missing[key]:
+                    heads[i] = image
+
+    return heads  # type: ignore
+
+
+def _load(key: str) -> Optional[tuple[Image.Image, float, dict]]:
+    """
+    메모리 -> 디스크 순서로 캐시된 머리 이미지 확인
+    """
+    with lock:
+        if key in memory_cache:
+            memory_cache.move_to_end(key)
+            return memory_cache[key]
+
+    image_path, meta_path = _get_paths(key)
+
+    if not (os.path.exists(image_path) and os.path.exists(meta_path)):
+        return None
+
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+
+        image = Image.open(image_path)
+        image.load()
+    except:
+        return None
+
+    head = (image, meta.pop("fetched_at"), meta)
+    _remember(key, head)
+
+    return head
+
+
+def _fetch(key: str) -> Image.Image:
+    """
+    캐시가 만료되었거나 없는 머리 이미지를 받아옴
+    캐시가 있으면 조건부 요청으로 변경 여부만 확인하고, 실패하면 기존 이미지나 기본 이미지를 반환
+    """
+    cached = _load(key)
+
+    headers = {}
+    if cached is not None:
+        if cached[2].get("etag"):
+            headers["If-None-Match"] = cached[2]["etag"]
+        if cached[2].get("last_modified"):
+            headers["If-Modified-Since"] = cached[2]["last_modified"]
+
+    try:
+        response = session.get(HEAD_URL.format(key), headers=headers)
+
+        if response.status_code == 304 and cached is not None:
+            _store(key, cached[0], cached[2], write_image=False)
+            return cached[0]
+
+        response.raise_for_status()
+
+        image = Image.open(BytesIO(response.content))
+        image = image.resize((HEAD_SIZE, HEAD_SIZE))
+    except:
+        return cached[0] if cached is not None else placeholder
+
+    meta = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    _store(key, image, meta)
+
+    return image
+
+
+def _store(key: str, image: Image.Image, meta: dict, write_image=True) -> None:
+    _remember(key, (image, time.time(), meta))
+
+    image_path, meta_path = _get_paths(key)
+
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        if write_image:
+            image.save(image_path)
+
+        with open(meta_path, "w") as f:
+            json.dump({"fetched_at": time.time(), **meta}, f)
+    except OSError:  # 디스크 캐시는 실패해도 메모리 캐시로 동작
+        pass
+
+
+def _remember(key: str, head: tuple[Image.Image, float, dict]) -> None:
+    with lock:
+        memory_cache[key] = head
+        memory_cache.move_to_end(key)
+
+        while len(memory_cache) > MAX_MEMORY_HEADS:
+            memory_cache.popitem(last=False)
+
+
+def _get_paths(key: str) -> tuple[str, str]:
+    return (
+        os.path.join(cache_dir, f"{key}.png"),
+        os.path.join(cache_dir, f"{key}.json"),
+    )
+
+
+if __name__ == "__main__":
+    # print(get_heads(["prodays", "steve"]))
+    pass
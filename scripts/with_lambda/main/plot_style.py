@@ -0,0 +1,33 @@
+import platform
+
+import matplotlib
+import matplotlib.pyplot as plt
+import matplotlib.font_manager as fm
+
+import misc
+
+initialized = False
+
+
+def setup() -> None:
+    """
+    matplotlib 백엔드, 스타일, 한글 폰트 설정
+    여러 모듈에서 호출해도 프로세스당 한 번만 실행됨
+    """
+    global initialized
+
+    if initialized:
+        return
+
+    matplotlib.use("Agg")
+
+    plt.style.use("seaborn-v0_8-pastel")
+    if platform.system() == "Linux":
+        font_path = "/opt/NanumSquareRoundEB.ttf"
+    else:
+        font_path = misc.convert_path("assets\\fonts\\NanumSquareRoundEB.ttf")
+    fm.fontManager.addfont(font_path)
+    prop = fm.FontProperties(fname=font_path)
+    plt.rcParams["font.family"] = prop.get_name()
+
+    initialized = True
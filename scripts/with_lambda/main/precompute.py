@@ -0,0 +1,145 @@
+import datetime
+import traceback
+
+import misc
+import send_msg as sm
+import result_cache
+import player_head
+
+RANK_PAGES = [[start, start + 9] for start in range(1, 101, 10)]  # 1..10 ~ 91..100
+HISTORY_PERIOD = 7
+
+
+def precompute(event, day: datetime.date) -> None:
+    """
+    update_1D 직후 day(어제) 기준으로 자주 조회되는 결과를 미리 만들어서 결과 캐시에 저장
+    - /랭킹 랭킹범위: 1..10 ~ 91..100
+    - /랭킹 기간: 7
+    - /유저분포
+    - 상위 100명의 머리 이미지
+
+    matplotlib은 스레드에서 안전하지 않고 이미지 파일 경로도 겹치기 때문에 하나씩 그림
+    """
+    import get_rank_info as gri
+    import get_level_distribution as gld
+
+    date_str = day.strftime("%Y-%m-%d")
+
+    views = []
+    for _range in RANK_PAGES:
+        views.append(
+            (
+                make_body(
+                    "랭킹", {"랭킹범위": f"{_range[0]}..{_range[1]}", "날짜": date_str}
+                ),
+                lambda _range=_range: gri.get_rank_info(_range, day),
+            )
+        )
+
+    views.append(
+        (
+            make_body("랭킹", {"기간": HISTORY_PERIOD, "날짜": date_str}),
+            lambda: gri.get_rank_history([1, 10], HISTORY_PERIOD, day),
+        )
+    )
+    views.append(
+        (
+            make_body("유저분포", {"날짜": date_str}),
+            lambda: gld.get_level_distribution(day),
+        )
+    )
+
+    failed = render_views(views, False)
+
+    try:
+        data = gri.get_rank_data(day)
+        if data:
+            player_head.get_heads([d["name"] for d in data if d["name"]])
+
+    except Exception:
+        print(traceback.format_exc())
+        failed.append("player_head")
+
+    if failed:
+        sm.send_log(5, event, "결과 미리 만들기 실패: " + ", ".join(failed))
+
+
+def precompute_live(event) -> None:
+    """
+    날짜 없이 조회한 /랭킹은 오늘(실시간) 랭킹이라 어제 기준으로 미리 만든 결과와 키가 다름
+    기본 /랭킹과 /랭킹 기간: 7의 결과가 없거나 만료됐으면 오늘 기준으로 다시 만들어서 LIVE_TTL 동안 저장
+    update_1D 직후와 warmup에서 호출 (스케줄러가 LIVE_TTL보다 자주 호출하면 기본 /랭킹은 항상 캐시에서 응답)
+    """
+    import get_rank_info as gri
+
+    day = misc.get_today()
+
+    views = [
+        (
+            make_body("랭킹", {}),
+            lambda: gri.get_rank_info([1, 10], day),
+        ),
+        (
+            make_body("랭킹", {"기간": HISTORY_PERIOD}),
+            lambda: gri.get_rank_history([1, 10], HISTORY_PERIOD, day),
+        ),
+    ]
+
+    views = [
+        (body, compute)
+        for body, compute in views
+        if result_cache.get(result_cache.get_cache_key(body)) is None
+    ]
+
+    failed = render_views(views, True)
+
+    if failed:
+        sm.send_log(5, event, "실시간 결과 미리 만들기 실패: " + ", ".join(failed))
+
+
+def render_views(views: list, live: bool) -> list[str]:
+    """
+    views: [(명령어 body, 결과를 만드는 함수), ...]
+    결과를 만들어서 결과 캐시에 저장하고 실패한 키 목록을 반환
+    이미지를 올릴 저장 채널이 없으면 만들지 않음
+    """
+    if not sm.STORAGE_CHANNEL_ID:
+        print("DISCORD_STORAGE_CHANNEL_ID가 없어서 결과를 미리 만들지 않음")
+        return []
+
+    failed = []
+    for body, compute in views:
+        key = result_cache.get_cache_key(body)
+
+        try:
+            msg, image_path = compute()
+            if not msg:
+                raise Exception("empty result")
+
+            image_urls = sm.upload_images(image_path) if image_path else []
+            if image_urls is None:
+                raise Exception("image upload failed")
+
+            result_cache.put(key, msg, image_urls, live)
+
+        except Exception:
+            print(traceback.format_exc())
+            failed.append(key)
+
+    print(f"미리 만든 결과: {len(views) - len(failed)}/{len(views)}")
+
+    return failed
+
+
+def make_body(cmd: str, options: dict) -> dict:
+    """
+    result_cache.get_cache_key에 넘길 명령어 body
+    """
+    return {
+        "data": {
+            "name": cmd,
+            "options": [
+                {"name": name, "value": value} for name, value in options.items()
+            ],
+        }
+    }
@@ -0,0 +1,355 @@
+import json
+import time
+import uuid
+import zlib
+import heapq
+import bisect
+import datetime
+import threading
+from decimal import Decimal
+from typing import Optional
+
+import misc
+import data_manager
+import register_player
+
+LIVE_TTL = 300  # 실시간 랭킹을 다시 계산하는 간격 (초)
+MIN_PAGE_SIZE = 20  # 슬롯별로 한 번에 읽는 최소 행 개수
+PAST_CACHE_SIZE = 8  # 컨테이너에 캐시하는 지난 날짜 인덱스 개수
+
+# {days_before: (만든 시간, RankIndex)}
+live_indexes = {}
+# {날짜: RankIndex}, 더 이상 바뀌지 않는 날짜만 저장
+past_indexes = {}
+lock = threading.Lock()
+
+
+class RankIndex:
+    """
+    한 날짜의 전체 캐릭터를 레벨 내림차순으로 정렬한 순서 통계 구조
+    순위 = 정렬된 위치 + 1, (id, 슬롯)의 순위는 O(1), 레벨의 순위는 이진 탐색 O(log n)
+
+    entries: [{"id": 1, "slot": 1, "level": Decimal, "job": ..., "name": ...}, ...]
+    """
+
+    def __init__(self, entries: list[dict]):
+        # 같은 레벨이면 입력 순서 유지 (sorted는 안정 정렬)
+        self.entries = sorted(entries, key=lambda x: x["level"], reverse=True)
+        self.neg_levels = [-float(e["level"]) for e in self.entries]
+        self.positions = {
+            (int(e["id"]), int(e["slot"])): i for i, e in enumerate(self.entries)
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def top(self, count: int) -> list[dict]:
+        # 캐시된 인덱스가 바뀌지 않도록 복사해서 반환
+        return [dict(e) for e in self.entries[:count]]
+
+    def window(self, start: int, end: int) -> list[dict]:
+        """
+        start위 ~ end위 (1부터 시작)
+        """
+        return [dict(e) for e in self.entries[start - 1 : end]]
+
+    def rank(self, _id: int, slot: int) -> Optional[int]:
+        """
+        캐릭터의 순위, 그 날짜에 데이터가 없으면 None
+        """
+        position = self.positions.get((int(_id), int(slot)))
+
+        return position + 1 if position is not None else None
+
+    def rank_of_level(self, level: float) -> int:
+        """
+        level이 몇 위에 해당하는지 (같은 레벨이 있으면 그 중 가장 높은 순위)
+        """
+        return bisect.bisect_left(self.neg_levels, -float(level)) + 1
+
+    def percentile(self, rank: int) -> float:
+        """
+        상위 몇 %인지
+        """
+        return rank / len(self.entries) * 100
+
+
+def get_index(day: datetime.date) -> RankIndex:
+    """
+    day의 랭킹 인덱스, 오늘이면 실시간 랭킹
+    """
+    if day == misc.get_today():
+        return get_live_index()
+
+    return get_past_index(day.strftime("%Y-%m-%d"))
+
+
+def get_window(day: datetime.date, _range: list[int]) -> Optional[list[dict]]:
+    """
+    day의 _range[0]위 ~ _range[1]위 캐릭터, 데이터가 없으면 None
+    [{"rank": 1, "id": 1, "slot": 1, "level": Decimal, "job": ...}, ...]
+
+    지난 날짜는 date-slot-level-index에서 슬롯별로 레벨이 높은 순서대로 나눠 읽고
+    5개 슬롯을 합쳐가며(k-way merge) _range[1]위까지만 읽음
+    """
+    start, end = _range
+
+    if day == misc.get_today():
+        entries = get_live_index().window(start, end)
+        return [dict(e, rank=start + i) for i, e in enumerate(entries)] or None
+
+    date = day.strftime("%Y-%m-%d")
+
+    # 슬롯마다 고르게 나뉘어 있다고 보고 페이지 크기를 정함
+    page_size = max(end // 5 + 1, MIN_PAGE_SIZE)
+
+    merged = heapq.merge(
+        *[iter_partition(date, slot, page_size) for slot in range(5)],
+        key=lambda x: x["level"],
+        reverse=True,
+    )
+
+    window = []
+    for rank, entry in enumerate(merged, 1):
+        if rank > end:
+            break
+
+        if rank >= start:
+            entry["rank"] = rank
+            window.append(entry)
+
+    return window or None
+
+
+def iter_partition(date: str, slot: int, page_size: int):
+    """
+    date의 slot번 슬롯 캐릭터를 레벨 내림차순으로 하나씩 반환 (필요할 때 다음 페이지를 읽음)
+    """
+    cursor = None
+
+    while True:
+        items, cursor = data_manager.read_page(
+            "DailyData",
+            "date-slot-level-index",
+            {"date-slot": f"{date}#{slot}"},
+            limit=page_size,
+            cursor=cursor,
+            reverse=True,
+        )
+
+        for d in items:
+            yield {
+                "id": int(d["id"]),
+                "job": int(d["job"]),
+                "level": d["level"],
+                "slot": slot + 1,
+            }
+
+        if cursor is None:
+            return
+
+
+def get_live_index(days_before=0) -> RankIndex:
+    """
+    등록된 모든 플레이어의 실시간 레벨로 만든 랭킹 인덱스
+    오늘 랭킹(days_before=0)은 LIVE_TTL 동안 캐시해서 여러 명령어가 같이 사용
+    """
+    if days_before != 0:
+        return RankIndex(get_live_entries(days_before))
+
+    with lock:
+        cached = live_indexes.get(days_before)
+
+        if cached is None or time.time() - cached[0] > LIVE_TTL:
+            cached = (time.time(), RankIndex(get_live_entries(days_before)))
+            live_indexes[days_before] = cached
+
+    return cached[1]
+
+
+def get_live_entries(days_before=0) -> list[dict]:
+    """
+    전날 DailyData의 캐릭터 목록과 직업에 실시간 레벨을 합침
+    """
+    # get_character_info가 이 모듈을 불러오므로 (순환 import) 사용할 때 불러옴
+    import get_character_info as gci
+
+    today = misc.get_today(days_before + 1)
+    today_str = today.strftime("%Y-%m-%d")
+
+    players = register_player.get_registered_players()
+
+    entries = []
+
+    for player in players:
+        playerdata = data_manager.read_data(
+            "DailyData",
+            None,
+            {"id": player["id"], "date-slot": [f"{today_str}#0", f"{today_str}#4"]},
+        )
+        if playerdata is None:
+            continue
+
+        name = player["name"]
+
+        # 실시간 레벨은 플레이어마다 한 번만 조회
+        levels = gci.get_current_character_data(name, days_before)
+
+        if not levels:
+            continue
+
+        for i in range(5):
+            entries.append(
+                {
+                    "id": int(playerdata[i]["id"]),
+                    "name": name,
+                    "job": misc.convert_job(playerdata[i]["job"]),
+                    "level": levels[i]["level"],
+                    "slot": i + 1,
+                }
+            )
+
+    return entries
+
+
+def get_past_index(date: str) -> RankIndex:
+    """
+    지난 날짜의 랭킹 인덱스
+    update_1D에서 Registry 테이블에 저장해둔 순위를 한 번에 읽음
+    저장되지 않은 날짜는 DailyData에서 만들고, 어제보다 전 날짜면 다음에 바로 읽도록 저장
+
+    어제 데이터는 update_1D가 끝나기 전이면 일부만 있을 수 있으므로
+    저장된 순위나 어제보다 전 날짜의 순위만 컨테이너에 캐시함 (비어있으면 캐시하지 않음)
+    """
+    with lock:
+        cached = past_indexes.get(date)
+
+    if cached is not None:
+        return cached
+
+    entries = load_past_entries(date)
+    final = entries is not None
+
+    if entries is None:
+        entries = read_past_entries(date)
+        final = date < misc.get_today(1).strftime("%Y-%m-%d")
+
+        if entries and final:
+            try:
+                save_past_entries(date, entries)
+            except Exception as e:
+                print(f"{date} 랭킹 인덱스 저장 실패: {e}")
+
+    index = RankIndex(entries)
+
+    if entries and final:
+        with lock:
+            past_indexes[date] = index
+
+            while len(past_indexes) > PAST_CACHE_SIZE:  # 가장 먼저 넣은 날짜부터 삭제
+                del past_indexes[next(iter(past_indexes))]
+
+    return index
+
+
+def save_past_index(day: datetime.date) -> None:
+    """
+    day의 DailyData를 다 쓴 뒤 (update_1D) 전체 순위를 Registry 테이블에 저장
+    """
+    date = day.strftime("%Y-%m-%d")
+
+    save_past_entries(date, read_past_entries(date))
+
+    with lock:
+        past_indexes.pop(date, None)
+
+
+def read_past_entries(date: str) -> list[dict]:
+    """
+    date-slot-level-index에서 슬롯별로 date의 캐릭터를 모두 읽음
+    """
+    entries = []
+
+    for slot in range(5):
+        data = data_manager.read_data(
+            "DailyData",
+            "date-slot-level-index",
+            {"date-slot": f"{date}#{slot}"},
+        )
+
+        for d in data or []:
+            entries.append(
+                {
+                    "id": int(d["id"]),
+                    "job": int(d["job"]),
+                    "level": d["level"],
+                    "slot": slot + 1,
+                }
+            )
+
+    return entries
+
+
+def save_past_entries(date: str, entries: list[dict]) -> None:
+    """
+    레벨 내림차순으로 정렬한 [[id, 슬롯, 레벨, 직업], ...]을 압축해서 조각으로 나눠 저장
+    0번 조각을 마지막에 써서 나머지 조각과 같은 token일 때만 사용
+    """
+    entries = sorted(entries, key=lambda x: x["level"], reverse=True)
+
+    data = zlib.compress(
+        json.dumps(
+            [[e["id"], e["slot"], str(e["level"]), e["job"]] for e in entries],
+            separators=(",", ":"),
+        ).encode()
+    )
+    size = register_player.SNAPSHOT_PART_SIZE
+    chunks = [data[i : i + size] for i in range(0, len(data), size)]
+
+    token = uuid.uuid4().hex
+    table = data_manager.get_table("Registry")
+
+    for i, chunk in enumerate(chunks[1:], 1):
+        table.put_item(
+            Item={"name": f"ranks#{date}", "part": i, "token": token, "data": chunk}
+        )
+
+    table.put_item(
+        Item={
+            "name": f"ranks#{date}",
+            "part": 0,
+            "token": token,
+            "parts": len(chunks),
+            "data": chunks[0],
+        }
+    )
+
+
+def load_past_entries(date: str) -> Optional[list[dict]]:
+    """
+    저장된 순위, 없거나 조각이 맞지 않으면 None
+    """
+    items = data_manager.read_data("Registry", None, {"name": f"ranks#{date}"})
+
+    if items is None:
+        return None
+
+    items = sorted(items, key=lambda x: int(x["part"]))
+    parts = items[: int(items[0].get("parts", 0))]
+
+    if (
+        int(items[0]["part"]) != 0
+        or len(parts) < int(items[0]["parts"])
+        or any(i["token"] != items[0]["token"] for i in parts)
+    ):
+        return None
+
+    try:
+        data = json.loads(zlib.decompress(b"".join(bytes(i["data"]) for i in parts)))
+    except (zlib.error, ValueError) as e:
+        print(f"{date} 랭킹 인덱스를 읽을 수 없음: {e}")
+        return None
+
+    return [
+        {"id": d[0], "slot": d[1], "level": Decimal(d[2]), "job": d[3]} for d in data
+    ]
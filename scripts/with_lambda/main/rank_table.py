@@ -0,0 +1,170 @@
+import platform
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+
+import misc
+import player_head
+
+HEADER_TEXT = ["순위", "닉네임", "레벨", "직업", "변동"]
+HEADER_WIDTHS = [160, 500, 280, 240, 240]
+HEADER_HEIGHT = 100
+ROW_HEIGHT = 100
+MAX_ROWS = 25  # 이미지 한 장에 그릴 최대 행 개수
+UNKNOWN_NAME = "알 수 없음"  # Users에서 닉네임을 찾지 못한 플레이어
+WIDTH = sum(HEADER_WIDTHS)
+
+GRAY = (200, 200, 200)
+BLUE = (160, 200, 255)
+AQUA = (190, 230, 255)
+LIGHT_BLUE = (240, 245, 255)
+
+# 각 열의 시작 x 좌표
+COLUMN_X = [sum(HEADER_WIDTHS[:i]) for i in range(len(HEADER_WIDTHS))]
+
+
+def draw_rank_table(data: dict, image_path: str) -> None:
+    """
+    랭킹 표 이미지 생성
+    data = {"Rank": [...], "Name": [...], "Level": [...], "Job": [...], "Change": [...]}
+
+    배경, 헤더, 격자는 행 개수별로 캐시된 템플릿을 복사해서 쓰고
+    순위, 머리, 닉네임, 레벨, 직업, 변동만 새로 그림
+    """
+    rank_count = len(data["Rank"])
+
+    image = get_template(rank_count).copy()
+    avatar_images = player_head.get_heads(data["Name"])
+
+    for i in range(rank_count):
+        y_offset = HEADER_HEIGHT + i * ROW_HEIGHT
+        text_y_offset = y_offset + 32
+
+        rank = str(data["Rank"][i])
+        level = f"{data['Level'][i]:.1f}"
+        job = (
+            data["Job"][i]
+            if isinstance(data["Job"][i], str)
+            else misc.convert_job(data["Job"][i])
+        )
+
+        # 랭킹 글자수에 따라 위치 조정
+        draw_text(image, (86 - len(rank) * 14, text_y_offset), rank)
+
+        image.paste(avatar_images[i], (COLUMN_X[1] + 12, y_offset + 12))
+        draw_text(
+            image, (COLUMN_X[1] + 124, text_y_offset), data["Name"][i] or UNKNOWN_NAME
+        )
+
+        draw_text(image, (COLUMN_X[2] + 140 - len(level) * 12, text_y_offset), level)
+        draw_text(image, (COLUMN_X[3] + 84, text_y_offset), job)
+
+        change = int(data["Change"][i]) if data["Change"][i] is not None else None
+
+        if change is None:
+            draw_text(image, (COLUMN_X[4] + 74, text_y_offset), "New", "green")
+        elif change == 0:
+            draw_text(image, (COLUMN_X[4] + 110, text_y_offset), "-")
+        elif change > 0:
+            x = COLUMN_X[4] + (66 if change >= 10 else 82)
+            draw_text(image, (x, text_y_offset), f"+{change}", "red")
+        else:
+            x = COLUMN_X[4] + (76 if change <= -10 else 88)
+            draw_text(image, (x, text_y_offset), str(change), "blue")
+
+    image.save(image_path)
+
+
+def draw_text(image: Image.Image, xy: tuple[int, int], text: str, fill="black"):
+    """
+    캐시된 글자 마스크로 텍스트 그리기 (ImageDraw.text와 같은 결과)
+    """
+    mask, offset = get_text_mask(text)
+    image.paste(fill, (xy[0] + offset[0], xy[1] + offset[1]), mask)
+
+
+@lru_cache(maxsize=2048)
+def get_text_mask(text: str) -> tuple[Image.Image, tuple[int, int]]:
+    font = get_font()
+
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+
+    return mask, (left, top)
+
+
+@lru_cache(maxsize=1)
+def get_font() -> ImageFont.FreeTypeFont:
+    if platform.system() == "Linux":
+        return ImageFont.truetype("/opt/NanumSquareRoundEB.ttf", 40)
+
+    return ImageFont.truetype(
+        misc.convert_path("assets\\fonts\\NanumSquareRoundEB.ttf"), 40
+    )
+
+
+@lru_cache(maxsize=8)
+def get_template(rank_count: int) -> Image.Image:
+    """
+    rank_count개의 빈 행이 그려진 표 템플릿
+    """
+    height = ROW_HEIGHT * rank_count + HEADER_HEIGHT + 8
+
+    image = Image.new("RGB", (WIDTH, height), "white")
+    image.paste(get_header(), (0, 0))
+
+    for i in range(rank_count):
+        image.paste(get_row(i % 2), (0, HEADER_HEIGHT + i * ROW_HEIGHT))
+
+    draw = ImageDraw.Draw(image)
+
+    draw.line([(0, 4), (WIDTH, 4)], fill=BLUE, width=8)
+    draw.line([(0, height - 4), (WIDTH, height - 4)], fill=BLUE, width=8)
+    draw.line([(4, 0), (4, height)], fill=BLUE, width=8)
+    draw.line([(WIDTH - 4, 0), (WIDTH - 4, height)], fill=BLUE, width=8)
+
+    return image
+
+
+@lru_cache(maxsize=1)
+def get_header() -> Image.Image:
+    header = Image.new("RGB", (WIDTH, HEADER_HEIGHT + 1), "white")
+    draw = ImageDraw.Draw(header)
+
+    draw.rectangle([(0, 0), (WIDTH, HEADER_HEIGHT)], fill=AQUA)
+
+    x_offset = -10
+    x_list = [34, 110, 90, 66, 68]
+    for i, text in enumerate(HEADER_TEXT):
+        draw.text((x_offset + x_list[i] + 24, 30), text, fill="black", font=get_font())
+        x_offset += HEADER_WIDTHS[i]
+
+    return header
+
+
+@lru_cache(maxsize=2)
+def get_row(parity: int) -> Image.Image:
+    """
+    빈 행 (격자 포함), 홀수 번째 행은 하늘색 배경
+    마지막 줄은 다음 행의 윗줄에 덮임
+    """
+    row = Image.new("RGB", (WIDTH, ROW_HEIGHT + 1), "white")
+    draw = ImageDraw.Draw(row)
+
+    if parity:
+        draw.rectangle([(0, 0), (WIDTH, ROW_HEIGHT)], fill=LIGHT_BLUE)
+
+    for x in COLUMN_X[1:]:
+        draw.line([(x, 0), (x, ROW_HEIGHT)], fill=GRAY, width=1)
+
+    draw.line([(0, 0), (WIDTH, 0)], fill=GRAY, width=1)
+
+    return row
+
+
+if __name__ == "__main__":
+    # draw_rank_table(
+    #     {"Rank": [1], "Name": ["ProDays"], "Level": [100], "Job": [0], "Change": [1]},
+    #     "image.png",
+    # )
+    pass
@@ -1,6 +1,25 @@
+import json
+import time
+import uuid
+import datetime
+import zlib
+import threading
+from typing import Optional
+
 import misc
 import data_manager
 
+SNAPSHOT_TTL = 300  # 컨테이너에 캐시한 플레이어 목록을 다시 읽는 간격 (초)
+SNAPSHOT_PART_SIZE = 300_000  # 스냅샷 항목 하나의 최대 크기 (DynamoDB 항목 최대 400KB)
+
+# 등록할 때마다 스냅샷 전체를 다시 쓰지 않도록 플레이어별 변경 기록을 따로 쓰고
+# update_1D에서 하루 한 번 스냅샷에 합침 (compact_snapshot)
+DELTA_NAME = "players#delta"
+
+# 등록된 플레이어 목록: {"version": 1, "players": {id: {...}}, "loaded_at": 시간}
+snapshot = None
+snapshot_lock = threading.Lock()
+
 
 def register_player(name, slot):
     """
@@ -19,57 +38,338 @@ def register_player(name, slot):
 
     item = data_manager.read_data("Users", "uuid-index", {"uuid": uuid})
 
+    player = {
+        "id": allocate_id() if item is None else int(item[0]["id"]),
+        "name": name,
+        "mainSlot": slot,
+        "uuid": uuid,
+    }
+
+    data_manager.write_data("Users", dict(player, lower_name=name.lower()))
+
+    # Users에는 이미 저장됐으므로 스냅샷 반영이 실패해도 등록은 성공으로 처리
+    # (빠진 플레이어는 update_1D의 compact_snapshot에서 다시 들어감)
+    try:
+        update_snapshot(player)
+    except Exception as e:
+        print(f"플레이어 스냅샷 반영 실패: {e}")
+
+    if item is not None and item[0]["name"] != name:  # 닉네임 변경
+        add_name_history(player["id"], item[0]["name"], name)
+
     if item is None:  # 등록되지 않은 플레이어
-        data_manager.write_data(
-            "Users",
-            {
-                "id": misc.get_max_id() + 1,
-                "name": name,
-                "mainSlot": slot,
-                "uuid": uuid,
-                "lower_name": name.lower(),
-            },
-        )
+        # 카운터가 아직 없으면 count_players에서 처음 셀 때 만듦
+        # 플레이어 수는 표시용이므로 실패해도 등록은 성공으로 처리
+        try:
+            data_manager.increase_counter("user_count", 1)
+        except Exception as e:
+            print(f"플레이어 수 카운터 증가 실패: {e}")
 
         return 1
 
     else:  # 등록된 플레이어 (mainSlot만 변경 or 닉네임 변경)
-        data_manager.write_data(
-            "Users",
-            {
-                "id": item[0]["id"],
-                "name": name,
-                "mainSlot": slot,
-                "uuid": uuid,
-                "lower_name": name.lower(),
-            },
-        )
-
         return 2
 
 
+def allocate_id() -> int:
+    """
+    새 플레이어 id (카운터에서 하나 받음)
+    """
+    return data_manager.increase_counter("user_id", 1, initial=misc.get_max_id)
+
+
 def get_registered_players():
-    items = data_manager.scan_data("Users")
+    """
+    등록된 모든 플레이어 [{"id": 1, "name": "ProDays", "mainSlot": 1, "uuid": "..."}, ...]
+    Registry 테이블의 스냅샷과 그 뒤의 변경 기록을 한 번에 읽고 SNAPSHOT_TTL 동안 캐시함
+    """
+    global snapshot
+
+    with snapshot_lock:
+        if snapshot is None or time.time() - snapshot["loaded_at"] > SNAPSHOT_TTL:
+            loaded = load_snapshot()
+
+            if loaded is None:  # 스냅샷이 없거나 깨짐 -> Users 테이블에서 다시 만듦
+                loaded = rebuild_snapshot()
+
+            for _id, (player, _) in load_deltas().items():
+                loaded["players"][_id] = player
+
+            snapshot = loaded
+
+        players = list(snapshot["players"].values())
+
+    return [dict(player) for player in players]
+
+
+def count_players() -> int:
+    """
+    등록된 플레이어 수 (Counters 테이블의 user_count)
+    """
+    return data_manager.read_counter(
+        "user_count", initial=lambda: len(get_registered_players())
+    )
+
+
+def load_snapshot() -> Optional[dict]:
+    """
+    Registry 테이블의 스냅샷, 없거나 다 쓰이지 않았거나 깨졌으면 None (다시 만들도록)
+    """
+    items = data_manager.read_data("Registry", None, {"name": "players"})
 
     if items is None:
-        return list()
+        return None
+
+    items = sorted(items, key=lambda x: int(x["part"]))
+
+    if int(items[0]["part"]) != 0 or "token" not in items[0]:
+        return None
+
+    token = items[0]["token"]
+    parts = items[: int(items[0]["parts"])]
+
+    # 다른 요청이 쓰는 중이라 조각이 모자라거나, 동시에 쓴 다른 요청의 조각이 섞였으면 사용하지 않음
+    if len(parts) < int(items[0]["parts"]) or any(
+        i.get("token") != token for i in parts
+    ):
+        return None
+
+    try:
+        data = b"".join(bytes(i["data"]) for i in parts)
+        players = {
+            p[0]: {"id": p[0], "name": p[1], "uuid": p[2], "mainSlot": p[3]}
+            for p in json.loads(zlib.decompress(data))
+        }
+    except (zlib.error, ValueError, TypeError, IndexError) as e:
+        print(f"플레이어 스냅샷을 읽을 수 없음: {e}")
+        return None
+
+    return {
+        "version": int(items[0]["version"]),
+        "players": players,
+        "loaded_at": time.time(),
+    }
+
+
+def save_snapshot(players: dict, version: Optional[int]) -> bool:
+    """
+    players를 압축해서 조각으로 나눠 저장
+    version: 읽었던 스냅샷 버전 (처음 만들면 None), 그 사이 다른 요청이 저장했으면 False
+    """
+    from botocore.exceptions import ClientError
+
+    data = zlib.compress(
+        json.dumps(
+            [[p["id"], p["name"], p["uuid"], p["mainSlot"]] for p in players.values()],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+    )
+    chunks = [
+        data[i : i + SNAPSHOT_PART_SIZE]
+        for i in range(0, len(data), SNAPSHOT_PART_SIZE)
+    ] or [b""]
+
+    new_version = (version or 0) + 1
+    # 같은 버전을 읽은 두 요청이 동시에 써도 조각이 섞였는지 알 수 있도록 저장마다 다른 값으로 표시
+    token = uuid.uuid4().hex
+    table = data_manager.get_table("Registry")
+
+    if version is None:
+        condition = {"ConditionExpression": "attribute_not_exists(#version)"}
+    else:
+        condition = {
+            "ConditionExpression": "#version = :version",
+            "ExpressionAttributeValues": {":version": version},
+        }
+    condition["ExpressionAttributeNames"] = {"#version": "version"}
+
+    # 나머지 조각을 먼저 쓰고 0번 조각을 마지막에 조건부로 써서 새 버전을 확정
+    for i, chunk in enumerate(chunks[1:], 1):
+        table.put_item(
+            Item={"name": "players", "part": i, "token": token, "data": chunk}
+        )
+
+    try:
+        table.put_item(
+            Item={
+                "name": "players",
+                "part": 0,
+                "version": new_version,
+                "token": token,
+                "parts": len(chunks),
+                "data": chunks[0],
+            },
+            **condition,
+        )
 
-    for item in items:
-        del item["lower_name"]
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return False
 
-    return items
+        raise
 
+    return True
 
-def is_registered(name):
-    items = data_manager.read_data(
-        "Users", "lower_name-index", {"lower_name": name.lower()}
+
+def read_users() -> dict:
+    """
+    Users 테이블 전체 {id: {"id", "name", "uuid", "mainSlot"}}
+    """
+    items = data_manager.scan_data("Users") or []
+
+    return {
+        int(i["id"]): {
+            "id": int(i["id"]),
+            "name": i["name"],
+            "uuid": i["uuid"],
+            "mainSlot": int(i["mainSlot"]),
+        }
+        for i in items
+    }
+
+
+def get_snapshot_version() -> Optional[int]:
+    """
+    저장된 스냅샷 0번 조각의 버전 (없으면 None)
+    """
+    first = data_manager.read_data("Registry", None, {"name": "players", "part": 0})
+
+    return int(first[0]["version"]) if first else None
+
+
+def rebuild_snapshot() -> dict:
+    """
+    Users 테이블 전체를 읽어서 스냅샷을 새로 만듦
+    """
+    players = read_users()
+
+    # 0번 조각의 버전을 기준으로 덮어씀
+    version = get_snapshot_version()
+
+    try:
+        if save_snapshot(players, version):
+            version = (version or 0) + 1
+    except Exception as e:  # 저장은 못해도 읽은 목록은 사용
+        print(f"플레이어 스냅샷 저장 실패: {e}")
+
+    return {"version": version, "players": players, "loaded_at": time.time()}
+
+
+def update_snapshot(player: dict) -> None:
+    """
+    등록/변경된 플레이어를 변경 기록에 추가 (플레이어마다 항목 하나라 동시에 등록해도 겹치지 않음)
+    """
+    data_manager.write_data(
+        "Registry",
+        {
+            "name": DELTA_NAME,
+            "part": player["id"],
+            "token": uuid.uuid4().hex,
+            "player": [
+                player["id"],
+                player["name"],
+                player["uuid"],
+                player["mainSlot"],
+            ],
+        },
     )
 
-    return items is not None
+    # 이 컨테이너의 목록에도 바로 반영
+    with snapshot_lock:
+        if snapshot is not None:
+            snapshot["players"][player["id"]] = dict(player)
+
+
+def load_deltas() -> dict:
+    """
+    스냅샷에 아직 합쳐지지 않은 변경 기록 {id: (플레이어, token)}
+    """
+    items = data_manager.read_data("Registry", None, {"name": DELTA_NAME})
+
+    deltas = {}
+    for i in items or []:
+        p = i["player"]
+        deltas[int(p[0])] = (
+            {"id": int(p[0]), "name": p[1], "uuid": p[2], "mainSlot": int(p[3])},
+            i["token"],
+        )
+
+    return deltas
+
+
+def compact_snapshot() -> None:
+    """
+    update_1D에서 하루 한 번 Users 테이블로 스냅샷을 다시 만들고 합쳐진 변경 기록을 삭제
+    (변경 기록을 쓰지 못해서 빠진 플레이어도 여기서 다시 들어감)
+
+    변경 기록을 Users보다 먼저 읽으므로 삭제하는 기록은 모두 Users에 반영되어 있고
+    그 사이 다시 쓰인 기록은 token이 달라서 남음
+    다른 요청이 먼저 스냅샷을 저장했으면 아무것도 지우지 않고 다음에 다시 합침
+    """
+    from botocore.exceptions import ClientError
+
+    deltas = load_deltas()
+    players = read_users()
+
+    if not save_snapshot(players, get_snapshot_version()):
+        print("다른 요청이 플레이어 스냅샷을 저장함, 다음에 다시 합침")
+        return
+
+    table = data_manager.get_table("Registry")
+
+    for _id, (_, token) in deltas.items():
+        try:
+            table.delete_item(
+                Key={"name": DELTA_NAME, "part": _id},
+                ConditionExpression="#token = :token",
+                ExpressionAttributeNames={"#token": "token"},
+                ExpressionAttributeValues={":token": token},
+            )
+
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+    invalidate_snapshot()
+
+
+def invalidate_snapshot() -> None:
+    """
+    컨테이너에 캐시한 목록을 버려서 다음에 다시 읽도록 함
+    """
+    global snapshot
+
+    with snapshot_lock:
+        snapshot = None
+
+
+def add_name_history(_id: int, old_name: str, new_name: str) -> None:
+    """
+    NameHistory 테이블에 이전 닉네임 추가 (lower_name-index로 이전 닉네임 검색 가능)
+    """
+    data_manager.write_data(
+        "NameHistory",
+        {
+            "id": _id,
+            "changed_at": datetime.datetime.now(datetime.UTC).isoformat(),
+            "name": old_name,
+            "lower_name": old_name.lower(),
+            "new_name": new_name,
+        },
+    )
+
+
+def get_name_history(_id: int) -> list[str]:
+    """
+    이전 닉네임 목록 (오래된 순서)
+    """
+    items = data_manager.read_data("NameHistory", None, {"id": _id})
+
+    return [i["name"] for i in sorted(items or [], key=lambda x: x["changed_at"])]
 
 
 if __name__ == "__main__":
     # print(register_player("asdf123", 1))
     # print(get_registered_players())
-    # print(is_registered("prodays123"))
     pass
@@ -0,0 +1,161 @@
+import json
+import time
+import uuid
+from typing import Optional
+
+import cache_key
+import data_manager as dm
+
+LIVE_TTL = 600  # 오늘(실시간) 데이터가 포함된 결과
+PAST_TTL = 12 * 3600  # 지난 날짜 결과 (디스코드 첨부파일 URL이 만료되기 전까지)
+
+# 같은 명령어가 동시에 들어오면 리스(lease)를 가진 요청만 계산하고 나머지는 결과를 기다림
+LEASE_TTL = 180  # 계산하는 요청이 죽었을 때 리스가 풀리는 시간
+# 결과를 기다리는 최대 시간, 시간이 초과되면 직접 계산하므로
+# 람다 제한 시간 안에 계산하고 전송할 시간이 남도록 짧게 유지
+WAIT_TIMEOUT = 25
+POLL_INTERVAL = 0.5
+
+
+def get_cache_key(body: dict) -> Optional[str]:
+    """
+    같은 결과가 나오는 명령어는 같은 키를 가짐, 캐시하지 않는 명령어는 None
+    (discord_event_handler와 같은 규칙을 쓰도록 cache_key.get_cache_key 사용)
+    """
+    return cache_key.get_cache_key(body)
+
+
+def get(key: str) -> Optional[dict]:
+    """
+    캐시된 결과 반환: {"cache_key", "content", "image_urls", "expires_at"}
+    만료된 결과는 None (DynamoDB TTL은 바로 삭제되지 않음)
+    """
+    try:
+        data = dm.read_data("ResultCache", condition_dict={"cache_key": key})
+    except Exception as e:  # 캐시 조회 실패는 캐시가 없는 것으로 처리
+        print(f"결과 캐시 조회 실패: {e}")
+        return None
+
+    if data is None or int(data[0]["expires_at"]) < time.time():
+        return None
+
+    return data[0]
+
+
+def put(
+    key: Optional[str], msg: str, image_urls: Optional[list[str]], live: bool
+) -> None:
+    """
+    결과 저장
+    image_urls: 디스코드에 올라간 이미지 URL (메시지 전송에 실패했으면 None)
+    live: 오늘(실시간) 데이터가 포함된 결과인지
+    """
+    if key is None or image_urls is None:
+        return
+
+    item = {
+        "cache_key": key,
+        "content": msg,
+        "image_urls": image_urls,
+        "expires_at": int(time.time()) + (LIVE_TTL if live else PAST_TTL),
+    }
+
+    try:
+        dm.write_data("ResultCache", item)
+    except Exception as e:  # 캐시 저장 실패는 응답에 영향 없음
+        print(f"결과 캐시 저장 실패: {e}")
+
+
+def get_attachment_urls(result: dict) -> Optional[list[str]]:
+    """
+    sm.send의 반환값에서 첨부파일 URL을 꺼냄, 메시지 전송에 실패했으면 None
+    """
+    if result.get("statusCode") != 200:
+        return None
+
+    body = json.loads(result["body"])
+
+    response = body.get("response", {})
+    if "id" not in response:
+        return None
+
+    # 이미지가 여러 메시지로 나눠서 올라갔으면 모든 메시지의 URL (후속 메시지 전송 실패는 None)
+    if "attachments" in body:
+        return body["attachments"]
+
+    return [a["url"] for a in response.get("attachments", [])]
+
+
+def acquire_lease(key: str) -> Optional[str]:
+    """
+    key의 결과를 계산할 권한을 얻음
+    성공하면 release_lease에 넘길 토큰, 다른 요청이 계산 중이면 None
+    리스 테이블에 접근하지 못하면 리스 없이 계산하도록 토큰 반환
+    """
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    token = uuid.uuid4().hex
+    now = int(time.time())
+
+    try:
+        dm.get_table("ResultCache").put_item(
+            Item={
+                "cache_key": "lease|" + key,
+                "token": token,
+                "expires_at": now + LEASE_TTL,
+            },
+            ConditionExpression="attribute_not_exists(cache_key) OR expires_at < :now",
+            ExpressionAttributeValues={":now": now},
+        )
+
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return None
+
+        print(f"리스 획득 실패: {e}")  # 리스 없이 계산
+
+    except BotoCoreError as e:  # 연결 실패, 타임아웃 등
+        print(f"리스 획득 실패: {e}")  # 리스 없이 계산
+
+    return token
+
+
+def release_lease(key: str, token: Optional[str]) -> None:
+    """
+    내가 가진 리스만 삭제 (만료 후 다른 요청이 가져간 리스는 그대로 둠)
+    """
+    if token is None:
+        return
+
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    try:
+        dm.get_table("ResultCache").delete_item(
+            Key={"cache_key": "lease|" + key},
+            ConditionExpression="#token = :token",
+            ExpressionAttributeNames={"#token": "token"},
+            ExpressionAttributeValues={":token": token},
+        )
+
+    except (BotoCoreError, ClientError) as e:  # 해제하지 못한 리스는 LEASE_TTL 후 만료
+        print(f"리스 해제 실패: {e}")
+
+
+def wait_for(key: str) -> Optional[dict]:
+    """
+    다른 요청이 계산 중인 결과를 기다림
+    결과가 저장되면 반환, 리스가 풀렸는데 결과가 없거나 (계산 실패) 시간이 초과되면 None
+    """
+    deadline = time.time() + WAIT_TIMEOUT
+
+    while time.time() < deadline:
+        time.sleep(POLL_INTERVAL)
+
+        cached = get(key)
+        if cached is not None:
+            return cached
+
+        if get("lease|" + key) is None:
+            return get(key)  # 리스 해제 직전에 저장된 결과
+
+    return None
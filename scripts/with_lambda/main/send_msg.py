@@ -1,13 +1,28 @@
 import os
 import json
 import time
-import requests
+import threading
 
-import misc
+import discord_api
 
 LOG_CHANNEL_ID = os.getenv("DISCORD_LOG_CHANNEL_ID")
+# 미리 만든 결과 이미지를 올려두는 채널 (로그 채널과 분리, 없으면 미리 만든 결과를 저장하지 않음)
+STORAGE_CHANNEL_ID = os.getenv("DISCORD_STORAGE_CHANNEL_ID")
 ADMIN_ID = os.getenv("DISCORD_ADMIN_ID")
-DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+
+MAX_EMBEDS = 10  # 메시지 하나에 넣을 수 있는 최대 임베드 개수
+MAX_FILES = 10  # 메시지 하나에 넣을 수 있는 최대 파일 개수
+MAX_UPLOAD_BYTES = 8 * 1024 * 1024  # 메시지 하나에 첨부할 수 있는 파일 용량 합
+MAX_EMBED_CHARS = 6000  # 메시지 하나의 임베드 글자 수 합 제한
+MAX_FIELD_CHARS = 1024  # 필드 값 글자 수 제한
+DIGEST_FIELDS = 5  # 묶은 로그 임베드 하나의 필드 개수 (5 * 1024 < 6000)
+FLUSH_INTERVAL = 2  # 백그라운드 스레드가 로그를 보내는 간격 (초)
+
+log_queue = []  # [{"embed": {...}, "mention": bool, "files": [(파일 이름, 데이터)]}]
+digest = []  # 6번 로그 (플레이어 등록 / 업데이트) 한 줄씩
+log_lock = threading.Condition()
+send_lock = threading.Lock()  # 큐에서 꺼낸 로그를 다 보낼 때까지 잡고 있음
+log_thread = None
 
 
 def send(event, msg, image=None, log_type=1, error=None):
@@ -17,34 +32,51 @@ def send(event, msg, image=None, log_type=1, error=None):
     payload = {"content": msg}
 
     if image:
-        with open(image, "rb") as f:
-            file_data = f.read()
+        # 원래 응답을 수정해서 이미지를 붙임 (send_progress로 보낸 메시지도 그대로 교체됨)
+        # 이미지 용량 합이 업로드 제한을 넘으면 나머지는 후속 메시지로 보냄
+        groups = group_images(image)
 
-        url = f"https://discord.com/api/v10/webhooks/{os.getenv('DISCORD_APP_ID')}/{interaction_token}"
-        multipart_data = {
-            "payload_json": (None, json.dumps(payload), "application/json"),
-            "file": (image, file_data, "application/octet-stream"),
-        }
+        path = f"/webhooks/{os.getenv('DISCORD_APP_ID')}/{interaction_token}/messages/@original"
+        multipart_data = get_multipart_data(payload, groups[0])
 
-        response = requests.post(url, files=multipart_data)
+        response = discord_api.request("PATCH", path, auth=False, files=multipart_data)
+        response_json = response.json()
 
-        print(f"메시지 전송 완료: {response.json()}, {msg.replace('\n', '\\n')}")
+        # 모든 메시지에 올라간 첨부파일 URL (하나라도 실패하면 None)
+        attachments = [a["url"] for a in response_json.get("attachments", [])]
+
+        for group in groups[1:]:
+            followup = send_followup(body, group)
+
+            if followup is None:
+                attachments = None
+            elif attachments is not None:
+                attachments.extend(a["url"] for a in followup.get("attachments", []))
+
+        print(f"메시지 전송 완료: {response_json}, {msg.replace('\n', '\\n')}")
 
         send_log(log_type, event, msg if error == None else error, image)
 
         return {
             "statusCode": 200,
             "body": json.dumps(
-                {"message": "메시지 전송 성공", "response": response.json(), "msg": msg}
+                {
+                    "message": "메시지 전송 성공",
+                    "response": response_json,
+                    "attachments": attachments,
+                    "msg": msg,
+                }
             ),
         }
 
     else:
-        url = f"https://discord.com/api/v10/webhooks/{os.getenv("DISCORD_APP_ID", None)}/{interaction_token}/messages/@original"
+        path = f"/webhooks/{os.getenv("DISCORD_APP_ID", None)}/{interaction_token}/messages/@original"
 
         headers = {"Content-Type": "application/json"}
 
-        response = requests.patch(url, headers=headers, data=json.dumps(payload))
+        response = discord_api.request(
+            "PATCH", path, auth=False, headers=headers, data=json.dumps(payload)
+        )
 
         print(f"메시지 전송 완료: {response.json()}, {msg.replace('\n', '\\n')}")
 
@@ -58,6 +90,175 @@ def send(event, msg, image=None, log_type=1, error=None):
         }
 
 
+def send_followup(body, images):
+    """
+    인터랙션 후속 메시지로 이미지 전송 (나만보기면 후속 메시지도 나만보기)
+    실패하면 None
+    """
+    payload = {"content": "", "flags": 64 if is_ephemeral(body) else 0}
+
+    path = f"/webhooks/{os.getenv('DISCORD_APP_ID')}/{body.get('token')}"
+
+    response = discord_api.request(
+        "POST",
+        path,
+        auth=False,
+        params={"wait": "true"},
+        files=get_multipart_data(payload, images),
+    )
+
+    if response.status_code != 200:
+        print(f"후속 메시지 전송 실패: {response.text}")
+        return None
+
+    return response.json()
+
+
+def is_ephemeral(body):
+    options = body["data"].get("options", [])
+
+    for i in options:
+        if i["name"] == "나만보기" and i["value"]:
+            return True
+
+        for j in i.get("options", []):
+            if j["name"] == "나만보기" and j["value"]:
+                return True
+
+    return False
+
+
+def group_images(image):
+    """
+    메시지 하나에 파일 MAX_FILES개, 용량 합 MAX_UPLOAD_BYTES 이하로 이미지를 나눔
+    image: 이미지 경로 또는 이미지 경로 리스트
+    """
+    images = image if isinstance(image, list) else [image]
+
+    groups = []
+    size = 0
+    for image_path in images:
+        image_size = os.path.getsize(image_path)
+
+        if (
+            not groups
+            or len(groups[-1]) >= MAX_FILES
+            or size + image_size > MAX_UPLOAD_BYTES
+        ):
+            groups.append([])
+            size = 0
+
+        groups[-1].append(image_path)
+        size += image_size
+
+    return groups
+
+
+def send_progress(event, msg):
+    """
+    결과가 나오기 전에 먼저 보내는 중간 메시지 (로그는 남기지 않음)
+    나중에 send로 보내는 최종 메시지가 이 메시지를 덮어씀
+    """
+    body = json.loads(event["body"])
+    interaction_token = body.get("token")
+
+    path = f"/webhooks/{os.getenv("DISCORD_APP_ID", None)}/{interaction_token}/messages/@original"
+
+    headers = {"Content-Type": "application/json"}
+
+    try:
+        discord_api.request(
+            "PATCH",
+            path,
+            auth=False,
+            headers=headers,
+            data=json.dumps({"content": msg}),
+        )
+    except Exception as e:  # 중간 메시지 실패는 최종 응답에 영향 없음
+        print(f"중간 메시지 전송 실패: {e}")
+
+
+def send_cached(event, msg, image_urls, log_type=1):
+    """
+    이미 디스코드에 올라간 이미지 URL로 응답 (결과 캐시, 다른 요청이 만든 결과)
+    """
+    body = json.loads(event["body"])
+    interaction_token = body.get("token")
+
+    payload = {
+        "content": msg,
+        "embeds": [{"image": {"url": url}} for url in image_urls],
+    }
+
+    path = f"/webhooks/{os.getenv("DISCORD_APP_ID", None)}/{interaction_token}/messages/@original"
+
+    headers = {"Content-Type": "application/json"}
+
+    response = discord_api.request(
+        "PATCH", path, auth=False, headers=headers, data=json.dumps(payload)
+    )
+
+    print(f"메시지 전송 완료 (캐시): {response.json()}, {msg.replace('\n', '\\n')}")
+
+    send_log(log_type, event, msg)
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps(
+            {"message": "메시지 전송 성공", "response": response.json(), "msg": msg}
+        ),
+    }
+
+
+def upload_images(image):
+    """
+    저장 채널에 이미지를 올리고 첨부파일 URL 목록 반환 (미리 만든 결과를 캐시에 저장할 때 사용)
+    업로드 제한을 넘으면 여러 메시지로 나눠서 올림, 실패하거나 저장 채널이 없으면 None
+    """
+    if not STORAGE_CHANNEL_ID:
+        return None
+
+    urls = []
+
+    for group in group_images(image):
+        multipart_data = get_multipart_data({}, group)
+
+        response = discord_api.request(
+            "POST", f"/channels/{STORAGE_CHANNEL_ID}/messages", files=multipart_data
+        )
+
+        if response.status_code != 200:
+            print(f"이미지 업로드 실패: {response.text}")
+            return None
+
+        urls.extend(a["url"] for a in response.json().get("attachments", []))
+
+    return urls
+
+
+def get_multipart_data(payload, image):
+    """
+    image: 이미지 경로 또는 이미지 경로 리스트 (최대 10개)
+    """
+    images = image if isinstance(image, list) else [image]
+
+    multipart_data = {
+        "payload_json": (None, json.dumps(payload), "application/json"),
+    }
+
+    for i, image_path in enumerate(images):
+        with open(image_path, "rb") as f:
+            file_data = f.read()
+
+        multipart_data[f"files[{i}]"] = (
+            os.path.basename(image_path),
+            file_data,
+            "application/octet-stream",
+        )
+
+    return multipart_data
+
+
 def send_log(log_type, event, msg="", image=None):
     """
     log_type: 1 - 명령어 로그
@@ -80,7 +281,7 @@ def send_log(log_type, event, msg="", image=None):
         member_name = body["member"]["user"]["global_name"]
         member_username = body["member"]["user"]["username"]
 
-        guild_name = misc.get_guild_name(guild_id)
+        guild_name = discord_api.get_guild_name(guild_id)
         channel_name = body["channel"]["name"]
 
         if (log_type == 1) or (log_type == 2):
@@ -222,62 +423,204 @@ def send_log(log_type, event, msg="", image=None):
                         }
                     )
 
-        elif log_type == 6:
-            embed_json = {
-                "time": now,
-                "cmd": event["action"],
-                "user-type": msg,
-            }
+        elif log_type == 6:  # 업데이트 중에 여러 번 발생하므로 모아서 하나로 전송
+            with log_lock:
+                digest.append(f"{now} {event['action']}: {msg}")
 
-            title = "투데이즈 플레이어 등록 / 업데이트 로그"
-            color = 3447003
-
-            fields = []
-            for key, value in embed_json.items():
-                if value != None:
-                    fields.append(
-                        {
-                            "name": key,
-                            "value": value,
-                            "inline": False,
-                        }
-                    )
+            start_log_thread()
+            return
 
         else:
             return
 
-    # 로그 전송
-    payload = {
-        "content": "" if log_type in [1, 2, 4] else f"<@{ADMIN_ID}>",
-        "embeds": [{"title": title, "color": color, "fields": fields}],
-    }
+    # 로그는 큐에 넣고 백그라운드 스레드나 실행이 끝날 때 (flush_logs) 모아서 전송
+    # 이미지는 한 장씩 임베드에 붙여서 여러 로그를 묶어도 어느 로그의 이미지인지 알 수 있게 함
+    images = (image if isinstance(image, list) else [image]) if image else []
+
+    files = []
+    for image_path in images:
+        with open(image_path, "rb") as f:  # 파일이 덮어씌워지기 전에 읽어둠
+            files.append((os.path.basename(image_path), f.read()))
+
+    for i in range(max(1, len(files))):
+        queue_log(
+            (
+                {"title": title, "color": color, "fields": fields}
+                if i == 0
+                else {
+                    "title": f"{title} (이미지 {i + 1})",
+                    "color": color,
+                    "fields": [],
+                }
+            ),
+            mention=log_type not in [1, 2, 4],
+            files=files[i : i + 1],
+        )
 
-    url = f"https://discord.com/api/v10/channels/{LOG_CHANNEL_ID}/messages"
+    print(f"로그 추가 완료: {msg.replace('\n', '\\n')}")
 
-    headers = {
-        "Authorization": f"Bot {DISCORD_TOKEN}",
-        "Content-Type": "application/json",
-    }
 
-    response = requests.post(url, headers=headers, data=json.dumps(payload))
+def queue_log(embed, mention=False, files=None):
+    for field in embed["fields"]:
+        value = str(field["value"])
+        if len(value) > MAX_FIELD_CHARS:  # 에러 로그는 끝부분이 중요함
+            field["value"] = "…" + value[-(MAX_FIELD_CHARS - 1) :]
 
-    # 이미지 전송
-    if image:
-        with open(image, "rb") as f:
-            file_data = f.read()
+    with log_lock:
+        log_queue.append({"embed": embed, "mention": mention, "files": files or []})
+
+        if len(log_queue) >= MAX_EMBEDS:
+            log_lock.notify()
+
+    start_log_thread()
+
+
+def start_log_thread():
+    global log_thread
+
+    with log_lock:
+        if log_thread is None:
+            log_thread = threading.Thread(target=log_worker, daemon=True)
+            log_thread.start()
+
+
+def log_worker():
+    while True:
+        with log_lock:
+            log_lock.wait(FLUSH_INTERVAL)
 
-        payload = {
-            "content": "",
+        flush_logs()
+
+
+def flush_logs():
+    """
+    쌓인 로그를 임베드 10개씩 묶어서 전송
+    람다가 끝나면 백그라운드 스레드가 멈추기 때문에 lambda_handler가 끝날 때 호출해야 함
+    백그라운드 스레드가 보내는 중인 로그가 있으면 다 보낼 때까지 기다린 뒤 남은 로그를 보냄
+    """
+    with send_lock:
+        with log_lock:
+            items = log_queue[:]
+            log_queue.clear()
+
+            lines = digest[:]
+            digest.clear()
+
+        items.extend(make_digest(lines))
+
+        for batch in pack_logs(items):
+            try:
+                post_logs(batch)
+            except Exception as e:  # 로그 전송 실패는 무시
+                print(f"로그 전송 실패: {e}")
+
+
+def make_digest(lines):
+    """
+    플레이어 등록 / 업데이트 로그를 임베드 몇 개로 묶음
+    """
+    values = []
+    for line in lines:
+        line = line[:MAX_FIELD_CHARS]
+
+        if values and len(values[-1]) + len(line) + 1 <= MAX_FIELD_CHARS:
+            values[-1] += "\n" + line
+        else:
+            values.append(line)
+
+    items = []
+    for i in range(0, len(values), DIGEST_FIELDS):
+        fields = [
+            {"name": f"user-type ({len(lines)}건)", "value": value, "inline": False}
+            for value in values[i : i + DIGEST_FIELDS]
+        ]
+
+        embed = {
+            "title": "투데이즈 플레이어 등록 / 업데이트 로그",
+            "color": 3447003,
+            "fields": fields,
         }
-        headers = {"Authorization": f"Bot {DISCORD_TOKEN}"}
+        items.append({"embed": embed, "mention": True, "files": []})
+
+    return items
+
+
+def get_embed_chars(embed):
+    return len(embed["title"]) + sum(
+        len(field["name"]) + len(str(field["value"])) for field in embed["fields"]
+    )
+
+
+def pack_logs(items):
+    """
+    메시지 하나에 임베드 10개, 파일 10개, 파일 용량 합 MAX_UPLOAD_BYTES, 임베드 글자 수 6000자 이하로 묶음
+    """
+    batches = []
+    embeds = files = size = chars = 0
+
+    for item in items:
+        item_chars = get_embed_chars(item["embed"])
+        item_size = sum(len(file_data) for _, file_data in item["files"])
+
+        if (
+            not batches
+            or embeds + 1 > MAX_EMBEDS
+            or files + len(item["files"]) > MAX_FILES
+            or size + item_size > MAX_UPLOAD_BYTES
+            or chars + item_chars > MAX_EMBED_CHARS
+        ):
+            batches.append([])
+            embeds = files = size = chars = 0
+
+        batches[-1].append(item)
+        embeds += 1
+        files += len(item["files"])
+        size += item_size
+        chars += item_chars
+
+    return batches
+
+
+def post_logs(batch):
+    embeds = []
+    files = []
+
+    for item in batch:
+        embed = dict(item["embed"])
 
-        url = f"https://discord.com/api/v10/channels/{LOG_CHANNEL_ID}/messages"
+        # 여러 로그의 이미지 이름이 같을 수 있으므로 (image.png) 앞에 번호를 붙이고 임베드에 연결
+        for filename, file_data in item["files"]:
+            filename = f"{len(files)}_{filename}"
+            embed["image"] = {"url": f"attachment://{filename}"}
+            files.append((filename, file_data))
 
+        embeds.append(embed)
+
+    payload = {
+        "content": (f"<@{ADMIN_ID}>" if any(item["mention"] for item in batch) else ""),
+        "embeds": embeds,
+    }
+
+    path = f"/channels/{LOG_CHANNEL_ID}/messages"
+
+    if files:
         multipart_data = {
             "payload_json": (None, json.dumps(payload), "application/json"),
-            "file": (image, file_data, "application/octet-stream"),
         }
+        for i, (filename, file_data) in enumerate(files):
+            multipart_data[f"files[{i}]"] = (
+                filename,
+                file_data,
+                "application/octet-stream",
+            )
+
+        response = discord_api.request("POST", path, files=multipart_data)
+
+    else:
+        headers = {"Content-Type": "application/json"}
 
-        response = requests.post(url, headers=headers, files=multipart_data)
+        response = discord_api.request(
+            "POST", path, headers=headers, data=json.dumps(payload)
+        )
 
-    print(f"로그 전송 완료: {response.json()}, {msg.replace('\n', '\\n')}")
+    print(f"로그 전송 완료: {len(batch)}개, {response.status_code}")
@@ -6,6 +6,8 @@ import traceback
 
 import misc
 import send_msg as sm
+import precompute
+import rank_index
 import data_manager as dm
 import get_rank_info as gri
 import register_player as rp
@@ -20,10 +22,19 @@ def update_1D(event):
 
     today = misc.get_today(days_before + 1)
 
+    # 하루 동안 쌓인 플레이어 변경 기록을 스냅샷에 합침
+    try:
+        rp.compact_snapshot()
+    except:
+        sm.send_log(5, event, "플레이어 스냅샷 정리 실패" + traceback.format_exc())
+
     # 플레이어 업데이트
     try:
         players = rp.get_registered_players()
 
+        # 플레이어마다 모장 API를 조회하면 rate limit에 걸리므로 10명씩 한번에 조회해서 캐시에 저장
+        misc.get_profile_from_mc(names=[player["name"] for player in players])
+
         threads = []
         for player in players:
             update_player(event, player["name"], player["id"])
@@ -41,6 +52,12 @@ def update_1D(event):
     except:
         sm.send_log(5, event, "플레이어 데이터 업데이트 실패" + traceback.format_exc())
 
+    # 지난 날짜 순위를 조회할 때 DailyData 전체를 읽지 않도록 전체 순위를 한 번 저장
+    try:
+        rank_index.save_past_index(today)
+    except:
+        sm.send_log(5, event, "랭킹 인덱스 저장 실패" + traceback.format_exc())
+
     # 랭커 등록, 업데이트
     try:
         rankdata = gri.get_current_rank_data(None, days_before=days_before + 1)
@@ -112,6 +129,19 @@ def update_1D(event):
     except:
         sm.send_log(5, event, "랭킹 데이터 업데이트 실패" + traceback.format_exc())
 
+    # 어제 데이터로 자주 조회되는 결과 미리 만들기 (지난 날짜를 다시 업데이트할 때는 생략)
+    if days_before == 0:
+        try:
+            precompute.precompute(event, today)
+        except:
+            sm.send_log(5, event, "결과 미리 만들기 실패" + traceback.format_exc())
+
+        # 날짜 없이 조회하는 기본 /랭킹은 오늘(실시간) 기준
+        try:
+            precompute.precompute_live(event)
+        except:
+            sm.send_log(5, event, "결과 미리 만들기 실패" + traceback.format_exc())
+
     sm.send_log(4, event, "데이터 업데이트 완료")
 
 
@@ -124,41 +154,36 @@ def update_player(event, name, id):
     try:
         data = gci.get_current_character_data(name, days_before + 1)  # 어제
 
+        # 닉네임 변경을 처리하다 실패해도 데이터는 남도록 먼저 저장
+        for i, j in enumerate(data or []):
+            item = {
+                "id": id,
+                "date-slot": f"{today.strftime("%Y-%m-%d")}#{i}",
+                "job": misc.convert_job(j["job"]),
+                "level": j["level"],
+            }
+
+            dm.write_data("DailyData", item)
+
         # 웹사이트 열리면 코드 필요 없음
-        if not misc.get_profile_from_mc(
+        if not has_profile(
             name
         ):  # name에 해당하는 유저 없음, 등록은 되어있음 -> 닉네임 변경함 => uuid로 등록
-            uuid = misc.get_uuid(name)
-            if not uuid:
-                sm.send_log(5, event, f"{name} 닉네임 변경, 등록된 uuid 없음1")
-                raise Exception
-
-            changed_name = misc.get_profile_from_mc(uuid=uuid)
-            result = rp.register_player(changed_name, misc.get_main_slot(name))
-
-            if result == 1:
-                sm.send_log(6, event, f"{name} -> {changed_name} 등록 mcprofile1")
-            elif result == 2:
-                sm.send_log(6, event, f"{name} -> {changed_name} 업데이트 mcprofile1")
+            rename_player(event, name, "mcprofile1")
 
         if (
             not data
         ):  # 웹사이트에 검색 안됨, 등록 되어있음 -> 닉네임 변경함 => uuid로 등록
-            uuid = misc.get_uuid(name)
-            if not uuid:
-                sm.send_log(5, event, f"{name} 닉네임 변경, 등록된 uuid 없음1")
-                raise Exception
-
-            changed_name = misc.get_profile_from_mc(uuid=uuid)
-            result = rp.register_player(changed_name, misc.get_main_slot(name))
+            rename_player(event, name, "not data1")
+    except:
+        failed_list.append(name)
 
-            if result == 1:
-                sm.send_log(6, event, f"{name} -> {changed_name} 등록 not data1")
-            elif result == 2:
-                sm.send_log(6, event, f"{name} -> {changed_name} 업데이트 not data1")
+    if failed_list:
+        try:
+            data = gci.get_current_character_data(name, days_before + 1)  # 어제
 
-        else:
-            for i, j in enumerate(data):
+            # 닉네임 변경을 처리하다 실패해도 데이터는 남도록 먼저 저장
+            for i, j in enumerate(data or []):
                 item = {
                     "id": id,
                     "date-slot": f"{today.strftime("%Y-%m-%d")}#{i}",
@@ -167,66 +192,66 @@ def update_player(event, name, id):
                 }
 
                 dm.write_data("DailyData", item)
-    except:
-        failed_list.append(name)
-
-    if failed_list:
-        try:
-            data = gci.get_current_character_data(name, days_before + 1)  # 어제
 
             # 웹사이트 열리면 코드 필요 없음
-            if not misc.get_profile_from_mc(
+            if not has_profile(
                 name
             ):  # name에 해당하는 유저 없음, 등록은 되어있음 -> 닉네임 변경함 => uuid로 등록
-                uuid = misc.get_uuid(name)
-                if not uuid:
-                    sm.send_log(5, event, f"{name} 닉네임 변경, 등록된 uuid 없음2")
-                    raise Exception
-
-                changed_name = misc.get_profile_from_mc(uuid=uuid)
-                result = rp.register_player(changed_name, misc.get_main_slot(name))
-
-                if result == 1:
-                    sm.send_log(6, event, f"{name} -> {changed_name} 등록 mcprofile2")
-                elif result == 2:
-                    sm.send_log(
-                        6, event, f"{name} -> {changed_name} 업데이트 mcprofile2"
-                    )
+                rename_player(event, name, "mcprofile2")
 
             if (
                 not data
             ):  # 웹사이트에 검색 안됨, 등록 되어있음 -> 닉네임 변경함 => uuid로 등록
-                uuid = misc.get_uuid(name)
-                if not uuid:
-                    sm.send_log(5, event, f"{name} 닉네임 변경, 등록된 uuid 없음2")
-                    raise Exception
-
-                changed_name = misc.get_profile_from_mc(uuid=uuid)
-                result = rp.register_player(changed_name, misc.get_main_slot(name))
-
-                if result == 1:
-                    sm.send_log(6, event, f"{name} -> {changed_name} 등록 not data2")
-                elif result == 2:
-                    sm.send_log(
-                        6, event, f"{name} -> {changed_name} 업데이트 not data2"
-                    )
-
-            else:
-                for i, j in enumerate(data):
-                    item = {
-                        "id": id,
-                        "date-slot": f"{today.strftime("%Y-%m-%d")}#{i}",
-                        "job": misc.convert_job(j["job"]),
-                        "level": j["level"],
-                    }
-
-                    dm.write_data("DailyData", item)
+                rename_player(event, name, "not data2")
         except:
             sm.send_log(
                 5, event, f"{name} 데이터 업데이트 실패" + traceback.format_exc()
             )
 
 
+def has_profile(name) -> bool:
+    """
+    모장 API에 name 닉네임이 있는지
+    조회에 실패하면 (rate limit, 회로 열림 등) 알 수 없으므로 있는 것으로 보고 닉네임 변경 확인을 생략
+    """
+    import requests
+    from mojang.errors import MojangError
+
+    try:
+        return misc.get_profile_from_mc(name, strict=True) is not None
+    except (MojangError, requests.RequestException) as e:
+        print(f"{name} 모장 프로필 조회 실패, 닉네임 변경 확인 생략: {e}")
+        return True
+
+
+def rename_player(event, name, tag):
+    """
+    닉네임을 바꾼 플레이어를 uuid로 찾아서 새 닉네임으로 등록
+    이미 반영된 변경이면 (NameHistory로 다른 현재 닉네임을 찾으면) 모장 API를 다시 조회하지 않음
+    """
+    current_name = misc.get_name(name)
+    if current_name is not None and current_name.lower() != name.lower():
+        return
+
+    uuid = misc.get_uuid(name)
+    if not uuid:
+        sm.send_log(5, event, f"{name} 닉네임 변경, 등록된 uuid 없음{tag[-1]}")
+        raise Exception
+
+    profile = misc.get_profile_from_mc(uuid=uuid)
+    if profile is None:
+        sm.send_log(5, event, f"{name} 닉네임 변경, 모장 프로필 없음{tag[-1]}")
+        raise Exception
+
+    changed_name = next(iter(profile.values()))["name"]
+    result = rp.register_player(changed_name, misc.get_main_slot(name))
+
+    if result == 1:
+        sm.send_log(6, event, f"{name} -> {changed_name} 등록 {tag}")
+    elif result == 2:
+        sm.send_log(6, event, f"{name} -> {changed_name} 업데이트 {tag}")
+
+
 if __name__ == "__main__":
     update_1D({"action": "update_1D"})
     pass
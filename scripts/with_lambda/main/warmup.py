@@ -0,0 +1,125 @@
+import io
+import time
+import importlib
+import traceback
+
+import discord_api
+import data_manager as dm
+
+# 명령어 처리에서 처음 불러올 때 오래 걸리는 모듈
+WARMUP_MODULES = [
+    "update",
+    "get_rank_info",
+    "get_character_info",
+    "get_level_distribution",
+    "get_comparison",
+]
+
+
+def warmup(event) -> dict:
+    """
+    {"action": "warmup"} 이벤트 처리
+    피크 시간 전에 스케줄러로 호출해서 컨테이너를 미리 데워둠
+
+    모듈 import, matplotlib/폰트 캐시, DynamoDB/디스코드 연결,
+    실시간 랭킹 인덱스와 상위 플레이어의 머리 이미지를 미리 불러오고
+    기본 /랭킹 결과가 만료됐으면 다시 만들어서 결과 캐시에 저장
+    각 단계는 실패해도 다음 단계를 계속 진행함
+
+    반환: {단계 이름: 걸린 시간(초) 또는 에러 메시지}
+    """
+    steps = [
+        ("import", import_modules),
+        ("matplotlib", render_figure),
+        ("rank_table", prepare_rank_table),
+        ("dynamodb", connect_dynamodb),
+        ("discord", connect_discord),
+        ("leaderboard", preload_leaderboard),
+        ("precompute", lambda: precompute_live(event)),
+    ]
+
+    result = {}
+    for name, func in steps:
+        start = time.time()
+
+        try:
+            func()
+            result[name] = round(time.time() - start, 3)
+
+        except Exception:
+            print(traceback.format_exc())
+            result[name] = traceback.format_exc().strip().splitlines()[-1]
+
+    print(f"warmup 완료: {result}")
+
+    return result
+
+
+def import_modules():
+    for module in WARMUP_MODULES:
+        importlib.import_module(module)
+
+
+def render_figure():
+    """
+    작은 그래프를 그려서 Agg 렌더러와 한글 폰트 캐시를 채움
+    """
+    import plot_style
+    import matplotlib.pyplot as plt
+
+    plot_style.setup()
+
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.plot([0, 1], [0, 1])
+    ax.set_title("투데이즈 0123456789")
+
+    fig.savefig(io.BytesIO(), format="png", dpi=50)
+    plt.close(fig)
+
+
+def prepare_rank_table():
+    """
+    랭킹 표의 폰트, 헤더, 템플릿, 자주 쓰는 글자 마스크를 미리 만듦
+    """
+    import rank_table
+
+    rank_table.get_template(10)
+
+    for i in range(1, 101):
+        rank_table.get_text_mask(str(i))
+
+    for text in ["New", "-"]:
+        rank_table.get_text_mask(text)
+
+
+def connect_dynamodb():
+    """
+    boto3 세션과 리소스를 만들고 자주 쓰는 테이블에 연결
+    """
+    for table_name in ["Users", "DailyData", "Ranks"]:
+        dm.get_table(table_name).load()
+
+
+def connect_discord():
+    discord_api.request("GET", "/gateway", auth=False)
+
+
+def preload_leaderboard():
+    """
+    기본 /랭킹이 사용하는 오늘(실시간) 랭킹 인덱스를 만들어두고
+    1~10위의 이름과 머리 이미지를 미리 불러옴
+    """
+    import player_head
+    import get_rank_info as gri
+
+    # 인덱스는 rank_index에 LIVE_TTL 동안 캐시됨
+    data = gri.get_current_rank_data([1, 10])
+
+    if data:
+        player_head.get_heads([d["name"] for d in data if d["name"]])
+
+
+def precompute_live(event):
+    import precompute
+
+    precompute.precompute_live(event)
@@ -0,0 +1,112 @@
+import os
+import sys
+import datetime
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "main"))
+
+import cache_key
+
+TODAY = datetime.date(2025, 3, 15)
+
+
+def make_body(cmd, options=None, sub=None):
+    options = options or []
+
+    if sub is not None:
+        options = [{"type": 1, "name": sub, "options": options}]
+
+    return {"data": {"name": cmd, "options": options}}
+
+
+class CacheKeyTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(cache_key, "get_today", return_value=TODAY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_cacheable(self):
+        self.assertIsNone(cache_key.get_cache_key(make_body("등록")))
+
+    def test_defaults(self):
+        # 생략된 옵션은 기본값, 날짜가 없으면 오늘
+        self.assertEqual(
+            cache_key.get_cache_key(make_body("랭킹")),
+            "2025-03-15|랭킹||날짜=2025-03-15|랭킹범위=1..10",
+        )
+        self.assertEqual(
+            cache_key.get_cache_key(make_body("랭킹")),
+            cache_key.get_cache_key(
+                make_body("랭킹", [{"name": "랭킹범위", "value": "1..10"}])
+            ),
+        )
+
+    def test_ignore_private(self):
+        self.assertEqual(
+            cache_key.get_cache_key(
+                make_body("랭킹", [{"name": "나만보기", "value": True}])
+            ),
+            cache_key.get_cache_key(make_body("랭킹")),
+        )
+
+    def test_lower_name(self):
+        keys = [
+            cache_key.get_cache_key(
+                make_body("검색", [{"name": "닉네임", "value": name}], sub="레벨")
+            )
+            for name in ["ProDays", "prodays", " PRODAYS "]
+        ]
+
+        self.assertEqual(len(set(keys)), 1)
+        self.assertIn("|검색|레벨|", keys[0])
+        self.assertIn("닉네임=prodays", keys[0])
+
+    def test_normalize_date(self):
+        keys = [
+            cache_key.get_cache_key(
+                make_body("유저분포", [{"name": "날짜", "value": day}])
+            )
+            for day in ["2025-03-10", "03-10", "10", "-5"]
+        ]
+
+        self.assertEqual(len(set(keys)), 1)
+        self.assertTrue(keys[0].endswith("날짜=2025-03-10"))
+
+    def test_invalid_date(self):
+        # 잘못된 날짜는 입력 그대로
+        key = cache_key.get_cache_key(
+            make_body("유저분포", [{"name": "날짜", "value": "abc"}])
+        )
+
+        self.assertTrue(key.endswith("날짜=abc"))
+
+
+class ParseDateTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(cache_key, "get_today", return_value=TODAY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_formats(self):
+        self.assertEqual(cache_key.parse_date(None), TODAY)
+        self.assertEqual(cache_key.parse_date(""), TODAY)
+        self.assertEqual(
+            cache_key.parse_date("2024-12-31"), datetime.date(2024, 12, 31)
+        )
+        self.assertEqual(cache_key.parse_date("03-01"), datetime.date(2025, 3, 1))
+        self.assertEqual(cache_key.parse_date("05"), datetime.date(2025, 3, 5))
+        self.assertEqual(cache_key.parse_date("-1"), datetime.date(2025, 3, 14))
+        self.assertEqual(cache_key.parse_date("-20"), datetime.date(2025, 2, 23))
+
+    def test_invalid(self):
+        for day in ["abc", "2025-02-30", "13-01", "-", "-a"]:
+            self.assertEqual(cache_key.parse_date(day), -1, day)
+
+    def test_future(self):
+        self.assertEqual(cache_key.parse_date("2025-03-16"), -2)
+        self.assertEqual(cache_key.parse_date("20"), -2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "main"))
+
+from get_comparison import parse_names
+
+
+class ParseNamesTest(unittest.TestCase):
+    def test_separators(self):
+        self.assertEqual(parse_names("a, b c"), ["a", "b", "c"])
+        self.assertEqual(parse_names(" a,,b ,  c,"), ["a", "b", "c"])
+
+    def test_dedup(self):
+        # 대소문자 구분 없이 중복 제거, 처음 입력한 닉네임 유지
+        self.assertEqual(parse_names("ProDays, b prodays B"), ["ProDays", "b"])
+
+    def test_empty(self):
+        self.assertEqual(parse_names(""), [])
+        self.assertEqual(parse_names(" , "), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "main"))
+
+import misc
+
+
+def scalar_pchip(x, y, x_new):
+    """
+    반복문으로 한 점씩 계산하던 이전 pchip_interpolate (비교용)
+    """
+    x = np.array(x, dtype=float)
+    y = np.array(y, dtype=float)
+    n = len(x)
+
+    h = np.diff(x)
+    delta = np.diff(y) / h
+
+    m = np.zeros(n)
+    for i in range(1, n - 1):
+        if delta[i - 1] * delta[i] > 0:
+            w1 = 2 * h[i] + h[i - 1]
+            w2 = h[i] + 2 * h[i - 1]
+            m[i] = (w1 + w2) / (w1 / delta[i - 1] + w2 / delta[i])
+    m[0] = delta[0]
+    m[-1] = delta[-1]
+
+    y_new = np.zeros(len(x_new))
+    for i, xn in enumerate(x_new):
+        if xn <= x[0]:
+            y_new[i] = y[0]
+        elif xn >= x[-1]:
+            y_new[i] = y[-1]
+        else:
+            idx = np.searchsorted(x, xn) - 1
+            x0, x1 = x[idx], x[idx + 1]
+            y0, y1 = y[idx], y[idx + 1]
+            m0, m1 = m[idx], m[idx + 1]
+            h0 = x1 - x0
+            s = xn - x0
+
+            c = (3 * (y1 - y0) / h0 - 2 * m0 - m1) / h0
+            d = (m0 + m1 - 2 * (y1 - y0) / h0) / (h0**2)
+            y_new[i] = y0 + m0 * s + c * s**2 + d * s**3
+
+    return y_new
+
+
+class PchipTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+
+        self.x = np.cumsum(rng.uniform(0.5, 2, 30))
+        # 올라가기만 하는 열, 오르내리는 열, 평평한 구간이 있는 열
+        self.y = np.column_stack(
+            [
+                np.cumsum(rng.uniform(0, 1, 30)),
+                np.sin(self.x),
+                np.repeat([1.0, 2.0, 2.0], 10),
+            ]
+        )
+        self.x_new = np.linspace(self.x[0] - 1, self.x[-1] + 1, 500)
+
+    def test_1d(self):
+        for k in range(self.y.shape[1]):
+            np.testing.assert_allclose(
+                misc.pchip_interpolate(self.x, self.y[:, k], self.x_new),
+                scalar_pchip(self.x, self.y[:, k], self.x_new),
+            )
+
+    def test_2d(self):
+        y_new = misc.pchip_interpolate(self.x, self.y, self.x_new)
+
+        self.assertEqual(y_new.shape, (len(self.x_new), self.y.shape[1]))
+
+        for k in range(self.y.shape[1]):
+            np.testing.assert_allclose(
+                y_new[:, k], scalar_pchip(self.x, self.y[:, k], self.x_new)
+            )
+
+    def test_monotonic(self):
+        y_new = misc.pchip_interpolate(self.x, self.y[:, 0], self.x_new)
+
+        self.assertTrue(np.all(np.diff(y_new) >= -1e-12))
+
+    def test_two_points(self):
+        np.testing.assert_allclose(
+            misc.pchip_interpolate([0, 2], [1, 3], [-1, 0, 1, 2, 3]),
+            [1, 1, 2, 3, 3],
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            misc.pchip_interpolate([0, 1, 2], [0, 1], [0.5])
+
+        with self.assertRaises(ValueError):
+            misc.pchip_interpolate([0, 2, 1], [0, 1, 2], [0.5])
+
+
+class LttbTest(unittest.TestCase):
+    def test_keep_all(self):
+        x = np.arange(10)
+
+        np.testing.assert_array_equal(misc.lttb_indices(x, x, 10), x)
+        np.testing.assert_array_equal(misc.lttb_indices(x, x, 20), x)
+        np.testing.assert_array_equal(misc.lttb_indices(x, x, 2), x)
+
+    def test_downsample(self):
+        rng = np.random.default_rng(0)
+        x = np.arange(1000)
+        y = np.cumsum(rng.normal(size=1000))
+
+        indices = misc.lttb_indices(x, y, 100)
+
+        self.assertEqual(len(indices), 100)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 999)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_keep_peak(self):
+        x = np.arange(100)
+        y = np.zeros(100)
+        y[37] = 10
+
+        self.assertIn(37, misc.lttb_indices(x, y, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "main"))
+
+from rank_index import RankIndex
+
+
+def make_entry(_id, slot, level):
+    return {"id": Decimal(_id), "slot": Decimal(slot), "level": Decimal(level)}
+
+
+class RankIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = RankIndex(
+            [
+                make_entry(1, 1, "50.5"),
+                make_entry(2, 1, "80"),
+                make_entry(1, 2, "80"),
+                make_entry(3, 4, "10"),
+            ]
+        )
+
+    def test_rank(self):
+        self.assertEqual(len(self.index), 4)
+        # 같은 레벨이면 입력 순서
+        self.assertEqual(self.index.rank(2, 1), 1)
+        self.assertEqual(self.index.rank(1, 2), 2)
+        self.assertEqual(self.index.rank(1, 1), 3)
+        self.assertEqual(self.index.rank(3, 4), 4)
+        self.assertIsNone(self.index.rank(3, 1))
+
+    def test_rank_of_level(self):
+        self.assertEqual(self.index.rank_of_level(100), 1)
+        self.assertEqual(self.index.rank_of_level(80), 1)
+        self.assertEqual(self.index.rank_of_level(Decimal("50.5")), 3)
+        self.assertEqual(self.index.rank_of_level(20), 4)
+        self.assertEqual(self.index.rank_of_level(1), 5)
+
+    def test_percentile(self):
+        self.assertEqual(self.index.percentile(1), 25)
+        self.assertEqual(self.index.percentile(4), 100)
+
+    def test_copy(self):
+        self.index.top(1)[0]["level"] = 0
+        self.index.window(1, 1)[0]["level"] = 0
+
+        self.assertEqual(self.index.top(1)[0]["level"], 80)
+
+
+if __name__ == "__main__":
+    unittest.main()